@@ -0,0 +1,353 @@
+"""Substitutos locais da Square Cloud, do Mercado Pago e do Discord para os benchmarks."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Iterator
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if os.path.join(RAIZ, "src") not in sys.path:
+    sys.path.insert(0, os.path.join(RAIZ, "src"))
+
+
+class ErroFalso(Exception):
+    """Falha injetada pelos substitutos."""
+
+
+class Latencia:
+    """Latência simulada com variação uniforme e taxa de erro configurável."""
+
+    def __init__(self, media: float = 0.05, variacao: float = 0.5, taxa_erro: float = 0.0):
+        self.media = media
+        self.variacao = variacao
+        self.taxa_erro = taxa_erro
+
+    async def esperar(self) -> None:
+        await asyncio.sleep(self.media * random.uniform(1 - self.variacao, 1 + self.variacao))
+        if self.taxa_erro and random.random() < self.taxa_erro:
+            raise ErroFalso("erro simulado")
+
+
+class Chamadas:
+    """Conta as chamadas feitas a cada operação, com o instante de cada uma."""
+
+    def __init__(self):
+        self.por_operacao: Counter[str] = Counter()
+        self.instantes: list[float] = []
+
+    def registrar(self, operacao: str) -> None:
+        self.por_operacao[operacao] += 1
+        self.instantes.append(time.monotonic())
+
+    @property
+    def total(self) -> int:
+        return sum(self.por_operacao.values())
+
+
+class StatusFalso:
+    """Campos usados pelos cogs a partir do StatusData da biblioteca."""
+
+    __slots__ = ("cpu", "ram", "storage", "status", "running", "requests", "uptime", "time", "network")
+
+    def __init__(self, running: bool = True):
+        self.cpu = f"{random.uniform(0, 100):.1f}%"
+        self.ram = f"{random.uniform(20, 512):.0f}MB"
+        self.storage = f"{random.uniform(1, 200):.0f}MB"
+        self.status = "running" if running else "exited"
+        self.running = running
+        self.requests = random.randint(0, 10_000)
+        self.uptime = random.randint(0, 10**9)
+        self.time = None
+        self.network = {"total": "0 KB", "now": "0 KB"}
+
+
+class LogsFalsos:
+    __slots__ = ("logs",)
+
+    def __init__(self, logs: str):
+        self.logs = logs
+
+
+class BackupFalso:
+    def __init__(self, url: str, key: str):
+        self.url = url
+        self.key = key
+
+
+class AppFalsa:
+    """Aplicação com as operações usadas pelos botões do dashboard."""
+
+    def __init__(self, cliente: ClienteSquareFalso, indice: int):
+        self.cliente = cliente
+        self.id = f"{indice:032x}"
+        self.name = f"app-{indice:04d}"
+        self.running = True
+
+    async def _acao(self, nome: str, running: bool | None = None) -> None:
+        self.cliente.chamadas.registrar(nome)
+        await self.cliente.latencia.esperar()
+        if running is not None:
+            self.running = running
+
+    async def start(self):
+        await self._acao("start", True)
+
+    async def stop(self):
+        await self._acao("stop", False)
+
+    async def restart(self):
+        await self._acao("restart", True)
+
+    async def delete(self):
+        await self._acao("delete")
+
+
+class ClienteSquareFalso:
+    """Imita os métodos do ``squarecloud.Client`` usados pelos cogs."""
+
+    def __init__(self, quantidade_apps: int, latencia: Latencia | None = None):
+        self.latencia = latencia or Latencia()
+        self.chamadas = Chamadas()
+        self.apps = [AppFalsa(self, i) for i in range(quantidade_apps)]
+        self._por_id = {app.id: app for app in self.apps}
+        self.linhas_log: dict[str, int] = {}
+        self.linhas_por_consulta = 7
+        # Servidor que entrega os arquivos de backup (``{url_backup}/{tamanho}.zip``)
+        self.url_backup = "http://127.0.0.1"
+        self.tamanho_backup = 1024 * 1024
+
+    async def all_apps(self) -> list[AppFalsa]:
+        self.chamadas.registrar("all_apps")
+        await self.latencia.esperar()
+        return list(self.apps)
+
+    async def get_logs(self, app_id: str) -> LogsFalsos:
+        """Últimas linhas do log, que ganha ``linhas_por_consulta`` linhas novas a cada chamada."""
+        self.chamadas.registrar("get_logs")
+        await self.latencia.esperar()
+        total = self.linhas_log.get(app_id, 0) + self.linhas_por_consulta
+        self.linhas_log[app_id] = total
+        return LogsFalsos("\n".join(f"[{app_id[-4:]}] linha {i}" for i in range(max(0, total - 100), total)))
+
+    async def backup(self, app_id: str) -> BackupFalso:
+        self.chamadas.registrar("backup")
+        await self.latencia.esperar()
+        return BackupFalso(f"{self.url_backup}/{self.tamanho_backup}.zip", f"chave-{app_id}")
+
+    async def app_status(self, app_id: str) -> StatusFalso:
+        self.chamadas.registrar("app_status")
+        await self.latencia.esperar()
+        return StatusFalso(self._por_id[app_id].running)
+
+    async def upload_app(self, arquivo) -> dict:
+        """Lê o arquivo em blocos, como o aiohttp faz ao enviar o formulário."""
+        self.chamadas.registrar("upload_app")
+        total = 0
+        while bloco := arquivo.bytes.read(64 * 1024):
+            total += len(bloco)
+            await asyncio.sleep(0)
+        await self.latencia.esperar()
+        return {"bytes": total}
+
+
+class MercadoPagoFalso:
+    """Imita o ``ClienteMercadoPago``; ``aprovar`` registra um pagamento aprovado para uma referência."""
+
+    def __init__(self, latencia: Latencia | None = None, referencias: dict[str, str] | None = None):
+        self.latencia = latencia or Latencia()
+        self.chamadas = Chamadas()
+        self.referencias = referencias or {}
+        self.pagamentos: list[dict] = []
+
+    def aprovar(self, referencia: str, instante: float | None = None) -> None:
+        atualizado = datetime.fromtimestamp(time.time() if instante is None else instante, timezone.utc)
+        self.pagamentos.append({
+            "status": "approved",
+            "external_reference": referencia,
+            "date_last_updated": atualizado.isoformat(timespec="milliseconds"),
+        })
+
+    async def criar_preferencia(self, dados: dict) -> dict:
+        self.chamadas.registrar("preference.create")
+        await self.latencia.esperar()
+        pref_id = f"pref-{self.chamadas.total}"
+        return {"response": {"id": pref_id, "init_point": f"https://mp.invalid/{pref_id}"}}
+
+    async def buscar_pagamentos(self, filtros: dict) -> dict:
+        self.chamadas.registrar("payment.search")
+        await self.latencia.esperar()
+        inicio_janela = datetime.fromisoformat(filtros["begin_date"])
+        encontrados = sorted(
+            (
+                pagamento for pagamento in self.pagamentos
+                if datetime.fromisoformat(pagamento["date_last_updated"]) >= inicio_janela
+            ),
+            key=lambda pagamento: pagamento["date_last_updated"],
+        )
+        inicio = filtros.get("offset", 0)
+        limite = filtros.get("limit", 30)
+        return {
+            "response": {
+                "results": encontrados[inicio : inicio + limite],
+                "paging": {"total": len(encontrados), "offset": inicio, "limit": limite},
+            }
+        }
+
+    async def obter_pagamento(self, pagamento_id: str) -> dict:
+        self.chamadas.registrar("payment.get")
+        await self.latencia.esperar()
+        return {"response": {"status": "approved", "external_reference": self.referencias.get(pagamento_id)}}
+
+    def fechar(self) -> None:
+        pass
+
+
+class _Resposta:
+    def __init__(self, interacao: InteracaoFalsa):
+        self._interacao = interacao
+        self._concluida = False
+
+    def is_done(self) -> bool:
+        return self._concluida
+
+    def _responder(self, tipo: str, **kwargs) -> None:
+        self._concluida = True
+        self._interacao.registrar(tipo, kwargs)
+
+    async def send_message(self, *args, **kwargs):
+        self._responder("send_message", **kwargs)
+
+    async def edit_message(self, **kwargs):
+        self._responder("edit_message", **kwargs)
+
+    async def defer(self, **kwargs):
+        self._responder("defer", **kwargs)
+
+    async def send_modal(self, modal):
+        self._responder("send_modal", modal=modal)
+
+
+class _Followup:
+    def __init__(self, interacao: InteracaoFalsa):
+        self._interacao = interacao
+
+    async def send(self, *args, **kwargs):
+        self._interacao.registrar("followup", kwargs)
+
+
+class UsuarioFalso:
+    def __init__(self, user_id: int = 1):
+        self.id = user_id
+        self.mensagens: list[str] = []
+        self.dm_channel: UsuarioFalso | None = None
+
+    async def send(self, mensagem: str, **_):
+        self.mensagens.append(mensagem)
+
+    async def create_dm(self) -> UsuarioFalso:
+        self.dm_channel = self
+        return self
+
+
+class InteracaoFalsa:
+    """Registra o instante da primeira resposta enviada ao Discord."""
+
+    def __init__(self, user: UsuarioFalso | None = None):
+        self.criada_em = time.perf_counter()
+        self.primeira_resposta: float | None = None
+        self.respostas: list[tuple[str, dict]] = []
+        self.response = _Resposta(self)
+        self.followup = _Followup(self)
+        self.user = user or UsuarioFalso()
+        self.guild_id = None
+
+    def registrar(self, tipo: str, dados: dict) -> None:
+        if self.primeira_resposta is None:
+            self.primeira_resposta = time.perf_counter()
+        self.respostas.append((tipo, dados))
+
+    async def edit_original_response(self, **kwargs):
+        self.registrar("edit_original_response", kwargs)
+
+    @property
+    def tempo_resposta(self) -> float | None:
+        return None if self.primeira_resposta is None else self.primeira_resposta - self.criada_em
+
+
+class BotFalso:
+    """O suficiente de ``commands.Bot`` para instanciar os cogs fora do Discord."""
+
+    def __init__(self, sessao=None):
+        self.sessao = sessao
+        self.cogs: dict[str, object] = {}
+        self.latency = 0.0
+        self.usuarios: dict[int, UsuarioFalso] = {}
+        self.buscas_usuario = 0
+
+    def get_cog(self, nome: str):
+        return self.cogs.get(nome)
+
+    async def fetch_user(self, user_id: int) -> UsuarioFalso:
+        self.buscas_usuario += 1
+        return self.usuarios.setdefault(user_id, UsuarioFalso(user_id))
+
+    def get_user(self, user_id: int) -> UsuarioFalso | None:
+        return self.usuarios.get(user_id)
+
+    async def wait_until_ready(self) -> None:
+        return None
+
+    def is_closed(self) -> bool:
+        return False
+
+
+class RelogioVirtual:
+    """Substitui o módulo ``time`` de um cog para avançar o tempo sem esperar."""
+
+    def __init__(self):
+        self.agora = time.monotonic()
+
+    def monotonic(self) -> float:
+        return self.agora
+
+    def perf_counter(self) -> float:
+        return time.perf_counter()
+
+    def time(self) -> float:
+        return time.time()
+
+    def avancar(self, segundos: float) -> None:
+        self.agora += segundos
+
+
+@contextmanager
+def configuracao_temporaria(dados: dict[str, Any]) -> Iterator[Any]:
+    """Troca a configuração usada pelos cogs por uma em arquivo temporário."""
+    from servicos.configuracao import Configuracao
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, "config.json")
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump(dados, arquivo)
+        temporaria = Configuracao(caminho)
+        modulos = [
+            modulo for nome, modulo in list(sys.modules.items())
+            if nome.startswith("cogs.") and hasattr(modulo, "configuracao")
+        ]
+        originais = [modulo.configuracao for modulo in modulos]
+        for modulo in modulos:
+            modulo.configuracao = temporaria
+        try:
+            yield temporaria
+        finally:
+            for modulo, original in zip(modulos, originais):
+                modulo.configuracao = original
@@ -0,0 +1,111 @@
+"""Memória do cache do discord.py com as opções padrão e no modo enxuto.
+
+Monta o estado do bot (sem conectar ao Discord) com servidores cujos membros
+já foram carregados, como acontece com a intent ``members`` e o chunking na
+inicialização, e mede a memória alocada e as contagens que o MonitorMemoria
+registra no log.
+
+Uso:
+    python benchmarks/memoria.py --servidores 20 --membros 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import tracemalloc
+
+import falsos  # noqa: F401  (coloca src/ no caminho de importação)
+
+import discord  # noqa: E402
+from discord.ext import commands  # noqa: E402
+
+from servicos.recursos import MonitorMemoria, formatar_bytes  # noqa: E402
+
+
+def _membro(usuario_id: int) -> dict:
+    return {
+        "user": {"id": str(usuario_id), "username": f"usuario{usuario_id}", "discriminator": "0", "avatar": None},
+        "roles": [],
+        "joined_at": "2024-01-01T00:00:00+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def _servidor(indice: int, membros: int) -> dict:
+    inicio = 10_000 + indice * membros
+    return {
+        "id": str(1_000 + indice),
+        "name": f"servidor {indice}",
+        "owner_id": str(inicio),
+        "roles": [],
+        "emojis": [],
+        "features": [],
+        "member_count": membros,
+        "channels": [],
+        "members": [_membro(inicio + i) for i in range(membros)],
+    }
+
+
+def _bot(enxuto: bool) -> commands.Bot:
+    """Mesmas opções do SquareBot.py em cada modo."""
+    intents = discord.Intents.default()
+    if enxuto:
+        intents.members = False
+        intents.message_content = False
+        intents.typing = False
+        return commands.Bot(
+            command_prefix="!",
+            intents=intents,
+            member_cache_flags=discord.MemberCacheFlags.none(),
+            chunk_guilds_at_startup=False,
+            max_messages=100,
+        )
+    intents.members = True
+    intents.message_content = True
+    return commands.Bot(command_prefix="!", intents=intents)
+
+
+def medir(enxuto: bool, servidores: int, membros: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    bot = _bot(enxuto)
+    estado = bot._connection
+    for indice in range(servidores):
+        estado._add_guild(discord.Guild(data=_servidor(indice, membros), state=estado))  # type: ignore[arg-type]
+    gc.collect()
+    alocado, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    monitor = MonitorMemoria(intervalo=0)
+    monitor.contar("discord_servidores", lambda: len(bot.guilds))
+    monitor.contar("discord_usuarios", lambda: len(bot.users))
+    monitor.contar("discord_membros", lambda: sum(len(guild.members) for guild in bot.guilds))
+    _, contagens = monitor.amostra()
+    return {"alocado": formatar_bytes(alocado), "alocado_bytes": alocado, **contagens}
+
+
+def executar(servidores: int, membros: int) -> dict:
+    padrao = medir(False, servidores, membros)
+    enxuto = medir(True, servidores, membros)
+    return {
+        "servidores": servidores,
+        "membros_por_servidor": membros,
+        "padrao": padrao,
+        "enxuto": enxuto,
+        "reducao": f"{1 - enxuto['alocado_bytes'] / padrao['alocado_bytes']:.0%}",
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--servidores", type=int, default=20)
+    parser.add_argument("--membros", type=int, default=5000)
+    args = parser.parse_args()
+    print(json.dumps(executar(args.servidores, args.membros), indent=2))
+
+
+if __name__ == "__main__":
+    main()
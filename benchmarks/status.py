@@ -0,0 +1,137 @@
+"""Microbenchmark da leitura de status: modelo pydantic da biblioteca x StatusApp.
+
+Mede o custo de decodificar a resposta da rota de status, a memória de cada
+registro e, com a API fora do modelo da biblioteca (sem ``requests``), as
+requisições por consulta do caminho antigo (tenta o modelo e busca de novo)
+e do LeitorStatus.
+
+Uso:
+    python benchmarks/status.py --registros 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+import falsos  # noqa: F401  (coloca src/ no caminho de importação)
+
+import pydantic  # noqa: E402
+import squarecloud  # noqa: E402
+
+from servicos.status import LeitorStatus, StatusApp  # noqa: E402
+
+
+def resposta(indice: int, com_requests: bool = True) -> dict:
+    dados = {
+        "cpu": f"{indice % 100}.5%",
+        "ram": f"{indice % 512}MB",
+        "status": "running",
+        "running": True,
+        "storage": f"{indice % 200}MB",
+        "network": {"total": "1.2 MB ↑ 3.4 MB ↓", "now": "0 KB ↑ 0 KB ↓"},
+        "uptime": 1_700_000_000_000 + indice,
+    }
+    if com_requests:
+        dados["requests"] = indice
+    return dados
+
+
+def _por_operacao(funcao, dados: list[dict]) -> float:
+    inicio = time.perf_counter()
+    for item in dados:
+        funcao(item)
+    return (time.perf_counter() - inicio) / len(dados) * 1e6
+
+
+def _memoria(funcao, dados: list[dict]) -> float:
+    tracemalloc.start()
+    registros = [funcao(item) for item in dados]
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del registros
+    return atual / len(dados)
+
+
+class _Resposta:
+    def __init__(self, dados: dict):
+        self.response = dados
+
+
+class _HttpFalso:
+    def __init__(self):
+        self.requisicoes = 0
+
+    async def fetch_app_status(self, app_id: str) -> _Resposta:
+        self.requisicoes += 1
+        # A API atual deixou de enviar ``requests``
+        return _Resposta(resposta(int(app_id), com_requests=False))
+
+
+class ClienteDivergente:
+    """Reproduz ``Client.app_status`` da biblioteca contra uma resposta fora do modelo."""
+
+    def __init__(self):
+        self._http = _HttpFalso()
+
+    async def app_status(self, app_id: str) -> squarecloud.StatusData:
+        payload = (await self._http.fetch_app_status(app_id)).response
+        return squarecloud.StatusData(**payload)
+
+
+async def _obter_status_antigo(cliente: ClienteDivergente, app_id: str) -> squarecloud.StatusData:
+    """Caminho anterior: sempre tenta o modelo da biblioteca e repete a busca quando falha."""
+    try:
+        return await cliente.app_status(app_id)
+    except pydantic.ValidationError:
+        dados = (await cliente._http.fetch_app_status(app_id)).response
+        dados.setdefault("requests", 0)
+        return squarecloud.StatusData(**dados)
+
+
+async def _consultas(obter, consultas: int) -> tuple[float, float]:
+    cliente = ClienteDivergente()
+    inicio = time.perf_counter()
+    for indice in range(consultas):
+        await obter(cliente, str(indice))
+    duracao = time.perf_counter() - inicio
+    return cliente._http.requisicoes / consultas, duracao / consultas * 1e6
+
+
+def executar(registros: int) -> dict:
+    dados = [resposta(i) for i in range(registros)]
+    modelo = lambda item: squarecloud.StatusData(**item)  # noqa: E731
+    leitor = LeitorStatus()
+    antigo = asyncio.run(_consultas(_obter_status_antigo, registros))
+    novo = asyncio.run(_consultas(leitor.obter, registros))
+    return {
+        "registros": registros,
+        "decodificacao_us": {
+            "pydantic": round(_por_operacao(modelo, dados), 2),
+            "status_app": round(_por_operacao(StatusApp.de_dict, dados), 2),
+        },
+        "bytes_por_registro": {
+            "pydantic": round(_memoria(modelo, dados)),
+            "status_app": round(_memoria(StatusApp.de_dict, dados)),
+        },
+        "api_fora_do_modelo": {
+            "requisicoes_por_consulta_antigo": round(antigo[0], 3),
+            "requisicoes_por_consulta_leitor": round(novo[0], 3),
+            "us_por_consulta_antigo": round(antigo[1], 2),
+            "us_por_consulta_leitor": round(novo[1], 2),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--registros", type=int, default=20000)
+    args = parser.parse_args()
+    print(json.dumps(executar(args.registros), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,512 @@
+"""Benchmarks offline dos cogs com backends falsos.
+
+Mede o tempo de resposta do /dashboard, a duração da varredura do
+Notificador (com um ou vários inquilinos), as mensagens enviadas ao admin
+durante uma queda, a espera dos followups na fila de mensagens, as
+consultas e edições do acompanhamento de logs, o pico de memória dos
+deploys e o volume de chamadas ao Mercado Pago com checkouts pendentes. O resultado é um JSON para comparar versões.
+
+Uso:
+    python benchmarks/suite.py [--saida resultado.json] [--rapido]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import platform
+import socket
+import subprocess
+import tempfile
+import time
+
+from falsos import (
+    RAIZ,
+    BotFalso,
+    ClienteSquareFalso,
+    InteracaoFalsa,
+    Latencia,
+    MercadoPagoFalso,
+    RelogioVirtual,
+    UsuarioFalso,
+    configuracao_temporaria,
+)
+
+from aiohttp import web  # noqa: E402
+
+from cogs import gestao as modulo_gestao  # noqa: E402
+from cogs import notificacao as modulo_notificacao  # noqa: E402
+from cogs import pagamento as modulo_pagamento  # noqa: E402
+from servicos.agendador import AgendadorAdaptativo  # noqa: E402
+from servicos.artefatos import CacheArtefatos  # noqa: E402
+from servicos.backups import ExportacaoBackups  # noqa: E402
+from servicos.http import criar_sessao  # noqa: E402
+from servicos.logs import CentralLogs  # noqa: E402
+from servicos.mensagens import enviar_followup, fila_mensagens  # noqa: E402
+from servicos.recursos import rss_atual  # noqa: E402
+from servicos.tarefas import ArmazemTarefas, Deploy  # noqa: E402
+
+MB = 1024 * 1024
+# Orçamento de consultas grande o bastante para não limitar as varreduras medidas
+SEM_LIMITE = 1e9
+
+
+async def _pico_rss(coro) -> tuple[object, int]:
+    """Executa ``coro`` amostrando o RSS e retorna o resultado e o aumento máximo."""
+    base = rss_atual()
+    pico = base
+    ativo = True
+
+    async def amostrar():
+        nonlocal pico
+        while ativo:
+            pico = max(pico, rss_atual())
+            await asyncio.sleep(0.005)
+
+    amostrador = asyncio.create_task(amostrar())
+    try:
+        resultado = await coro
+    finally:
+        ativo = False
+        await amostrador
+    return resultado, max(0, pico - base)
+
+
+async def bench_dashboard(quantidades: list[int], latencia: float) -> list[dict]:
+    resultados = []
+    for quantidade in quantidades:
+        bot = BotFalso()
+        cog = modulo_gestao.Gestao(bot)  # type: ignore[arg-type]
+        cliente = ClienteSquareFalso(quantidade, Latencia(latencia))
+        cog.cliente_de = lambda interaction: cliente  # type: ignore[method-assign]
+        interacao = InteracaoFalsa()
+        erro = None
+        try:
+            await cog.dashboard.callback(cog, interacao)  # type: ignore[arg-type]
+        except Exception as exc:
+            erro = f"{type(exc).__name__}: {exc}"
+        view = interacao.respostas[0][1].get("view") if interacao.respostas else None
+        opcoes = max((len(getattr(item, "options", ())) for item in getattr(view, "children", ())), default=0)
+        tempo_selecao = None
+        if erro is None and quantidade:
+            # Usuário leva um instante para escolher; a escolha deve usar o status pré-carregado
+            await asyncio.sleep(latencia * 4)
+            view.select._values = [view.select.options[0].value]
+            selecao = InteracaoFalsa()
+            await view.select.callback(selecao)
+            tempo_selecao = round(selecao.tempo_resposta * 1000, 2)
+            view.stop()
+        resultados.append({
+            "apps": quantidade,
+            "tempo_resposta_ms": round(interacao.tempo_resposta * 1000, 2) if interacao.tempo_resposta else None,
+            "chamadas_api": cliente.chamadas.total,
+            # O Discord recusa selects com mais de 25 opções
+            "maior_select": opcoes,
+            "aceito_pelo_discord": opcoes <= 25,
+            "tempo_selecao_ms": tempo_selecao,
+            "erro": erro,
+        })
+    return resultados
+
+
+async def bench_varredura(quantidades: list[int], latencia: float) -> list[dict]:
+    resultados = []
+    for quantidade in quantidades:
+        bot = BotFalso()
+        cog = modulo_notificacao.Notificador(bot)  # type: ignore[arg-type]
+        # Sem limite de orçamento, a primeira rodada consulta todas as aplicações
+        cog.agendador = AgendadorAdaptativo(orcamento_por_minuto=SEM_LIMITE)
+        cliente = ClienteSquareFalso(quantidade, Latencia(latencia))
+        inicio = time.perf_counter()
+        with configuracao_temporaria({}):
+            await cog._varrer([(None, cliente)])  # type: ignore[list-item]
+        resultados.append({
+            "apps": quantidade,
+            "duracao_ms": round((time.perf_counter() - inicio) * 1000, 1),
+            "chamadas_api": cliente.chamadas.total,
+        })
+    return resultados
+
+
+async def bench_incidente(quantidades: list[int], queda: float = 1800, aquecimento: float = 1800) -> list[dict]:
+    """Metade das aplicações cai de uma vez e volta após ``queda`` segundos; conta as mensagens ao admin.
+
+    O relógio avança no ritmo real do monitoramento (``Notificador._espera``),
+    com a variação e o orçamento padrão do agendador, então cada aplicação
+    percebe a queda em uma rodada diferente. O limite é um resumo por janela
+    de ``JANELA_DIGEST`` desde o início da queda.
+    """
+    resultados = []
+    for quantidade in quantidades:
+        bot = BotFalso()
+        cog = modulo_notificacao.Notificador(bot)  # type: ignore[arg-type]
+        relogio = RelogioVirtual()
+        cog.agendador = AgendadorAdaptativo(relogio=relogio.monotonic)
+        cliente = ClienteSquareFalso(quantidade, Latencia(0))
+        inicio_queda = relogio.agora + aquecimento
+        fim = inicio_queda + 2 * queda
+        rodadas = 0
+        with configuracao_temporaria({"admin_id": 1}):
+            while relogio.agora < fim or cog._pendentes:
+                fora = inicio_queda <= relogio.agora < inicio_queda + queda
+                for app in cliente.apps[: quantidade // 2]:
+                    app.running = not fora
+                await cog._varrer([(None, cliente)])  # type: ignore[list-item]
+                rodadas += 1
+                if fila_mensagens.profundidade:
+                    # Entrega já, sem que a fila una resumos de rodadas diferentes
+                    await fila_mensagens.fechar()
+                relogio.avancar(cog._espera())
+        janelas = int((relogio.agora - inicio_queda) // modulo_notificacao.JANELA_DIGEST) + 1
+        mensagens = len(bot.usuarios[1].mensagens) if 1 in bot.usuarios else 0
+        resultados.append({
+            "apps": quantidade,
+            "rodadas": rodadas,
+            "consultas": cog.agendador.consultas,
+            "mensagens_admin": mensagens,
+            "limite_mensagens": janelas,
+            "dentro_do_limite": mensagens <= janelas,
+            "buscas_usuario": bot.buscas_usuario,
+        })
+    return resultados
+
+
+async def bench_inquilinos(inquilinos: int, apps_grande: int, apps_pequeno: int, latencia: float) -> dict:
+    """Um inquilino grande e vários pequenos na mesma varredura, seguidos de interações em todos eles.
+
+    Mede quando termina a verificação de cada inquilino e quantos clientes
+    ficam em memória depois da varredura e das interações.
+    """
+    tamanhos = {f"token-{i}": apps_grande if i == 0 else apps_pequeno for i in range(inquilinos)}
+    dados = {"guildas": {str(i): {"token": f"token-{i}"} for i in range(inquilinos)}}
+    with configuracao_temporaria(dados) as configuracao:
+        bot = BotFalso()
+        gestao = modulo_gestao.Gestao(bot)  # type: ignore[arg-type]
+        gestao.clientes.fabrica = lambda token: ClienteSquareFalso(tamanhos[token], Latencia(latencia))  # type: ignore[assignment]
+        gestao.clientes.limite = max(1, inquilinos // 4)
+        bot.cogs["Gestao"] = gestao
+        notificador = modulo_notificacao.Notificador(bot)  # type: ignore[arg-type]
+        notificador.agendador = AgendadorAdaptativo(orcamento_por_minuto=SEM_LIMITE)
+        pares = [(inq, gestao.cliente_do_inquilino(inq, reter=False)) for inq in configuracao.inquilinos()]
+        inicio = time.monotonic()
+        await notificador._varrer(pares)  # type: ignore[arg-type]
+        termino = {inq: max(cliente.chamadas.instantes) - inicio for inq, cliente in pares}
+        clientes_apos_varredura = len(gestao.clientes)
+        for guild_id in range(inquilinos):
+            interacao = InteracaoFalsa()
+            interacao.guild_id = guild_id
+            gestao.cliente_de(interacao)  # type: ignore[arg-type]
+    pequenos = [segundos for inq, segundos in termino.items() if inq != "0"]
+    return {
+        "inquilinos": inquilinos,
+        "apps": apps_grande + apps_pequeno * (inquilinos - 1),
+        "termino_inquilino_grande_ms": round(termino["0"] * 1000, 1),
+        "termino_pequenos_max_ms": round(max(pequenos) * 1000, 1),
+        "clientes_apos_varredura": clientes_apos_varredura,
+        "clientes_apos_interacoes": len(gestao.clientes),
+        "limite_clientes": gestao.clientes.limite,
+    }
+
+
+async def bench_fila(usuarios: int, avisos_por_usuario: int, followups: int) -> dict:
+    """Rajada de avisos em segundo plano disputando a fila com followups de interações."""
+    destinos = [UsuarioFalso(i) for i in range(usuarios)]
+    inicio = time.perf_counter()
+    for indice in range(avisos_por_usuario):
+        for usuario in destinos:
+            fila_mensagens.enviar(usuario, f"aviso {indice}")
+    esperas: list[float] = []
+
+    async def responder(interacao: InteracaoFalsa) -> None:
+        antes = time.perf_counter()
+        await enviar_followup(interacao, "ok")
+        esperas.append(time.perf_counter() - antes)
+
+    await asyncio.gather(*(responder(InteracaoFalsa()) for _ in range(followups)))
+    await fila_mensagens.fechar()
+    return {
+        "avisos": usuarios * avisos_por_usuario,
+        "mensagens_dm": sum(len(usuario.mensagens) for usuario in destinos),
+        "followups": followups,
+        "followup_espera_max_ms": round(max(esperas) * 1000, 1),
+        "duracao_ms": round((time.perf_counter() - inicio) * 1000, 1),
+    }
+
+
+async def bench_logs(espectadores: int, segundos: float, intervalo: float = 0.05) -> dict:
+    """Vários espectadores acompanhando os logs da mesma aplicação pelo botão 📜."""
+    bot = BotFalso()
+    gestao = modulo_gestao.Gestao(bot)  # type: ignore[arg-type]
+    gestao.logs = CentralLogs(capacidade=50, intervalo=intervalo)
+    cliente = ClienteSquareFalso(1, Latencia(0.001))
+    app = cliente.apps[0]
+    edicao_original = modulo_gestao.INTERVALO_EDICAO_LOGS
+    modulo_gestao.INTERVALO_EDICAO_LOGS = intervalo * 4
+    try:
+        controles = modulo_gestao.ControlesAplicacao(app, gestao, cliente)  # type: ignore[arg-type]
+        interacoes = [InteracaoFalsa() for _ in range(espectadores)]
+        for interacao in interacoes:
+            await controles.logs.callback(interacao)  # type: ignore[arg-type]
+        views = [interacao.respostas[0][1]["view"] for interacao in interacoes]
+        await asyncio.sleep(segundos)
+        transmissao = views[0].assinatura.transmissao
+        ultima = cliente.linhas_log[app.id] - 1
+        exibidas = [
+            int(linha.rsplit(" ", 1)[1])
+            for linha in interacoes[0].respostas[-1][1].get("content", "").splitlines()
+            if " linha " in linha
+        ]
+        for view in views:
+            await view.on_timeout()
+        await asyncio.sleep(0)
+    finally:
+        modulo_gestao.INTERVALO_EDICAO_LOGS = edicao_original
+    edicoes = [view.edicoes for view in views]
+    return {
+        "espectadores": espectadores,
+        "consultas_logs": cliente.chamadas.por_operacao["get_logs"],
+        "consultas_por_espectador": round(cliente.chamadas.por_operacao["get_logs"] / espectadores, 2),
+        "edicoes_por_espectador_max": max(edicoes),
+        "edicoes_por_s_max": round(max(edicoes) / segundos, 1),
+        "linhas_no_buffer": len(transmissao.linhas),
+        # Linhas exibidas sem lacunas nem repetições, e quantas o log já tinha à frente da última edição
+        "linhas_exibidas_continuas": exibidas == list(range(exibidas[0], exibidas[0] + len(exibidas))),
+        "linhas_atras_do_log": ultima - exibidas[-1],
+        "transmissoes_apos_timeout": len(gestao.logs.transmissoes),
+    }
+
+
+def _porta_livre() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _servidor_zip(tamanhos: list[int]) -> tuple[web.AppRunner, str]:
+    """Servidor local que gera ZIPs falsos em blocos, sem mantê-los na memória."""
+    bloco = b"\0" * (64 * 1024)
+
+    async def zip_falso(request: web.Request) -> web.StreamResponse:
+        tamanho = int(request.match_info["tamanho"])
+        resposta = web.StreamResponse(headers={"ETag": f'"{tamanho}"', "Content-Length": str(tamanho)})
+        if request.headers.get("If-None-Match") == f'"{tamanho}"':
+            return web.Response(status=304)
+        await resposta.prepare(request)
+        enviados = 0
+        while enviados < tamanho:
+            parte = bloco[: tamanho - enviados]
+            await resposta.write(parte)
+            enviados += len(parte)
+        await resposta.write_eof()
+        return resposta
+
+    app = web.Application()
+    app.router.add_get("/{tamanho}.zip", zip_falso)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    porta = _porta_livre()
+    await web.TCPSite(runner, "127.0.0.1", porta).start()
+    return runner, f"http://127.0.0.1:{porta}"
+
+
+async def bench_deploy(tamanhos_mb: list[int]) -> list[dict]:
+    runner, base = await _servidor_zip([t * MB for t in tamanhos_mb])
+    sessao = criar_sessao()
+    resultados = []
+    try:
+        for tamanho in tamanhos_mb:
+            url = f"{base}/{tamanho * MB}.zip"
+            cliente = ClienteSquareFalso(0, Latencia(0.0))
+
+            inicio = time.perf_counter()
+            _, pico_modal = await _pico_rss(modulo_gestao.deploy_por_url(cliente, url, sessao))  # type: ignore[arg-type]
+            duracao_modal = time.perf_counter() - inicio
+
+            bot = BotFalso(sessao)
+            gestao = modulo_gestao.Gestao(bot)  # type: ignore[arg-type]
+            gestao.clientes.fabrica = lambda token: cliente  # type: ignore[assignment]
+            bot.cogs["Gestao"] = gestao
+            pagamentos = modulo_pagamento.Pagamentos(bot)  # type: ignore[arg-type]
+            with tempfile.TemporaryDirectory() as diretorio, configuracao_temporaria({"token": "x", "zip_url": url}):
+                pagamentos.artefatos = CacheArtefatos(diretorio)
+                pagamentos.armazem = ArmazemTarefas(f"{diretorio}/tarefas.db")
+                await pagamentos.armazem.abrir()
+                inicio = time.perf_counter()
+                _, pico_pago = await _pico_rss(pagamentos._realizar_deploy(Deploy("pref-1", 1, None)))
+                duracao_pago = time.perf_counter() - inicio
+                inicio = time.perf_counter()
+                await pagamentos._realizar_deploy(Deploy("pref-2", 1, None))
+                duracao_cache = time.perf_counter() - inicio
+                await pagamentos.armazem.fechar()
+            resultados.append({
+                "zip_mb": tamanho,
+                "deploy_modal_pico_rss_mb": round(pico_modal / MB, 2),
+                "deploy_modal_mb_s": round(tamanho / duracao_modal, 1),
+                "deploy_pago_pico_rss_mb": round(pico_pago / MB, 2),
+                "deploy_pago_mb_s": round(tamanho / duracao_pago, 1),
+                "deploy_pago_em_cache_ms": round(duracao_cache * 1000, 1),
+            })
+    finally:
+        await sessao.close()
+        await runner.cleanup()
+    return resultados
+
+
+async def bench_backup(apps: int, tamanho_mb: int, concorrencias: list[int]) -> list[dict]:
+    """Exportação de backups: arquivos lidos inteiros na memória x ExportacaoBackups."""
+    runner, base = await _servidor_zip([tamanho_mb * MB])
+    sessao = criar_sessao()
+    resultados = []
+    try:
+        cliente = ClienteSquareFalso(apps, Latencia(0.02))
+        cliente.url_backup = base
+        cliente.tamanho_backup = tamanho_mb * MB
+        for concorrencia in concorrencias:
+            limite = asyncio.Semaphore(concorrencia)
+
+            async def em_memoria(app) -> int:
+                # Como ``Backup.download`` da biblioteca: o conteúdo inteiro vira um ``bytes``
+                async with limite:
+                    backup = await cliente.backup(app.id)
+                    async with sessao.get(backup.url) as resp:
+                        return len(await resp.read())
+
+            inicio = time.perf_counter()
+            _, pico_memoria = await _pico_rss(asyncio.gather(*(em_memoria(app) for app in cliente.apps)))
+            duracao_memoria = time.perf_counter() - inicio
+
+            with tempfile.TemporaryDirectory() as diretorio:
+                exportacao = ExportacaoBackups(cliente, sessao, cliente.apps, diretorio, concorrencia)  # type: ignore[arg-type]
+                manifesto, pico_disco = await _pico_rss(exportacao.executar())
+                with open(manifesto, encoding="utf-8") as arquivo:
+                    entradas = json.load(arquivo)["aplicacoes"]
+                integros = 0
+                for entrada in entradas:
+                    digest = hashlib.sha256()
+                    with open(f"{diretorio}/{entrada['arquivo']}", "rb") as arquivo:
+                        while bloco := arquivo.read(MB):
+                            digest.update(bloco)
+                    integros += digest.hexdigest() == entrada["sha256"]
+            total_mb = apps * tamanho_mb
+            resultados.append({
+                "apps": apps,
+                "backup_mb": tamanho_mb,
+                "concorrencia": concorrencia,
+                "em_memoria_pico_rss_mb": round(pico_memoria / MB, 2),
+                "em_memoria_mb_s": round(total_mb / duracao_memoria, 1),
+                "disco_pico_rss_mb": round(pico_disco / MB, 2),
+                "disco_mb_s": round(total_mb / exportacao.medicao.duracao, 1),
+                "checksums_conferidos": f"{integros}/{len(entradas)}",
+            })
+    finally:
+        await sessao.close()
+        await runner.cleanup()
+    return resultados
+
+
+async def bench_pagamentos(quantidades: list[int], minutos: int = 5, vendas_hora: int = 2000) -> list[dict]:
+    """Simula ``minutos`` de conciliação em tempo virtual com N checkouts pendentes.
+
+    A conta já tem ``vendas_hora`` pagamentos aprovados na última hora, de
+    vendas que não passam pelo bot. Na metade do tempo, metade dos checkouts
+    (os mais antigos primeiro) é paga; mede as chamadas ao Mercado Pago e
+    quanto tempo leva para confirmar todos.
+    """
+    resultados = []
+    relogio = RelogioVirtual()
+    tempo_original = modulo_pagamento.time
+    modulo_pagamento.time = relogio  # type: ignore[assignment]
+    try:
+        for quantidade in quantidades:
+            bot = BotFalso()
+            cog = modulo_pagamento.Pagamentos(bot)  # type: ignore[arg-type]
+            mp = MercadoPagoFalso(Latencia(0.001))
+            agora = time.time()
+            for indice in range(vendas_hora):
+                mp.aprovar(f"venda-{indice}", agora - 3600 + indice * 3600 / vendas_hora)
+            cog._mp = lambda inquilino: mp  # type: ignore[method-assign]
+            with tempfile.TemporaryDirectory() as diretorio:
+                cog.armazem = ArmazemTarefas(f"{diretorio}/tarefas.db")
+                await cog.armazem.abrir()
+                for indice in range(quantidade):
+                    pref_id = f"pref-{indice}"
+                    cog.pendentes[pref_id] = modulo_pagamento.PagamentoPendente(
+                        pref_id, pref_id, 1, idade=quantidade - indice
+                    )
+                    cog._referencias[pref_id] = pref_id
+                rodadas = minutos * 60 // modulo_pagamento.INTERVALO_CONCILIACAO
+                pagos = {f"pref-{indice}" for indice in range(quantidade // 2)}
+                pago_em = confirmados_em = None
+                for rodada in range(rodadas):
+                    relogio.avancar(modulo_pagamento.INTERVALO_CONCILIACAO)
+                    if rodada == rodadas // 2:
+                        for referencia in sorted(pagos):
+                            mp.aprovar(referencia)
+                        pago_em = relogio.monotonic()
+                    await cog._rodada_conciliacao()
+                    if pago_em is not None and confirmados_em is None and not pagos & cog.pendentes.keys():
+                        confirmados_em = relogio.monotonic()
+                await cog.armazem.fechar()
+            resultados.append({
+                "pendentes": quantidade,
+                "chamadas_por_minuto": round(mp.chamadas.total / minutos, 1),
+                "confirmados": len(pagos) - len(pagos & cog.pendentes.keys()),
+                "segundos_ate_confirmar_todos": None if confirmados_em is None else confirmados_em - pago_em,
+            })
+    finally:
+        modulo_pagamento.time = tempo_original
+    return resultados
+
+
+def _versao() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecida"
+
+
+async def executar(rapido: bool) -> dict:
+    apps = [10, 24, 80] if rapido else [10, 24, 80, 140]
+    varredura = [10, 80, 200] if rapido else [10, 80, 200, 500]
+    zips = [5, 20] if rapido else [5, 20, 80]
+    pendentes = [10, 200] if rapido else [10, 200, 1000]
+    return {
+        "versao": _versao(),
+        "python": platform.python_version(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "resultados": {
+            "dashboard": await bench_dashboard(apps, latencia=0.05),
+            "varredura": await bench_varredura(varredura, latencia=0.05),
+            "incidente": await bench_incidente(varredura),
+            "fila_mensagens": await bench_fila(50, 10, 20),
+            "inquilinos": await bench_inquilinos(40, 500, 5, latencia=0.02),
+            "logs": await bench_logs(20, 2.0),
+            "deploy": await bench_deploy(zips),
+            "backup": await bench_backup(8 if rapido else 20, 20, [1, 4]),
+            "pagamentos": await bench_pagamentos(pendentes),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--saida", help="arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--rapido", action="store_true", help="usa cargas menores")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    resultado = asyncio.run(executar(args.rapido))
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            arquivo.write(texto + "\n")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Vazão do armazenamento durável de checkouts e deploys.
+
+Grava N checkouts, confirma todos e reivindica os deploys, comparando uma
+transação por operação com a gravação em lote. Depois simula uma queda no
+meio dos deploys e confere que a retomada não repete nenhum.
+
+Uso:
+    python benchmarks/tarefas.py --operacoes 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import falsos  # noqa: F401  (coloca src/ no caminho de importação)
+
+from servicos.tarefas import CONCLUIDO, ENVIANDO, LOTE_ESCRITA, ArmazemTarefas  # noqa: E402
+
+
+async def _fase(operacoes: list) -> float:
+    inicio = time.perf_counter()
+    await asyncio.gather(*operacoes)
+    return time.perf_counter() - inicio
+
+
+async def vazao(caminho: str, quantidade: int, lote: int) -> dict:
+    armazem = ArmazemTarefas(caminho, lote=lote)
+    await armazem.abrir()
+    prefs = [f"pref-{i}" for i in range(quantidade)]
+    agora = time.time()
+    try:
+        gravar = await _fase([armazem.adicionar_pendente(p, p, i, None, agora) for i, p in enumerate(prefs)])
+        confirmar = await _fase([armazem.confirmar(p, i, None) for i, p in enumerate(prefs)])
+        reivindicar = await _fase([armazem.reivindicar(p) for p in prefs])
+    finally:
+        await armazem.fechar()
+    return {
+        "lote": lote,
+        "checkouts_por_s": round(quantidade / gravar),
+        "confirmacoes_por_s": round(quantidade / confirmar),
+        "reivindicacoes_por_s": round(quantidade / reivindicar),
+        "transacoes": armazem.transacoes,
+    }
+
+
+async def retomada(caminho: str, quantidade: int) -> dict:
+    """Interrompe os deploys em estados variados e reabre o banco como num reinício."""
+    armazem = ArmazemTarefas(caminho)
+    await armazem.abrir()
+    prefs = [f"pref-{i}" for i in range(quantidade)]
+    await asyncio.gather(*(armazem.confirmar(p, i, None) for i, p in enumerate(prefs)))
+    # Um terço concluído, um terço no meio do upload e um terço ainda baixando o ZIP
+    terco = quantidade // 3
+    await asyncio.gather(*(armazem.reivindicar(p) for p in prefs[: 3 * terco]))
+    await asyncio.gather(*(armazem.marcar(p, CONCLUIDO) for p in prefs[:terco]))
+    await asyncio.gather(*(armazem.marcar(p, ENVIANDO) for p in prefs[terco: 2 * terco]))
+    await armazem.fechar()
+
+    armazem = ArmazemTarefas(caminho)
+    await armazem.abrir()
+    inicio = time.perf_counter()
+    _, retomar, incertos = await armazem.restaurar()
+    duracao = time.perf_counter() - inicio
+    # Confirmações repetidas (webhook e conciliação) não criam novos deploys
+    repetidas = await asyncio.gather(*(armazem.confirmar(p, 0, None) for p in prefs))
+    reivindicados = await asyncio.gather(*(armazem.reivindicar(d.pref_id) for d in retomar))
+    await armazem.fechar()
+    executados = terco + sum(1 for d in reivindicados if d is not None)
+    return {
+        "deploys": quantidade,
+        "restauracao_ms": round(duracao * 1000, 1),
+        "retomados": len(retomar),
+        "incertos_nao_repetidos": len(incertos),
+        "confirmacoes_repetidas_aceitas": sum(repetidas),
+        "executados_no_maximo_uma_vez": executados + len(incertos) <= quantidade,
+    }
+
+
+async def executar(quantidade: int) -> dict:
+    with tempfile.TemporaryDirectory() as diretorio:
+        return {
+            "operacoes": quantidade,
+            "vazao": [
+                await vazao(os.path.join(diretorio, f"lote-{lote}.db"), quantidade, lote)
+                for lote in (1, LOTE_ESCRITA)
+            ],
+            "retomada": await retomada(os.path.join(diretorio, "retomada.db"), quantidade),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--operacoes", type=int, default=5000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(executar(args.operacoes)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
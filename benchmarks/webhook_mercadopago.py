@@ -0,0 +1,164 @@
+"""Teste de carga offline do webhook do Mercado Pago.
+
+Sobe o ReceptorWebhook ligado ao cog Pagamentos com um Mercado Pago falso e
+dispara notificações assinadas (com duplicatas) contra ele.
+
+Uso:
+    python benchmarks/webhook_mercadopago.py --notificacoes 5000 --taxa 2000 --duplicadas 0.3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import os
+import socket
+import tempfile
+import time
+import uuid
+
+from falsos import Latencia, MercadoPagoFalso
+
+from aiohttp import ClientSession, TCPConnector  # noqa: E402
+
+from cogs.pagamento import PagamentoPendente, Pagamentos  # noqa: E402
+from servicos.tarefas import ArmazemTarefas  # noqa: E402
+from servicos.webhook_mp import CAMINHO_WEBHOOK, ReceptorWebhook, assinar  # noqa: E402
+
+SEGREDO = "segredo-de-teste"
+
+
+class NotificadorFalso:
+    """Envia notificações no formato e com a assinatura usados pelo Mercado Pago."""
+
+    def __init__(self, url: str, segredo: str):
+        self.url = url
+        self.segredo = segredo
+        self.latencias: list[float] = []
+        self.falhas = 0
+
+    async def enviar(self, sessao: ClientSession, pagamento_id: str) -> None:
+        request_id = uuid.uuid4().hex
+        ts = str(int(time.time() * 1000))
+        cabecalhos = {
+            "x-request-id": request_id,
+            "x-signature": f"ts={ts},v1={assinar(self.segredo, pagamento_id, request_id, ts)}",
+        }
+        corpo = {"action": "payment.updated", "type": "payment", "data": {"id": pagamento_id}}
+        inicio = time.perf_counter()
+        async with sessao.post(
+            self.url, params={"type": "payment", "data.id": pagamento_id}, json=corpo, headers=cabecalhos
+        ) as resp:
+            await resp.read()
+            if resp.status != 200:
+                self.falhas += 1
+        self.latencias.append(time.perf_counter() - inicio)
+
+    async def enviar_corpo(self, corpo: object) -> int:
+        """Envia um corpo JSON arbitrário, sem assinatura, e retorna o status HTTP."""
+        async with ClientSession() as sessao:
+            async with sessao.post(self.url, json=corpo) as resp:
+                return resp.status
+
+    async def disparar(self, pagamentos: list[str], taxa: float) -> float:
+        """Envia todas as notificações no ritmo pedido e retorna o tempo total."""
+        inicio = time.perf_counter()
+        async with ClientSession(connector=TCPConnector(limit=200)) as sessao:
+            tarefas = []
+            for indice, pagamento_id in enumerate(pagamentos):
+                atraso = inicio + indice / taxa - time.perf_counter()
+                if atraso > 0:
+                    await asyncio.sleep(atraso)
+                tarefas.append(asyncio.create_task(self.enviar(sessao, pagamento_id)))
+            await asyncio.gather(*tarefas)
+        return time.perf_counter() - inicio
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))] if ordenados else 0.0
+
+
+def _porta_livre() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def executar(notificacoes: int, taxa: float, duplicadas: float, latencia: float) -> dict:
+    with tempfile.TemporaryDirectory() as diretorio:
+        return await _executar(notificacoes, taxa, duplicadas, latencia, os.path.join(diretorio, "tarefas.db"))
+
+
+async def _executar(notificacoes: int, taxa: float, duplicadas: float, latencia: float, banco: str) -> dict:
+    unicos = max(1, int(notificacoes * (1 - duplicadas)))
+    cog = Pagamentos(None)  # type: ignore[arg-type]
+    cog.armazem = ArmazemTarefas(banco)
+    await cog.armazem.abrir()
+    referencias: dict[str, str] = {}
+    for indice in range(unicos):
+        pagamento_id, referencia, pref_id = str(indice), uuid.uuid4().hex, f"pref-{indice}"
+        referencias[pagamento_id] = referencia
+        cog.pendentes[pref_id] = PagamentoPendente(pref_id, referencia, indice)
+        cog._referencias[referencia] = pref_id
+    mp = MercadoPagoFalso(Latencia(latencia, variacao=0), referencias)
+    cog._mp = lambda inquilino: mp  # type: ignore[method-assign]
+    deploys: list[str] = []
+
+    async def deploy_falso(deploy) -> None:
+        deploys.append(deploy.pref_id)
+
+    cog._realizar_deploy = deploy_falso  # type: ignore[method-assign]
+    cog.iniciar_trabalhadores()
+
+    receptor = ReceptorWebhook(SEGREDO, cog._processar_notificacao)
+    porta = _porta_livre()
+    await receptor.iniciar("127.0.0.1", porta)
+    sequencia = [str(i) for i in range(unicos)]
+    sequencia += [random.choice(sequencia) for _ in range(notificacoes - unicos)]
+    random.shuffle(sequencia)
+    notificador = NotificadorFalso(f"http://127.0.0.1:{porta}{CAMINHO_WEBHOOK}", SEGREDO)
+    try:
+        duracao = await notificador.disparar(sequencia, taxa)
+        while receptor._tarefas:
+            await asyncio.sleep(0.01)
+        await cog._fila_deploys.join()
+        # Corpos JSON que não são objetos são recusados com 400, e não derrubam o handler com 500
+        corpos_invalidos = [await notificador.enviar_corpo(corpo) for corpo in ([], "x", 1)]
+    finally:
+        await receptor.parar()
+        await cog.cog_unload()
+    return {
+        "notificacoes": notificacoes,
+        "pagamentos_unicos": unicos,
+        "duracao_s": round(duracao, 3),
+        "notificacoes_por_s": round(notificacoes / duracao, 1),
+        "latencia_p50_ms": round(_percentil(notificador.latencias, 0.50) * 1000, 2),
+        "latencia_p99_ms": round(_percentil(notificador.latencias, 0.99) * 1000, 2),
+        "falhas_http": notificador.falhas,
+        "status_corpos_invalidos": corpos_invalidos,
+        "corpos_invalidos_recusados": all(status == 400 for status in corpos_invalidos),
+        "duplicadas_descartadas": receptor.duplicadas,
+        "consultas_mercado_pago": mp.chamadas.total,
+        "deploys": len(deploys),
+        "deploys_duplicados": len(deploys) - len(set(deploys)),
+        "transacoes_sqlite": cog.armazem.transacoes,
+        "pendentes_restantes": len(cog.pendentes),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notificacoes", type=int, default=5000)
+    parser.add_argument("--taxa", type=float, default=2000, help="notificações por segundo")
+    parser.add_argument("--duplicadas", type=float, default=0.3, help="fração de notificações repetidas")
+    parser.add_argument("--latencia", type=float, default=0.05, help="latência (s) do Mercado Pago falso")
+    args = parser.parse_args()
+    resultado = asyncio.run(executar(args.notificacoes, args.taxa, args.duplicadas, args.latencia))
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == "__main__":
+    main()
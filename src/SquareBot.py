@@ -1,48 +1,116 @@
+import time
+
+# Referência para o tempo até o bot ficar pronto, antes das importações pesadas
+INICIO = time.perf_counter()
+
 import os
+import asyncio
 import logging
 
 from dotenv import load_dotenv
 import discord
 from discord.ext import commands
 
+from servicos.comandos import sincronizar_se_necessario
+from servicos.http import criar_sessao, estatisticas_pool
+from servicos.mensagens import fila_mensagens
+from servicos.metricas import registro
+from servicos.recursos import monitor_memoria
+
 load_dotenv()
 
 logger = logging.getLogger('squarebot')
 
+# Modo enxuto: desliga intents e caches que nenhum cog usa, para a memória não crescer com o tamanho dos servidores
+MODO_ENXUTO = os.getenv("MODO_ENXUTO", "0").lower() in ("1", "true", "sim")
+# Mensagens mantidas no cache do discord.py no modo enxuto (0 desativa o cache)
+MENSAGENS_EM_CACHE = int(os.getenv("MENSAGENS_EM_CACHE", "100"))
+
 # Configurações de Intents
 intents = discord.Intents.default()
-intents.message_content = True 
-intents.members = True
+if MODO_ENXUTO:
+    # Os cogs só usam comandos de barra e DMs: sem membros, conteúdo, presenças ou digitação
+    intents.members = False
+    intents.message_content = False
+    intents.presences = False
+    intents.typing = False
+    opcoes_cache = {
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        "chunk_guilds_at_startup": False,
+        "max_messages": MENSAGENS_EM_CACHE or None,
+    }
+else:
+    intents.message_content = True 
+    intents.members = True
+    opcoes_cache = {}
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-bot = commands.Bot(command_prefix='!', intents=intents)
+bot = commands.Bot(command_prefix='!', intents=intents, **opcoes_cache)
 bot.logger = logging.getLogger("squarebot")
 
+monitor_memoria.contar("discord_servidores", lambda: len(bot.guilds))
+monitor_memoria.contar("discord_usuarios", lambda: len(bot.users))
+monitor_memoria.contar("discord_membros", lambda: sum(len(guild.members) for guild in bot.guilds))
+monitor_memoria.contar("discord_mensagens", lambda: len(bot.cached_messages))
+
+bot.tempo_ate_pronto = None
+
+@bot.event
+async def setup_hook():
+    # Executado uma vez por inicialização, e não a cada reconexão como o on_ready
+    if MODO_ENXUTO:
+        logger.info("Modo enxuto ativo: sem cache de membros e com até %d mensagens em cache.", MENSAGENS_EM_CACHE)
+    monitor_memoria.iniciar()
+    inicio = time.perf_counter()
+    try:
+        sincronizou = await sincronizar_se_necessario(bot)
+    except Exception as e:
+        logger.error(f"Erro ao sincronizar comandos: {e}")
+    else:
+        if sincronizou:
+            logger.info("Sincronização de comandos levou %.2fs", time.perf_counter() - inicio)
+
 @bot.event
 async def on_ready():
     bot.logger.info("Conectado como %s", bot.user.name)
-    await bot.tree.sync()
+    if bot.tempo_ate_pronto is None:
+        bot.tempo_ate_pronto = time.perf_counter() - INICIO
+        registro.medidor("tempo_ate_pronto_segundos", lambda: bot.tempo_ate_pronto)
+        logger.info("Bot pronto em %.2fs desde o início do processo.", bot.tempo_ate_pronto)
+
+async def carregar_cog(nome_cog: str):
+    inicio = time.perf_counter()
+    try:
+        await bot.load_extension(f'cogs.{nome_cog}')
+        logger.info(f"✅ {nome_cog} carregada com sucesso em {time.perf_counter() - inicio:.2f}s.")
+    except Exception as e:
+        logger.error(f"❌ Erro ao carregar cog {nome_cog}: {e}")
 
 async def carregar_cogs():
     logger.info("Carregando Cogs...")
+    inicio = time.perf_counter()
     caminho = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cogs")
-    for arquivo in os.listdir(caminho):
-        if arquivo.endswith('.py') and arquivo != '__init__.py':
-            nome_cog = arquivo[:-3]
-            try:
-                await bot.load_extension(f'cogs.{nome_cog}')
-                logger.info(f"✅ {nome_cog} carregada com sucesso.")
-            except Exception as e:
-                logger.error(f"❌ Erro ao carregar cog {nome_cog}: {e}")
+    nomes = [arquivo[:-3] for arquivo in sorted(os.listdir(caminho)) if arquivo.endswith('.py') and arquivo != '__init__.py']
+    # Os cogs carregam juntos: a inicialização de um (servidores, tarefas) não espera a dos outros
+    await asyncio.gather(*(carregar_cog(nome) for nome in nomes))
+    logger.info("%d cogs carregadas em %.2fs.", len(nomes), time.perf_counter() - inicio)
 
 async def main():
-    await carregar_cogs()
-    token = os.getenv('BOT_TOKEN')
-    await bot.start(token)
+    # Sessão HTTP única, compartilhada pelos cogs (bot.sessao)
+    bot.sessao = criar_sessao()
+    try:
+        await carregar_cogs()
+        token = os.getenv('BOT_TOKEN')
+        await bot.start(token)
+    finally:
+        monitor_memoria.parar()
+        await fila_mensagens.fechar()
+        await bot.close()
+        await bot.sessao.close()
+        logger.info("Pool HTTP encerrado: %s", estatisticas_pool.resumo())
 
 if __name__ == "__main__":
     try:
-        import asyncio
         asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Bot desconectado.")
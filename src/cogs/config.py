@@ -4,41 +4,17 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
-import squarecloud
+from servicos.configuracao import configuracao
 
-import json
-import os
 
-
-def _carregar_config() -> dict:
-    """Lê o arquivo config.json se existir."""
-    raiz = os.path.dirname(os.path.dirname(__file__))
-    caminho = os.path.join(raiz, "config.json")
-    if os.path.isfile(caminho):
-        with open(caminho, "r", encoding="utf-8") as arquivo:
-            return json.load(arquivo)
-    return {}
-
-def definir_token(token: str):
+def definir_token(token: str, inquilino: str | None = None):
     """Salva o token da Square Cloud em config.json."""
-    dados = _carregar_config()
-    dados["token"] = token
-    raiz = os.path.dirname(os.path.dirname(__file__))
-    caminho = os.path.join(raiz, "config.json")
-    with open(caminho, "w", encoding="utf-8") as arquivo:
-        json.dump(dados, arquivo, ensure_ascii=False, indent=4)
+    configuracao.atualizar(inquilino, token=token)
 
 
-def definir_pagamento(token_mp: str, url_zip: str, preco: float):
+def definir_pagamento(token_mp: str, url_zip: str, preco: float, inquilino: str | None = None):
     """Salva as configurações de pagamento."""
-    dados = _carregar_config()
-    dados["mercadopago_token"] = token_mp
-    dados["zip_url"] = url_zip
-    dados["preco"] = preco
-    raiz = os.path.dirname(os.path.dirname(__file__))
-    caminho = os.path.join(raiz, "config.json")
-    with open(caminho, "w", encoding="utf-8") as arquivo:
-        json.dump(dados, arquivo, ensure_ascii=False, indent=4)
+    configuracao.atualizar(inquilino, mercadopago_token=token_mp, zip_url=url_zip, preco=preco)
 
 class ConfigModal(discord.ui.Modal, title="Configurar"):
     token = discord.ui.TextInput(
@@ -77,39 +53,34 @@ class ConfigModal(discord.ui.Modal, title="Configurar"):
         zip_url = str(self.zip_url).strip()
         preco_txt = self.preco.value.strip()
         admin_txt = self.admin_id.value.strip()
-
-        definir_token(token_sc)
-
-        if token_mp and zip_url and preco_txt:
-            try:
-                valor = float(preco_txt)
-            except ValueError:
-                await interaction.response.send_message(
-                    "Preço inválido.", ephemeral=True
-                )
-                return
-            definir_pagamento(token_mp, zip_url, valor)
-            pagamentos = self.cog.bot.get_cog("Pagamentos")
-            if pagamentos:
-                pagamentos.atualizar_config(token_mp, zip_url, valor)
-        if admin_txt:
-            from .notificacao import definir_admin
-
-            try:
-                admin_id = int(admin_txt)
-            except ValueError:
-                await interaction.response.send_message(
-                    "ID do administrador inválido.",
-                    ephemeral=True,
-                )
-                return
-            definir_admin(admin_id)
-            notificador = self.cog.bot.get_cog("Notificador")
-            if notificador:
-                notificador.id_admin = admin_id
-        gestao = self.cog.bot.get_cog("Gestao")
-        if gestao:
-            gestao.cliente = squarecloud.Client(token_sc)
+        # Em um servidor a configuração vale só para ele; em DM, para a seção global
+        inquilino = str(interaction.guild_id) if interaction.guild_id else None
+
+        with configuracao.lote():
+            definir_token(token_sc, inquilino)
+
+            if token_mp and zip_url and preco_txt:
+                try:
+                    valor = float(preco_txt)
+                except ValueError:
+                    await interaction.response.send_message(
+                        "Preço inválido.", ephemeral=True
+                    )
+                    return
+                definir_pagamento(token_mp, zip_url, valor, inquilino)
+            if admin_txt:
+                from .notificacao import definir_admin
+
+                try:
+                    admin_id = int(admin_txt)
+                except ValueError:
+                    await interaction.response.send_message(
+                        "ID do administrador inválido.",
+                        ephemeral=True,
+                    )
+                    return
+                definir_admin(admin_id, inquilino)
+        # Os clientes de cada serviço são recriados no próximo uso com as novas credenciais
         await interaction.response.send_message("✅ Configurações salvas!", ephemeral=True)
 
 class ConfigCog(commands.Cog):
@@ -123,8 +94,20 @@ class ConfigCog(commands.Cog):
         name="configurar",
         description="Define tokens, pagamento e administrador.",
     )
+    @app_commands.default_permissions(administrator=True)
     async def configurar(self, interaction: discord.Interaction):
         """Abre um modal para configurar todas as chaves."""
+        # A seção global só é alterada pelo administrador global ou, antes de ele ser definido, pelo dono do bot
+        admin_global = configuracao.get("admin_id")
+        if interaction.guild_id is None and not (
+            interaction.user.id == admin_global
+            or (not admin_global and await self.bot.is_owner(interaction.user))
+        ):
+            await interaction.response.send_message(
+                "Apenas o administrador pode alterar a configuração global.",
+                ephemeral=True,
+            )
+            return
         await interaction.response.send_modal(ConfigModal(self))
 
 async def setup(bot: commands.Bot):
@@ -0,0 +1,113 @@
+"""Métricas internas do bot: endpoint do Prometheus e comando /stats."""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import TYPE_CHECKING
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from servicos.configuracao import configuracao
+from servicos.http import estatisticas_pool
+from servicos.mensagens import fila_mensagens
+from servicos.metricas import registro
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+# Porta local do endpoint /metrics (desativado se não definida)
+METRICAS_PORTA = os.getenv("METRICAS_PORTA")
+METRICAS_HOST = os.getenv("METRICAS_HOST", "127.0.0.1")
+
+
+def eh_admin(interaction: discord.Interaction) -> bool:
+    """Administrador configurado, global ou do servidor, ou membro com permissão de administrador."""
+    inquilino = configuracao.inquilino(interaction.guild_id, interaction.user.id)
+    if interaction.user.id in (configuracao.get("admin_id"), configuracao.get("admin_id", inquilino=inquilino)):
+        return True
+    permissoes = getattr(interaction.user, "guild_permissions", None)
+    return bool(permissoes and permissoes.administrator)
+
+
+class Estatisticas(commands.Cog):
+    """Expõe latências e erros coletados pelo bot."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.logger = logging.getLogger(__name__)
+        self._runner: web.AppRunner | None = None
+
+    async def cog_load(self):
+        sessao = getattr(self.bot, "sessao", None)
+        for chave in ("conexoes_criadas", "conexoes_reutilizadas", "conexoes_ociosas", "conexoes_em_uso"):
+            registro.medidor(f"pool_{chave}", lambda chave=chave: estatisticas_pool.resumo(sessao).get(chave, 0))
+        registro.medidor("latencia_gateway_segundos", lambda: self.bot.latency)
+        if METRICAS_PORTA:
+            from aiohttp import web
+
+            app = web.Application()
+            app.router.add_get("/metrics", self._metrics)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, METRICAS_HOST, int(METRICAS_PORTA)).start()
+            self.logger.info("Métricas disponíveis em http://%s:%s/metrics", METRICAS_HOST, METRICAS_PORTA)
+
+    async def cog_unload(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _metrics(self, _: web.Request) -> web.Response:
+        from aiohttp import web
+
+        return web.Response(text=registro.prometheus(), content_type="text/plain", charset="utf-8")
+
+    @app_commands.command(name="stats", description="Mostra latências e erros do bot")
+    @app_commands.default_permissions(administrator=True)
+    async def stats(self, interaction: discord.Interaction):
+        if not eh_admin(interaction):
+            await interaction.response.send_message("Apenas administradores podem ver as estatísticas.", ephemeral=True)
+            return
+        embed = discord.Embed(
+            title="Estatísticas",
+            description=f"Latência do gateway: **{self.bot.latency * 1000:.0f} ms**",
+            colour=discord.Color.from_rgb(255, 255, 255),
+        )
+        secoes = (
+            ("🌐 APIs", "api_segundos", "api_erros_total"),
+            ("🖱️ Interações", "interacao_segundos", "interacao_erros_total"),
+            ("🔍 Varredura", "varredura_segundos", "varredura_erros_total"),
+            ("📨 Fila de mensagens", "mensagens_espera_segundos", "mensagens_erros_total"),
+        )
+        for titulo, nome, nome_erros in secoes:
+            erros = registro.contadores.get(nome_erros, {})
+            linhas = []
+            for rotulos, histograma in sorted(registro.histogramas.get(nome, {}).items()):
+                descricao = " ".join(valor for _, valor in rotulos) or "total"
+                linhas.append(
+                    f"`{descricao}` {histograma.total}x · p50 {histograma.percentil(0.5) * 1000:.0f} ms"
+                    f" · p95 {histograma.percentil(0.95) * 1000:.0f} ms · erros {int(erros.get(rotulos, 0))}"
+                )
+            if linhas:
+                embed.add_field(name=titulo, value="\n".join(linhas)[:1024], inline=False)
+        pool = estatisticas_pool.resumo(getattr(self.bot, "sessao", None))
+        embed.add_field(
+            name="🔌 Pool HTTP",
+            value=(
+                f"{pool['requisicoes']} requisições · {pool['conexoes_criadas']} conexões criadas"
+                f" · reuso {pool['taxa_reuso']:.0%}"
+            ),
+            inline=False,
+        )
+        embed.add_field(
+            name="📬 Mensagens pendentes",
+            value=f"{fila_mensagens.profundidade} na fila · {fila_mensagens.agrupadas} agrupadas",
+            inline=False,
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Estatisticas(bot))
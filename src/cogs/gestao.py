@@ -1,40 +1,157 @@
-import os
 import io
-import json
+import os
+import time
+import fnmatch
+import asyncio
 import logging
+from collections.abc import Callable, Sequence
+from datetime import datetime, timedelta
+from typing import BinaryIO
 import aiohttp
 import discord
-import pydantic
 from discord import app_commands
 from discord.ext import commands
 import squarecloud
 
+from servicos.backups import DIRETORIO_BACKUPS, FORMATO_EXPORTACAO, ExportacaoBackups, remover_exportacoes_antigas
+from servicos.clientes import RegistroClientes
+from servicos.configuracao import configuracao
+from servicos.downloads import ErroDownload, baixar_temporario
+from servicos.http import compartilhar_sessao
+from servicos.logs import Assinatura, CentralLogs
+from servicos.mensagens import LIMITE_MENSAGEM, enviar_followup
+from servicos.metricas import registro
+from servicos.recursos import Medicao, formatar_bytes, monitor_memoria
+from servicos.repeticao import RepeticaoCompartilhada
+from servicos.status import StatusApp, leitor_status
+
 CAMINHO_BANNER = os.path.join(
     os.path.dirname(os.path.dirname(__file__)),
     "assets",
     "squarecloudbanner.png",
 )
+NOME_BANNER = "squarecloudbanner.png"
 
+# O banner é lido do disco uma única vez; cada envio usa um buffer em memória
+with open(CAMINHO_BANNER, "rb") as _banner:
+    BANNER = _banner.read()
 
-async def obter_status(app: squarecloud.Application, cliente: squarecloud.Client) -> squarecloud.StatusData:
-    """Retorna o StatusData da aplicação lidando com possíveis mudanças na API."""
-    try:
-        return await cliente.app_status(app.id)
-    except pydantic.ValidationError:
-        resposta = await cliente._http.fetch_app_status(app.id)
-        dados = resposta.response
-        dados.setdefault("requests", 0)
-        return squarecloud.StatusData(**dados)
+# Tempo (s) em que um status consultado continua válido no cache
+STATUS_CACHE_TTL = float(os.getenv("STATUS_CACHE_TTL", "15"))
+
+# O select do Discord aceita 25 opções: 24 aplicações + "Deploy via ZIP"
+APPS_POR_PAGINA = 24
+PRE_CARREGAMENTO_CONCORRENCIA = int(os.getenv("DASHBOARD_PRE_CARREGAMENTO", "5"))
+
+# Operações em massa: ações simultâneas, tentativas e intervalo entre atualizações do progresso
+MASSA_CONCORRENCIA = int(os.getenv("MASSA_CONCORRENCIA", "5"))
+MASSA_TENTATIVAS = 3
+INTERVALO_PROGRESSO = 1.5
+
+# Logs: tempo (s) que o acompanhamento fica ativo e intervalo mínimo entre edições da mensagem.
+# As edições usam o token da interação, que vale 15 minutos, então a duração fica abaixo disso.
+LOGS_DURACAO = min(float(os.getenv("LOGS_DURACAO", "600")), 14 * 60.0)
+INTERVALO_EDICAO_LOGS = 2.0
+
+logger = logging.getLogger(__name__)
+
+
+async def obter_status(app: squarecloud.Application, cliente: squarecloud.Client) -> StatusApp:
+    """Retorna o status da aplicação com uma única requisição, mesmo após mudanças na API."""
+    return await leitor_status.obter(cliente, app.id)
+
+
+def _consumir_excecao(tarefa: asyncio.Task) -> None:
+    """Marca a exceção como lida quando todos que aguardavam a consulta desistiram."""
+    if not tarefa.cancelled():
+        tarefa.exception()
 
 
-def _carregar_token() -> str | None:
-    """Retorna o token salvo em config.json se existir."""
-    caminho = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config.json")
-    if os.path.isfile(caminho):
-        with open(caminho, "r", encoding="utf-8") as arquivo:
-            dados = json.load(arquivo)
-        return dados.get("token")
-    return None
+class CacheStatus:
+    """Cache com TTL dos status, compartilhando consultas simultâneas da mesma aplicação."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entradas: dict[str, tuple[float, StatusApp]] = {}
+        self._pendentes: dict[str, asyncio.Task] = {}
+        self._proxima_limpeza = 0.0
+
+    async def obter(self, app: squarecloud.Application, cliente: squarecloud.Client) -> StatusApp:
+        """Retorna o status em cache ou aguarda uma única consulta à Square Cloud."""
+        entrada = self._entradas.get(app.id)
+        if entrada and time.monotonic() - entrada[0] < self.ttl:
+            return entrada[1]
+        tarefa = self._pendentes.get(app.id)
+        if tarefa is None:
+            tarefa = asyncio.create_task(self._buscar(app, cliente))
+            tarefa.add_done_callback(_consumir_excecao)
+            self._pendentes[app.id] = tarefa
+        return await asyncio.shield(tarefa)
+
+    async def _buscar(self, app: squarecloud.Application, cliente: squarecloud.Client) -> StatusApp:
+        tarefa = asyncio.current_task()
+        try:
+            status = await obter_status(app, cliente)
+        finally:
+            # Uma consulta retirada por ``invalidar`` não grava o resultado
+            vigente = self._pendentes.get(app.id) is tarefa
+            if vigente:
+                del self._pendentes[app.id]
+        if vigente:
+            self.registrar(app.id, status)
+        return status
+
+    def registrar(self, app_id: str, status: StatusApp) -> None:
+        """Armazena um status obtido por outra fonte, como a varredura do Notificador."""
+        agora = time.monotonic()
+        self._entradas[app_id] = (agora, status)
+        if agora >= self._proxima_limpeza:
+            # Descarta as entradas vencidas, no máximo uma vez por TTL
+            self._proxima_limpeza = agora + self.ttl
+            self._entradas = {chave: e for chave, e in self._entradas.items() if agora - e[0] < self.ttl}
+
+    def invalidar(self, app_id: str) -> None:
+        """Descarta o status em cache e ignora consultas que já estavam em andamento."""
+        self._entradas.pop(app_id, None)
+        self._pendentes.pop(app_id, None)
+
+
+async def enviar_zip(cliente: squarecloud.Client, zip_app: str | BinaryIO) -> squarecloud.UploadData:
+    """Envia um ZIP já salvo em disco, pelo caminho ou já aberto, para a Square Cloud, lendo-o sob demanda."""
+    if isinstance(zip_app, str):
+        with open(zip_app, "rb") as arquivo:
+            return await enviar_zip(cliente, arquivo)
+    return await cliente.upload_app(squarecloud.File(zip_app, filename="app.zip"))
+
+
+def arquivo_banner() -> discord.File:
+    """Anexo do banner a partir dos bytes já carregados."""
+    return discord.File(io.BytesIO(BANNER), filename=NOME_BANNER)
+
+
+def criar_cliente(bot: commands.Bot, token: str) -> squarecloud.Client:
+    """Cria o cliente da Square Cloud usando o pool HTTP compartilhado do bot."""
+    cliente = squarecloud.Client(token)
+    sessao = getattr(bot, "sessao", None)
+    return compartilhar_sessao(cliente, sessao) if sessao else cliente
+
+
+async def deploy_por_url(
+    cliente: squarecloud.Client, url: str, sessao: aiohttp.ClientSession
+) -> squarecloud.UploadData:
+    """Baixa o ZIP em disco, em blocos, e envia o arquivo para a Square Cloud.
+
+    Erros de download são levantados como ``ErroDownload``.
+    """
+    medicao = Medicao()
+    caminho = await baixar_temporario(sessao, url, medicao=medicao)
+    try:
+        resultado = await enviar_zip(cliente, caminho)
+        medicao.amostrar()
+    finally:
+        os.unlink(caminho)
+    logger.info("Deploy enviado: %s", medicao.resumo())
+    return resultado
 
 
 class DeployModal(discord.ui.Modal):
@@ -42,28 +159,25 @@ class DeployModal(discord.ui.Modal):
 
     link = discord.ui.TextInput(label="Link para o ZIP", placeholder="https://.../app.zip")
 
-    def __init__(self, cog: commands.Cog):
+    def __init__(self, cog: commands.Cog, cliente: squarecloud.Client):
         super().__init__(title="Deploy")
         self.cog = cog
+        self.cliente = cliente
 
     async def on_submit(self, interaction: discord.Interaction):
-        await interaction.response.defer(ephemeral=True)
-        url = str(self.link)
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as resp:
-                    if resp.status != 200:
-                        raise RuntimeError("Falha ao baixar o arquivo")
-                    dados = await resp.read()
-        except Exception as exc:
-            await interaction.followup.send(f"Erro ao baixar o arquivo: {exc}", ephemeral=True)
-            return
-        arquivo = squarecloud.File(io.BytesIO(dados), filename="app.zip")
-        try:
-            await self.cog.cliente.upload_app(arquivo)
-            await interaction.followup.send("Deploy iniciado com sucesso!", ephemeral=True)
-        except Exception as exc:
-            await interaction.followup.send(f"Erro ao fazer deploy: {exc}", ephemeral=True)
+        async with registro.medir("interacao", handler="deploy_modal"):
+            await interaction.response.defer(ephemeral=True)
+            url = str(self.link)
+            try:
+                await deploy_por_url(self.cliente, url, self.cog.bot.sessao)
+            except ErroDownload as exc:
+                await enviar_followup(interaction, f"Erro ao baixar o arquivo: {exc}")
+                return
+            except Exception as exc:
+                await enviar_followup(interaction, f"Erro ao fazer deploy: {exc}")
+                return
+            # Fora do try: uma falha ao responder não deve ser relatada como falha do deploy
+            await enviar_followup(interaction, "Deploy iniciado com sucesso!")
 
 
 class ConfirmarExclusao(discord.ui.View):
@@ -83,9 +197,9 @@ class ConfirmarExclusao(discord.ui.View):
         await interaction.response.edit_message(content="Excluindo aplicação...", view=None)
         try:
             await self.app.delete()
-            await interaction.followup.send("Aplicação excluída com sucesso.", ephemeral=True)
+            await enviar_followup(interaction, "Aplicação excluída com sucesso.")
         except Exception as exc:
-            await interaction.followup.send(f"Erro ao excluir: {exc}", ephemeral=True)
+            await enviar_followup(interaction, f"Erro ao excluir: {exc}")
 
     @discord.ui.button(label="❌", style=discord.ButtonStyle.secondary)
     async def cancelar(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -95,114 +209,389 @@ class ConfirmarExclusao(discord.ui.View):
 class ControlesAplicacao(discord.ui.View):
     """View com botões para controle da aplicação."""
 
-    def __init__(self, app: squarecloud.Application, cog: commands.Cog):
+    def __init__(self, app: squarecloud.Application, cog: commands.Cog, cliente: squarecloud.Client):
         super().__init__(timeout=60)
         self.app = app
         self.cog = cog
+        self.cliente = cliente
 
     async def atualizar_mensagem(self, interaction: discord.Interaction):
-        status = await obter_status(self.app, self.cog.cliente)
+        status = await self.cog.cache_status.obter(self.app, self.cliente)
         embed = criar_embed(self.app, status)
-        arquivo = discord.File(CAMINHO_BANNER, filename="squarecloudbanner.png")
-        await interaction.response.edit_message(
-            embed=embed,
-            view=self,
-            attachments=[arquivo],
-        )
+        # O banner já está anexado à mensagem; a edição envia apenas o embed
+        if interaction.response.is_done():
+            await interaction.edit_original_response(embed=embed, view=self)
+        else:
+            await interaction.response.edit_message(embed=embed, view=self)
+
+    async def _executar_acao(self, interaction: discord.Interaction, nome: str, acao, erro: str):
+        """Executa iniciar/reiniciar/parar e atualiza o painel com o novo status."""
+        async with registro.medir("interacao", handler=f"controles.{nome}"):
+            await interaction.response.defer(ephemeral=True)
+            try:
+                await acao()
+            except Exception as exc:
+                await enviar_followup(interaction, f"{erro}: {exc}")
+                return
+            self.cog.apos_acao(self.app.id)
+            await self.atualizar_mensagem(interaction)
 
     @discord.ui.button(emoji="🔷", style=discord.ButtonStyle.secondary)
     async def atualizar(self, interaction: discord.Interaction, _: discord.ui.Button):
-        await self.atualizar_mensagem(interaction)
+        async with registro.medir("interacao", handler="controles.atualizar"):
+            await self.atualizar_mensagem(interaction)
 
     @discord.ui.button(emoji="🟩", style=discord.ButtonStyle.secondary)
     async def iniciar(self, interaction: discord.Interaction, _: discord.ui.Button):
-        await interaction.response.defer(ephemeral=True)
-        try:
-            await self.app.start()
-        except Exception as exc:
-            await interaction.followup.send(f"Erro ao iniciar: {exc}", ephemeral=True)
-            return
-        await self.atualizar_mensagem(interaction)
+        await self._executar_acao(interaction, "iniciar", self.app.start, "Erro ao iniciar")
 
     @discord.ui.button(emoji="🔁", style=discord.ButtonStyle.secondary)
     async def reiniciar(self, interaction: discord.Interaction, _: discord.ui.Button):
-        await interaction.response.defer(ephemeral=True)
-        try:
-            await self.app.restart()
-        except Exception as exc:
-            await interaction.followup.send(f"Erro ao reiniciar: {exc}", ephemeral=True)
-            return
-        await self.atualizar_mensagem(interaction)
+        await self._executar_acao(interaction, "reiniciar", self.app.restart, "Erro ao reiniciar")
 
     @discord.ui.button(emoji="🟥", style=discord.ButtonStyle.secondary)
     async def parar(self, interaction: discord.Interaction, _: discord.ui.Button):
-        await interaction.response.defer(ephemeral=True)
-        try:
-            await self.app.stop()
-        except Exception as exc:
-            await interaction.followup.send(f"Erro ao parar: {exc}", ephemeral=True)
-            return
-        await self.atualizar_mensagem(interaction)
+        await self._executar_acao(interaction, "parar", self.app.stop, "Erro ao parar")
+
+    @discord.ui.button(emoji="📜", style=discord.ButtonStyle.secondary, row=1)
+    async def logs(self, interaction: discord.Interaction, _: discord.ui.Button):
+        async with registro.medir("interacao", handler="controles.logs"):
+            view = VisualizadorLogs(self.app, self.cog.logs.assinar(self.app.id, self.cliente))
+            try:
+                await interaction.response.send_message(
+                    formatar_logs(self.app.name, ["carregando…"]), view=view, ephemeral=True
+                )
+            except Exception:
+                view.encerrar()
+                raise
+            view.iniciar(interaction)
 
     @discord.ui.button(emoji="🗑️", style=discord.ButtonStyle.danger, row=1)
     async def excluir(self, interaction: discord.Interaction, _: discord.ui.Button):
-        view = ConfirmarExclusao(self.app)
-        await interaction.response.send_message("Tem certeza que deseja excluir?", view=view, ephemeral=True)
+        async with registro.medir("interacao", handler="controles.excluir"):
+            view = ConfirmarExclusao(self.app)
+            await interaction.response.send_message("Tem certeza que deseja excluir?", view=view, ephemeral=True)
+
+
+def formatar_logs(nome: str, linhas: Sequence[str], erro: str | None = None) -> str:
+    """Monta a mensagem com as últimas linhas que cabem no limite do Discord."""
+    cabecalho = f"📜 Logs de **{nome}**" + (f" · ⚠️ {erro[:100]}" if erro else "")
+    espaco = LIMITE_MENSAGEM - len(cabecalho) - len("\n```\n\n```")
+    selecionadas: list[str] = []
+    for linha in reversed(linhas):
+        if espaco <= 0:
+            break
+        # Impede que uma linha feche o bloco de código; uma linha longa demais é cortada no espaço que resta
+        linha = linha.replace("```", "`\u200b``")[:espaco]
+        espaco -= len(linha) + 1
+        selecionadas.append(linha)
+    corpo = "\n".join(reversed(selecionadas)) or "(sem linhas)"
+    return f"{cabecalho}\n```\n{corpo}\n```"
+
+
+class VisualizadorLogs(discord.ui.View):
+    """Mensagem com os logs de uma aplicação, editada conforme chegam linhas novas.
+
+    As linhas que chegam durante o intervalo entre edições saem juntas na
+    próxima, e o acompanhamento termina junto com a view.
+    """
+
+    def __init__(self, app: squarecloud.Application, assinatura: Assinatura):
+        super().__init__(timeout=LOGS_DURACAO)
+        self.app = app
+        self.assinatura = assinatura
+        self.edicoes = 0
+        self._interacao: discord.Interaction | None = None
+        self._tarefa: asyncio.Task | None = None
+
+    def iniciar(self, interaction: discord.Interaction) -> None:
+        self._interacao = interaction
+        self._tarefa = asyncio.create_task(self._editar())
+
+    async def _editar(self) -> None:
+        transmissao = self.assinatura.transmissao
+        while True:
+            await self.assinatura.evento.wait()
+            self.assinatura.evento.clear()
+            try:
+                await self._interacao.edit_original_response(
+                    content=formatar_logs(self.app.name, transmissao.linhas, transmissao.erro)
+                )
+                self.edicoes += 1
+            except discord.NotFound:
+                self.encerrar()
+                return
+            except discord.HTTPException as exc:
+                logger.warning("Falha ao atualizar os logs de %s: %s", self.app.name, exc)
+            await asyncio.sleep(INTERVALO_EDICAO_LOGS)
+
+    def encerrar(self) -> None:
+        if self._tarefa and self._tarefa is not asyncio.current_task():
+            self._tarefa.cancel()
+        self.assinatura.cancelar()
+        self.stop()
+
+    async def on_timeout(self):
+        self.encerrar()
+        if self._interacao:
+            try:
+                await self._interacao.edit_original_response(view=None)
+            except discord.HTTPException:
+                pass
+
+    @discord.ui.button(emoji="⏹️", label="Parar", style=discord.ButtonStyle.secondary)
+    async def parar(self, interaction: discord.Interaction, _: discord.ui.Button):
+        self.encerrar()
+        await interaction.response.edit_message(view=None)
+
+
+class IndiceApps:
+    """Aplicações ordenadas por nome, indexadas uma vez a cada consulta a all_apps()."""
+
+    def __init__(self, apps: list[squarecloud.Application]):
+        self.apps = sorted(apps, key=lambda app: app.name.casefold())
+        self.por_id = {app.id: app for app in self.apps}
+        self._nomes = [app.name.casefold() for app in self.apps]
+
+    def buscar(self, termo: str) -> list[squarecloud.Application]:
+        termo = termo.casefold().strip()
+        if not termo:
+            return self.apps
+        return [app for app, nome in zip(self.apps, self._nomes) if termo in nome]
+
+
+class BuscaModal(discord.ui.Modal):
+    """Modal para filtrar as aplicações pelo nome."""
+
+    termo = discord.ui.TextInput(label="Nome da aplicação", required=False, placeholder="Vazio mostra todas")
+
+    def __init__(self, menu: "MenuAplicacoes"):
+        super().__init__(title="Buscar aplicação")
+        self.menu = menu
+
+    async def on_submit(self, interaction: discord.Interaction):
+        self.menu.filtrar(str(self.termo))
+        await interaction.response.edit_message(view=self.menu)
 
 
 class MenuAplicacoes(discord.ui.View):
-    """View principal com a seleção de aplicações."""
+    """View principal com a seleção paginada de aplicações."""
 
-    def __init__(self, apps: list[squarecloud.Application], cog: commands.Cog):
+    def __init__(self, apps: list[squarecloud.Application], cog: commands.Cog, cliente: squarecloud.Client):
         super().__init__(timeout=60)
-        opcoes = [discord.SelectOption(label=app.name, value=app.id) for app in apps]
-        opcoes.append(discord.SelectOption(label="Deploy via ZIP", value="deploy"))
-        self.select = discord.ui.Select(placeholder="Escolha uma aplicação", options=opcoes)
+        self.cog = cog
+        self.cliente = cliente
+        self.indice = IndiceApps(apps)
+        self.visiveis = self.indice.apps
+        self.pagina = 0
+        self._pre_carregamento: list[asyncio.Task] = []
+        self.select = discord.ui.Select(placeholder="Escolha uma aplicação", row=0)
         self.select.callback = self.callback
         self.add_item(self.select)
-        self.apps = {app.id: app for app in apps}
-        self.cog = cog
+        self._montar_pagina()
+
+    @property
+    def total_paginas(self) -> int:
+        return max(1, -(-len(self.visiveis) // APPS_POR_PAGINA))
+
+    def _montar_pagina(self) -> None:
+        inicio = self.pagina * APPS_POR_PAGINA
+        pagina = self.visiveis[inicio : inicio + APPS_POR_PAGINA]
+        opcoes = [discord.SelectOption(label=app.name[:100], value=app.id) for app in pagina]
+        opcoes.append(discord.SelectOption(label="Deploy via ZIP", value="deploy"))
+        self.select.options = opcoes
+        self.anterior.disabled = self.pagina == 0
+        self.proxima.disabled = self.pagina >= self.total_paginas - 1
+        self.contador.label = f"{self.pagina + 1}/{self.total_paginas}"
+        # Deixa o status da página visível pronto antes de o usuário escolher
+        for tarefa in self._pre_carregamento:
+            tarefa.cancel()
+        self._pre_carregamento = self.cog.pre_carregar_status(pagina, self.cliente)
+
+    def filtrar(self, termo: str) -> None:
+        self.visiveis = self.indice.buscar(termo)
+        self.pagina = 0
+        self._montar_pagina()
+
+    async def on_timeout(self):
+        for tarefa in self._pre_carregamento:
+            tarefa.cancel()
+
+    @discord.ui.button(emoji="◀️", style=discord.ButtonStyle.secondary, row=1)
+    async def anterior(self, interaction: discord.Interaction, _: discord.ui.Button):
+        self.pagina = max(0, self.pagina - 1)
+        self._montar_pagina()
+        await interaction.response.edit_message(view=self)
+
+    @discord.ui.button(label="1/1", style=discord.ButtonStyle.secondary, disabled=True, row=1)
+    async def contador(self, interaction: discord.Interaction, _: discord.ui.Button):
+        pass
+
+    @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.secondary, row=1)
+    async def proxima(self, interaction: discord.Interaction, _: discord.ui.Button):
+        self.pagina = min(self.total_paginas - 1, self.pagina + 1)
+        self._montar_pagina()
+        await interaction.response.edit_message(view=self)
+
+    @discord.ui.button(emoji="🔎", style=discord.ButtonStyle.secondary, row=1)
+    async def buscar(self, interaction: discord.Interaction, _: discord.ui.Button):
+        await interaction.response.send_modal(BuscaModal(self))
 
     async def callback(self, interaction: discord.Interaction):
-        escolha = self.select.values[0]
-        if escolha == "deploy":
-            await interaction.response.send_modal(DeployModal(self.cog))
-            return
-        app = self.apps.get(escolha)
-        status = await obter_status(app, self.cog.cliente)
-        embed = criar_embed(app, status)
-        view = ControlesAplicacao(app, self.cog)
-        arquivo = discord.File(CAMINHO_BANNER, filename="squarecloudbanner.png")
-        await interaction.response.send_message(
-            embed=embed,
-            view=view,
-            file=arquivo,
-            ephemeral=True,
+        async with registro.medir("interacao", handler="menu"):
+            escolha = self.select.values[0]
+            if escolha == "deploy":
+                await interaction.response.send_modal(DeployModal(self.cog, self.cliente))
+                return
+            app = self.indice.por_id.get(escolha)
+            status = await self.cog.cache_status.obter(app, self.cliente)
+            embed = criar_embed(app, status)
+            view = ControlesAplicacao(app, self.cog, self.cliente)
+            await interaction.response.send_message(
+                embed=embed,
+                view=view,
+                file=arquivo_banner(),
+                ephemeral=True,
+            )
+
+
+def filtrar_apps(apps: list[squarecloud.Application], padrao: str | None) -> list[squarecloud.Application]:
+    """Aplicações cujo nome corresponde ao padrão com curingas, sem diferenciar maiúsculas, em ordem de nome."""
+    if padrao:
+        apps = [app for app in apps if fnmatch.fnmatch(app.name.casefold(), padrao.casefold())]
+    return sorted(apps, key=lambda app: app.name.casefold())
+
+
+def barra_progresso(concluidas: int, total: int) -> str:
+    preenchido = round(20 * concluidas / total) if total else 20
+    return f"`{'█' * preenchido}{'░' * (20 - preenchido)}` {concluidas}/{total}"
+
+
+async def acompanhar_progresso(
+    interaction: discord.Interaction, tarefa: asyncio.Future, montar_embed: Callable[[], discord.Embed]
+) -> None:
+    """Aguarda ``tarefa`` editando a resposta da interação a cada INTERVALO_PROGRESSO segundos."""
+    while not tarefa.done():
+        await asyncio.wait([tarefa], timeout=INTERVALO_PROGRESSO)
+        if not tarefa.done():
+            await interaction.edit_original_response(embed=montar_embed())
+    await tarefa
+
+
+class OperacaoEmMassa:
+    """Executa uma ação em várias aplicações com concorrência limitada e progresso em um único embed.
+
+    As falhas são repetidas por uma ``RepeticaoCompartilhada``.
+    """
+
+    ACOES = {"iniciar": "start", "parar": "stop", "reiniciar": "restart"}
+
+    def __init__(self, cog: "Gestao", acao: str, apps: list[squarecloud.Application]):
+        self.cog = cog
+        self.acao = acao
+        self.apps = apps
+        self.concluidas = 0
+        self.falhas: dict[str, str] = {}
+        self.repeticao = RepeticaoCompartilhada(MASSA_TENTATIVAS)
+        self._inicio = time.perf_counter()
+
+    async def _executar_app(self, app: squarecloud.Application, limite: asyncio.Semaphore) -> None:
+        metodo = getattr(app, self.ACOES[self.acao])
+        async with limite:
+            try:
+                await self.repeticao.executar(metodo)
+            except Exception as exc:
+                self.falhas[app.name] = str(exc)
+        self.cog.apos_acao(app.id)
+        self.concluidas += 1
+
+    def embed(self, final: bool = False) -> discord.Embed:
+        total = len(self.apps)
+        embed = discord.Embed(
+            title=f"{self.acao.capitalize()} {total} aplicações",
+            description=barra_progresso(self.concluidas, total),
+            colour=discord.Color.from_rgb(255, 255, 255),
         )
+        embed.add_field(name="✅ Sucesso", value=str(self.concluidas - len(self.falhas)), inline=True)
+        embed.add_field(name="❌ Falhas", value=str(len(self.falhas)), inline=True)
+        embed.add_field(name="⏱️ Tempo", value=f"{time.perf_counter() - self._inicio:.1f}s", inline=True)
+        if final and self.falhas:
+            detalhes = "\n".join(f"**{nome}**: {erro}" for nome, erro in self.falhas.items())
+            embed.add_field(name="Detalhes", value=detalhes[:1024], inline=False)
+        return embed
+
+    async def executar(self, interaction: discord.Interaction) -> None:
+        """Roda todas as ações editando a mensagem de progresso em intervalos fixos."""
+        limite = asyncio.Semaphore(MASSA_CONCORRENCIA)
+        tarefas = asyncio.gather(*(self._executar_app(app, limite) for app in self.apps))
+        await acompanhar_progresso(interaction, tarefas, self.embed)
+        self.cog.logger.info(
+            "Operação em massa '%s' em %d aplicações concluída em %.1fs (%d falhas, %d novas tentativas)",
+            self.acao, len(self.apps), time.perf_counter() - self._inicio, len(self.falhas), self.repeticao.extras,
+        )
+        await interaction.edit_original_response(embed=self.embed(final=True))
 
 
-def criar_embed(app: squarecloud.Application, status: squarecloud.StatusData) -> discord.Embed:
-    """Cria um embed organizado e de fácil leitura com as informações da aplicação."""
-
-    def formatar_duracao(ms: int | None) -> str:
-        if not ms:
-            return "0"
-        from datetime import timedelta
+def embed_backup(exportacao: ExportacaoBackups, final: bool = False) -> discord.Embed:
+    """Progresso de uma exportação de backups, com o volume baixado e a vazão."""
+    total = len(exportacao.apps)
+    falhas = exportacao.falhas if final else []
+    embed = discord.Embed(
+        title=f"Backup de {total} aplicações",
+        description=barra_progresso(exportacao.concluidas, total),
+        colour=discord.Color.from_rgb(255, 255, 255),
+    )
+    if final:
+        embed.add_field(name="✅ Sucesso", value=str(total - len(falhas)), inline=True)
+        embed.add_field(name="❌ Falhas", value=str(len(falhas)), inline=True)
+    else:
+        embed.add_field(name="⏳ Em andamento", value=str(exportacao.em_andamento), inline=True)
+    embed.add_field(name="📦 Baixado", value=formatar_bytes(exportacao.medicao.bytes), inline=True)
+    embed.add_field(name="🚀 Vazão", value=f"{formatar_bytes(exportacao.medicao.vazao)}/s", inline=True)
+    embed.add_field(name="⏱️ Tempo", value=f"{exportacao.medicao.duracao:.1f}s", inline=True)
+    if final:
+        embed.add_field(name="📁 Manifesto", value=f"`{exportacao.caminho_manifesto}`", inline=False)
+    if falhas:
+        detalhes = "\n".join(f"**{resultado.nome}**: {resultado.erro}" for resultado in falhas)
+        embed.add_field(name="Detalhes", value=detalhes[:1024], inline=False)
+    return embed
 
-        duracao = timedelta(milliseconds=ms)
-        dias = duracao.days
-        if dias:
-            return f"{dias} dias"
-        horas, resto = divmod(duracao.seconds, 3600)
-        minutos, segundos = divmod(resto, 60)
-        return f"{horas:02}:{minutos:02}:{segundos:02}"
 
+def _criar_esqueleto_embed() -> discord.Embed:
+    """Partes fixas do embed de aplicação, montadas uma única vez."""
     embed = discord.Embed(
-        title=app.name,
         description="Aplicação hospedada via SquareCloud",
         colour=discord.Color.from_rgb(255, 255, 255),
     )
-    embed.set_image(url="attachment://squarecloudbanner.png")
+    embed.set_image(url=f"attachment://{NOME_BANNER}")
+    return embed
+
+
+_ESQUELETO_EMBED = _criar_esqueleto_embed()
+
+EMBED_DASHBOARD = discord.Embed(
+    description="Selecione uma aplicação:",
+    colour=discord.Color.from_rgb(255, 255, 255),
+)
+EMBED_DASHBOARD.set_image(url=f"attachment://{NOME_BANNER}")
+
+
+def formatar_duracao(ms: int | None) -> str:
+    if not ms:
+        return "0"
+    duracao = timedelta(milliseconds=ms)
+    dias = duracao.days
+    if dias:
+        return f"{dias} dias"
+    horas, resto = divmod(duracao.seconds, 3600)
+    minutos, segundos = divmod(resto, 60)
+    return f"{horas:02}:{minutos:02}:{segundos:02}"
+
+
+def criar_embed(app: squarecloud.Application, status: StatusApp) -> discord.Embed:
+    """Cria um embed organizado e de fácil leitura com as informações da aplicação."""
+    embed = _ESQUELETO_EMBED.copy()
+    embed.title = app.name
 
     emoji_status = "🟢" if status.running else "🔴"
     embed.add_field(name="📊 Status", value=f"{emoji_status} **{status.status}**", inline=True)
@@ -217,9 +606,6 @@ def criar_embed(app: squarecloud.Application, status: squarecloud.StatusData) ->
         value=f"[Acessar painel](https://dash.squarecloud.app/dashboard/app/{app.id})",
         inline=False,
     )
-
-    from datetime import datetime
-
     embed.set_footer(text=datetime.utcnow().strftime("Dados gerados em %d/%m/%Y %H:%M:%S"))
     return embed
 
@@ -230,35 +616,161 @@ class Gestao(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.logger = logging.getLogger(__name__)
-        token = _carregar_token()
-        self.cliente = squarecloud.Client(token) if token else None
-
-    @app_commands.command(name="dashboard", description="Gerencia suas aplicações")
-    async def dashboard(self, interaction: discord.Interaction):
-        if not self.cliente:
+        self.clientes: RegistroClientes[squarecloud.Client] = RegistroClientes(
+            "squarecloud", lambda token: criar_cliente(bot, token)
+        )
+        self.cache_status = CacheStatus(STATUS_CACHE_TTL)
+        self.logs = CentralLogs()
+        monitor_memoria.contar("status_em_cache", lambda: len(self.cache_status._entradas))
+        self._limite_pre_carregamento = asyncio.Semaphore(PRE_CARREGAMENTO_CONCORRENCIA)
+
+    def cliente_do_inquilino(self, inquilino: str | None, reter: bool = True) -> squarecloud.Client | None:
+        """Cliente da Square Cloud de uma seção da configuração, reaproveitado entre interações.
+
+        Com ``reter=False`` o cliente não entra no registro, para tarefas de fundo
+        não manterem vivos os clientes de servidores inativos.
+        """
+        token = configuracao.get("token", inquilino=inquilino)
+        if reter:
+            return self.clientes.obter(inquilino, token)
+        return self.clientes.emprestar(inquilino, token)
+
+    def cliente_de(self, interaction: discord.Interaction) -> squarecloud.Client | None:
+        """Cliente da Square Cloud configurado para o servidor da interação."""
+        return self.cliente_do_inquilino(configuracao.inquilino(interaction.guild_id, interaction.user.id))
+
+    def apos_acao(self, app_id: str) -> None:
+        """Descarta o status em cache e pede ao monitoramento uma consulta rápida da aplicação."""
+        self.cache_status.invalidar(app_id)
+        notificador: commands.Cog | None = self.bot.get_cog("Notificador")
+        if notificador:
+            notificador.antecipar(app_id)  # type: ignore[attr-defined]
+
+    def pre_carregar_status(
+        self, apps: list[squarecloud.Application], cliente: squarecloud.Client
+    ) -> list[asyncio.Task]:
+        """Aquece o cache de status das aplicações em segundo plano."""
+
+        async def carregar(app: squarecloud.Application) -> None:
+            async with self._limite_pre_carregamento:
+                try:
+                    await self.cache_status.obter(app, cliente)
+                except Exception as exc:
+                    self.logger.debug("Falha ao pré-carregar status de %s: %s", app.name, exc)
+
+        return [asyncio.create_task(carregar(app)) for app in apps]
+
+    async def _selecionar_apps(
+        self, interaction: discord.Interaction, padrao: str | None
+    ) -> tuple[squarecloud.Client, list[squarecloud.Application]] | None:
+        """Adia a resposta e lista as aplicações filtradas por ``padrao`` para um comando em lote.
+
+        Retorna ``None`` quando a interação já foi respondida com um erro.
+        """
+        cliente = self.cliente_de(interaction)
+        if not cliente:
             await interaction.response.send_message("Token não configurado.", ephemeral=True)
-            return
+            return None
+        await interaction.response.defer(ephemeral=True)
         try:
-            apps = await self.cliente.all_apps()
+            apps = await cliente.all_apps()
         except Exception as exc:
-            await interaction.response.send_message(f"Erro ao obter aplicações: {exc}", ephemeral=True)
-            return
-        view = MenuAplicacoes(apps, self)
-
-        arquivo = discord.File(CAMINHO_BANNER, filename="squarecloudbanner.png")
-
-        embed = discord.Embed(
-            description="Selecione uma aplicação:",
-            colour=discord.Color.from_rgb(255, 255, 255),
-        )
-        embed.set_image(url="attachment://squarecloudbanner.png")
+            await enviar_followup(interaction, f"Erro ao obter aplicações: {exc}")
+            return None
+        return cliente, filtrar_apps(apps, padrao)
 
-        await interaction.response.send_message(
-            embed=embed,
-            view=view,
-            file=arquivo,
-            ephemeral=True,
-        )
+    @app_commands.command(name="dashboard", description="Gerencia suas aplicações")
+    async def dashboard(self, interaction: discord.Interaction):
+        async with registro.medir("interacao", handler="dashboard"):
+            cliente = self.cliente_de(interaction)
+            if not cliente:
+                await interaction.response.send_message("Token não configurado.", ephemeral=True)
+                return
+            try:
+                apps = await cliente.all_apps()
+            except Exception as exc:
+                await interaction.response.send_message(f"Erro ao obter aplicações: {exc}", ephemeral=True)
+                return
+            view = MenuAplicacoes(apps, self, cliente)
+            await interaction.response.send_message(
+                embed=EMBED_DASHBOARD,
+                view=view,
+                file=arquivo_banner(),
+                ephemeral=True,
+            )
+
+    @app_commands.command(name="massa", description="Inicia, para ou reinicia várias aplicações de uma vez")
+    @app_commands.describe(
+        acao="Ação aplicada a todas as aplicações selecionadas",
+        padrao="Filtro de nome com curingas, por exemplo bot-*",
+        status="Considera apenas aplicações com este status",
+    )
+    @app_commands.choices(
+        acao=[app_commands.Choice(name=nome, value=nome) for nome in OperacaoEmMassa.ACOES],
+        status=[
+            app_commands.Choice(name="online", value="online"),
+            app_commands.Choice(name="offline", value="offline"),
+        ],
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def massa(
+        self,
+        interaction: discord.Interaction,
+        acao: str,
+        padrao: str | None = None,
+        status: str | None = None,
+    ):
+        async with registro.medir("interacao", handler="massa"):
+            selecao = await self._selecionar_apps(interaction, padrao)
+            if selecao is None:
+                return
+            cliente, apps = selecao
+            if status:
+                limite = asyncio.Semaphore(MASSA_CONCORRENCIA)
+
+                async def consultar(app: squarecloud.Application):
+                    async with limite:
+                        return await self.cache_status.obter(app, cliente)
+
+                estados = await asyncio.gather(*(consultar(app) for app in apps), return_exceptions=True)
+                online = status == "online"
+                apps = [
+                    app for app, estado in zip(apps, estados)
+                    if not isinstance(estado, BaseException) and estado.running == online
+                ]
+            if not apps:
+                await enviar_followup(interaction, "Nenhuma aplicação corresponde ao filtro.")
+                return
+            operacao = OperacaoEmMassa(self, acao, apps)
+            await interaction.edit_original_response(embed=operacao.embed())
+            await operacao.executar(interaction)
+
+    @app_commands.command(name="backup", description="Exporta o backup das aplicações para o disco do bot")
+    @app_commands.describe(padrao="Filtro de nome com curingas, por exemplo bot-*")
+    @app_commands.default_permissions(administrator=True)
+    async def backup(self, interaction: discord.Interaction, padrao: str | None = None):
+        async with registro.medir("interacao", handler="backup"):
+            selecao = await self._selecionar_apps(interaction, padrao)
+            if selecao is None:
+                return
+            cliente, apps = selecao
+            if not apps:
+                await enviar_followup(interaction, "Nenhuma aplicação corresponde ao filtro.")
+                return
+            raiz = os.path.join(
+                DIRETORIO_BACKUPS, configuracao.inquilino(interaction.guild_id, interaction.user.id) or "global"
+            )
+            exportacao = ExportacaoBackups(
+                cliente, self.bot.sessao, apps, os.path.join(raiz, datetime.now().strftime(FORMATO_EXPORTACAO))
+            )
+            await interaction.edit_original_response(embed=embed_backup(exportacao))
+            await acompanhar_progresso(
+                interaction, asyncio.create_task(exportacao.executar()), lambda: embed_backup(exportacao)
+            )
+            removidas = await asyncio.to_thread(remover_exportacoes_antigas, raiz)
+            if removidas:
+                self.logger.info("Exportações de backup antigas removidas de %s: %s", raiz, ", ".join(removidas))
+            await interaction.edit_original_response(embed=embed_backup(exportacao, final=True))
 
 
 async def setup(bot: commands.Bot):
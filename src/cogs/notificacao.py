@@ -1,29 +1,116 @@
 import asyncio
 import logging
+import math
 import os
-import json
+import time
+from collections import deque
+from itertools import zip_longest
 
 import discord
+from discord import app_commands
 from discord.ext import commands
 import squarecloud
 
+from servicos.agendador import AgendadorAdaptativo
+from servicos.configuracao import configuracao
+from servicos.historico import HistoricoMetricas, estatisticas, sparkline
+from servicos.mensagens import LIMITE_MENSAGEM, fila_mensagens
+from servicos.metricas import registro
+from servicos.recursos import monitor_memoria
 
-def _carregar_dados() -> dict:
-    raiz = os.path.dirname(os.path.dirname(__file__))
-    caminho = os.path.join(raiz, "config.json")
-    if os.path.isfile(caminho):
-        with open(caminho, "r", encoding="utf-8") as arq:
-            return json.load(arq)
-    return {}
+from .gestao import CacheStatus, obter_status
 
+# Quantidade máxima de consultas simultâneas e tempo limite de cada uma
+CONCORRENCIA_VERIFICACAO = int(os.getenv("NOTIFICADOR_CONCORRENCIA", "10"))
+TIMEOUT_STATUS = float(os.getenv("NOTIFICADOR_TIMEOUT", "15"))
+# Intervalo (s) entre listagens das aplicações de cada inquilino e entre amostras do histórico.
+# O status de cada aplicação é consultado no ritmo definido pelo AgendadorAdaptativo.
+INTERVALO_VERIFICACAO = 300
+# Espera mínima (s) entre rodadas, para consultar juntas as aplicações que vencem próximas
+ESPERA_MINIMA = 1.0
+# Espera (s) antes de tentar de novo uma rodada que falhou inesperadamente
+ESPERA_APOS_ERRO = 60.0
+# As rodadas rodam a cada poucos segundos e vão para o DEBUG; só as que levam
+# LOG_RODADA_MINIMO (s) ou mais são registradas em INFO
+LOG_RODADA_MINIMO = float(os.getenv("NOTIFICADOR_LOG_RODADA_MINIMO", "5"))
+# Os alertas de cada administrador saem em no máximo um resumo a cada JANELA_DIGEST (s):
+# um alerta isolado é enviado na hora e os seguintes aguardam o fim da janela
+JANELA_DIGEST = float(os.getenv("NOTIFICADOR_JANELA_DIGEST", "300"))
+# Janela (h) mantida no histórico de métricas de cada aplicação
+HISTORICO_HORAS = float(os.getenv("HISTORICO_HORAS", "24"))
 
-def definir_admin(id_admin: int) -> None:
-    dados = _carregar_dados()
-    dados["admin_id"] = id_admin
-    raiz = os.path.dirname(os.path.dirname(__file__))
-    caminho = os.path.join(raiz, "config.json")
-    with open(caminho, "w", encoding="utf-8") as arq:
-        json.dump(dados, arq, ensure_ascii=False, indent=4)
+# Rótulo e unidade de cada série exibida em /metricas
+SERIES_METRICAS = (
+    ("cpu", "⚙️ CPU", "%"),
+    ("ram", "🧠 RAM", " MB"),
+    ("armazenamento", "💽 Armazenamento", " MB"),
+    ("requests", "📡 Requests", ""),
+)
+
+# Uma aplicação com LIMITE_OSCILACAO mudanças de estado dentro de JANELA_OSCILACAO (s)
+# é tratada como instável e deixa de gerar alertas individuais até se estabilizar
+JANELA_OSCILACAO = int(os.getenv("NOTIFICADOR_JANELA_OSCILACAO", "3600"))
+LIMITE_OSCILACAO = int(os.getenv("NOTIFICADOR_LIMITE_OSCILACAO", "3"))
+
+ONLINE, PARADA, SEM_RESPOSTA = "online", "parada", "sem resposta"
+ALERTAS = {
+    ONLINE: "🟢 **{}** voltou a funcionar.",
+    PARADA: "🔴 **{}** parou de funcionar.",
+    SEM_RESPOSTA: "🟡 **{}** não respondeu à verificação.",
+}
+
+
+def definir_admin(id_admin: int, inquilino: str | None = None) -> None:
+    configuracao.atualizar(inquilino, admin_id=id_admin)
+
+
+class EstadoApp:
+    """Último estado observado de uma aplicação e suas mudanças recentes."""
+
+    __slots__ = ("nome", "inquilino", "situacao", "transicoes", "oscilando")
+
+    def __init__(self, nome: str, inquilino: str | None = None):
+        self.nome = nome
+        self.inquilino = inquilino
+        self.situacao: str | None = None
+        self.transicoes: deque[float] = deque()
+        self.oscilando = False
+
+    def atualizar(self, situacao: str, agora: float) -> str | None:
+        """Registra a situação observada e devolve o alerta da mudança, se houver."""
+        anterior, self.situacao = self.situacao, situacao
+        while self.transicoes and agora - self.transicoes[0] > JANELA_OSCILACAO:
+            self.transicoes.popleft()
+        if anterior == situacao:
+            if self.oscilando and not self.transicoes:
+                self.oscilando = False
+                return f"🔵 **{self.nome}** estabilizou ({situacao})."
+            return None
+        if anterior is None:
+            # Primeira observação: só alerta se a aplicação já começou com problema
+            return None if situacao == ONLINE else ALERTAS[situacao].format(self.nome)
+        self.transicoes.append(agora)
+        if self.oscilando:
+            return None
+        if len(self.transicoes) >= LIMITE_OSCILACAO:
+            self.oscilando = True
+            return f"🟠 **{self.nome}** está oscilando ({len(self.transicoes)} mudanças recentes, agora {situacao})."
+        return ALERTAS[situacao].format(self.nome)
+
+
+def montar_resumo(alertas: list[str]) -> str:
+    """Junta os alertas de uma varredura em uma única mensagem dentro do limite do Discord."""
+    linhas = [f"**Monitoramento SquareCloud** · {len(alertas)} alteração(ões)"]
+    tamanho = len(linhas[0])
+    for indice, alerta in enumerate(alertas):
+        restantes = len(alertas) - indice
+        # Reserva espaço para a linha final "… e mais N"
+        if tamanho + len(alerta) + 1 > LIMITE_MENSAGEM - 20 and restantes > 1:
+            linhas.append(f"… e mais {restantes}")
+            break
+        linhas.append(alerta)
+        tamanho += len(alerta) + 1
+    return "\n".join(linhas)[:LIMITE_MENSAGEM]
 
 
 class Notificador(commands.Cog):
@@ -32,9 +119,22 @@ class Notificador(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.logger = logging.getLogger(__name__)
-        dados = _carregar_dados()
-        self.id_admin: int | None = dados.get("admin_id")
         self.task: asyncio.Task | None = None
+        self.historico = HistoricoMetricas(
+            max(1, int(HISTORICO_HORAS * 3600 / INTERVALO_VERIFICACAO)), INTERVALO_VERIFICACAO
+        )
+        self.agendador: AgendadorAdaptativo[str] = AgendadorAdaptativo()
+        self.estados: dict[str, EstadoApp] = {}
+        self._apps: dict[str, tuple[str | None, squarecloud.Application]] = {}
+        self._listado_em: dict[str | None, float] = {}
+        self._falhas_api: set[str | None] = set()
+        self._canais: dict[int, discord.DMChannel] = {}
+        # Alertas aguardando o próximo resumo e instante do último resumo de cada administrador
+        self._pendentes: dict[int, list[str]] = {}
+        self._resumido_em: dict[int, float] = {}
+        self._rodada = 0
+        monitor_memoria.contar("monitoramento_apps", lambda: len(self._apps))
+        monitor_memoria.contar("historico_apps", lambda: len(self.historico.apps))
 
     async def cog_load(self):
         self.task = asyncio.create_task(self._verificar())
@@ -42,34 +142,245 @@ class Notificador(commands.Cog):
     async def cog_unload(self):
         if self.task:
             self.task.cancel()
+        await self._enviar_resumos(forcar=True)
 
-    async def _notificar(self, mensagem: str) -> None:
-        if not self.id_admin:
+    async def _notificar(self, id_admin: int | None, mensagem: str) -> None:
+        if not id_admin:
             return
         try:
-            usuario = await self.bot.fetch_user(self.id_admin)
-            await usuario.send(mensagem)
+            canal = await self._canal(id_admin)
         except Exception as exc:
             self.logger.error("Falha ao notificar admin: %s", exc)
+            return
+        fila_mensagens.enviar(canal, mensagem)
+
+    async def _enviar_resumos(self, forcar: bool = False) -> None:
+        """Envia os alertas pendentes dos administradores cuja janela de resumo terminou."""
+        agora = self.agendador.relogio()
+        for id_admin, instante in list(self._resumido_em.items()):
+            if id_admin not in self._pendentes and agora - instante >= JANELA_DIGEST:
+                del self._resumido_em[id_admin]
+        for id_admin in list(self._pendentes):
+            if forcar or agora - self._resumido_em.get(id_admin, -math.inf) >= JANELA_DIGEST:
+                self._resumido_em[id_admin] = agora
+                await self._notificar(id_admin, montar_resumo(self._pendentes.pop(id_admin)))
+
+    async def _canal(self, id_admin: int) -> discord.DMChannel:
+        """Obtém a DM de cada administrador uma única vez e a reutiliza nas próximas mensagens."""
+        canal = self._canais.get(id_admin)
+        if canal is None:
+            usuario = self.bot.get_user(id_admin) or await self.bot.fetch_user(id_admin)
+            canal = self._canais[id_admin] = usuario.dm_channel or await usuario.create_dm()
+        return canal
+
+    async def _listar(
+        self, inquilino: str | None, cliente: squarecloud.Client, limite: asyncio.Semaphore, alertas: list[str]
+    ) -> list[squarecloud.Application] | None:
+        """Lista as aplicações de um inquilino, avisando só quando o acesso falha ou volta."""
+        self.agendador.gastar()
+        async with limite:
+            try:
+                apps = await asyncio.wait_for(cliente.all_apps(), TIMEOUT_STATUS)
+            except Exception as exc:
+                registro.incrementar("varredura_erros_total")
+                if inquilino not in self._falhas_api:
+                    self._falhas_api.add(inquilino)
+                    alertas.append(f"🔴 Erro ao acessar SquareCloud: {exc}")
+                return None
+        if inquilino in self._falhas_api:
+            self._falhas_api.discard(inquilino)
+            alertas.append("🟢 Acesso à SquareCloud restabelecido.")
+        return apps
+
+    async def _verificar_app(
+        self,
+        cliente: squarecloud.Client,
+        app: squarecloud.Application,
+        inquilino: str | None,
+        limite: asyncio.Semaphore,
+        cache: CacheStatus | None,
+    ) -> str | None:
+        """Consulta o status de uma aplicação e devolve o alerta da mudança de estado, se houver."""
+        async with limite:
+            try:
+                status = await asyncio.wait_for(obter_status(app, cliente), TIMEOUT_STATUS)
+            except Exception as exc:
+                self.logger.warning("Falha ao verificar %s: %r", app.name, exc)
+                status = None
+        if status is None:
+            situacao = SEM_RESPOSTA
+        else:
+            if cache:
+                cache.registrar(app.id, status)
+            self.historico.registrar(app.id, app.name, status, inquilino)
+            situacao = ONLINE if status.running else PARADA
+        estado = self.estados.get(app.id)
+        if estado is None:
+            estado = self.estados[app.id] = EstadoApp(app.name, inquilino)
+        estado.nome = app.name
+        anterior = estado.situacao
+        alerta = estado.atualizar(situacao, time.monotonic())
+        self.agendador.concluir(app.id, anterior is not None and anterior != situacao, estado.oscilando)
+        return alerta
+
+    async def _varrer(
+        self, inquilinos: list[tuple[str | None, squarecloud.Client]], cache: CacheStatus | None = None
+    ) -> None:
+        """Executa uma rodada do monitoramento e guarda os alertas para o resumo de cada administrador.
+
+        Lista as aplicações dos inquilinos cuja última listagem tem mais de
+        INTERVALO_VERIFICACAO segundos e consulta as aplicações que o agendador
+        liberou. As consultas são intercaladas entre os inquilinos, e a ordem
+        deles gira a cada rodada, para que um inquilino com muitas aplicações
+        não atrase o monitoramento dos demais.
+        """
+        inicio = time.perf_counter()
+        limite = asyncio.Semaphore(CONCORRENCIA_VERIFICACAO)
+        if inquilinos:
+            deslocamento = self._rodada % len(inquilinos)
+            inquilinos = inquilinos[deslocamento:] + inquilinos[:deslocamento]
+        self._rodada += 1
+        alertas: dict[str | None, list[str]] = {inquilino: [] for inquilino, _ in inquilinos}
+        agora = self.agendador.relogio()
+        a_listar = [
+            (inquilino, cliente)
+            for inquilino, cliente in inquilinos
+            if agora - self._listado_em.get(inquilino, -math.inf) >= INTERVALO_VERIFICACAO
+        ]
+        listas = await asyncio.gather(
+            *(self._listar(inquilino, cliente, limite, alertas[inquilino]) for inquilino, cliente in a_listar)
+        )
+        listados = {inquilino: apps for (inquilino, _), apps in zip(a_listar, listas) if apps is not None}
+        # Uma listagem que falhou também espera o intervalo antes de ser repetida
+        self._listado_em.update((inquilino, agora) for inquilino, _ in a_listar)
+        for inquilino, apps in listados.items():
+            for app in apps:
+                self._apps[app.id] = (inquilino, app)
+                self.agendador.adicionar(app.id)
+        self._esquecer(inquilinos, listados)
+        clientes = dict(inquilinos)
+        grupos: dict[str | None, list[tuple[str | None, squarecloud.Client, squarecloud.Application]]] = {}
+        for app_id in self.agendador.vencidos():
+            inquilino, app = self._apps[app_id]
+            grupos.setdefault(inquilino, []).append((inquilino, clientes[inquilino], app))
+        # O semáforo atende na ordem de chegada, então a ordem das tarefas define a vez de cada inquilino
+        ordem = [grupos[inquilino] for inquilino, _ in inquilinos if inquilino in grupos]
+        intercaladas = [item for rodada in zip_longest(*ordem) for item in rodada if item is not None]
+        resultados = await asyncio.gather(
+            *(self._verificar_app(cliente, app, inquilino, limite, cache) for inquilino, cliente, app in intercaladas)
+        )
+        for (inquilino, _, _), alerta in zip(intercaladas, resultados):
+            if alerta:
+                alertas[inquilino].append(alerta)
+        for inquilino, lista in alertas.items():
+            id_admin = configuracao.get("admin_id", inquilino=inquilino)
+            if lista and id_admin:
+                self._pendentes.setdefault(id_admin, []).extend(lista)
+        await self._enviar_resumos()
+        if not a_listar and not intercaladas:
+            return
+        duracao = time.perf_counter() - inicio
+        registro.observar("varredura_segundos", duracao)
+        self.logger.log(
+            logging.INFO if duracao >= LOG_RODADA_MINIMO else logging.DEBUG,
+            "Rodada com %d listagens e %d consultas de status concluída em %.2fs",
+            len(a_listar), len(intercaladas), duracao,
+        )
+
+    def _esquecer(
+        self,
+        inquilinos: list[tuple[str | None, squarecloud.Client]],
+        listados: dict[str | None, list[squarecloud.Application]],
+    ) -> None:
+        """Descarta o estado e o histórico de aplicações excluídas e de inquilinos removidos."""
+        ativos = {inquilino for inquilino, _ in inquilinos}
+        existentes = {app.id for apps in listados.values() for app in apps}
+        for app_id, (inquilino, _) in list(self._apps.items()):
+            if inquilino not in ativos or (inquilino in listados and app_id not in existentes):
+                del self._apps[app_id]
+                self.agendador.remover(app_id)
+                self.estados.pop(app_id, None)
+                self.historico.apps.pop(app_id, None)
+        self._falhas_api &= ativos
+        for inquilino in set(self._listado_em) - ativos:
+            del self._listado_em[inquilino]
+
+    def antecipar(self, app_id: str) -> None:
+        """Consulta a aplicação na próxima rodada, como após uma ação feita pelo painel."""
+        self.agendador.antecipar(app_id)
+
+    def _espera(self) -> float:
+        """Segundos até a próxima rodada: um item vencido, uma listagem ou o fim de uma janela de resumo."""
+        agora = self.agendador.relogio()
+        espera = self.agendador.espera()
+        prazos = [
+            INTERVALO_VERIFICACAO if espera is None else espera,
+            min(self._listado_em.values(), default=-math.inf) + INTERVALO_VERIFICACAO - agora,
+        ]
+        prazos.extend(
+            self._resumido_em.get(id_admin, -math.inf) + JANELA_DIGEST - agora for id_admin in self._pendentes
+        )
+        return max(ESPERA_MINIMA, min(prazos))
 
     async def _verificar(self):
         await self.bot.wait_until_ready()
         while not self.bot.is_closed():
             gestao: commands.Cog | None = self.bot.get_cog("Gestao")
-            if gestao and getattr(gestao, "cliente", None):
-                cliente: squarecloud.Client = gestao.cliente  # type: ignore
-                try:
-                    apps = await cliente.all_apps()
-                    for app in apps:
-                        try:
-                            status = await cliente.app_status(app.id)
-                            if not status.running:
-                                await self._notificar(f"Aplicação {app.name} parou de funcionar.")
-                        except Exception as exc:
-                            await self._notificar(f"Erro ao verificar {app.name}: {exc}")
-                except Exception as exc:
-                    await self._notificar(f"Erro ao acessar SquareCloud: {exc}")
-            await asyncio.sleep(300)
+            try:
+                if gestao:
+                    inquilinos = [
+                        (inquilino, cliente)
+                        for inquilino in configuracao.inquilinos()
+                        if (cliente := gestao.cliente_do_inquilino(inquilino, reter=False))  # type: ignore
+                    ]
+                    await self._varrer(inquilinos, getattr(gestao, "cache_status", None))
+                espera = self._espera()
+            except Exception:
+                # Uma falha inesperada não pode encerrar o monitoramento
+                self.logger.exception("Erro na rodada do monitoramento")
+                registro.incrementar("varredura_erros_total")
+                espera = ESPERA_APOS_ERRO
+            await asyncio.sleep(espera)
+
+    @app_commands.command(name="metricas", description="Mostra o histórico de uso de uma aplicação")
+    @app_commands.describe(aplicacao="Nome da aplicação")
+    async def metricas(self, interaction: discord.Interaction, aplicacao: str):
+        inquilino = configuracao.inquilino(interaction.guild_id, interaction.user.id)
+        historico = self.historico.buscar(aplicacao, inquilino)
+        if historico is None or not historico.tempos.quantidade:
+            await interaction.response.send_message("Ainda não há métricas dessa aplicação.", ephemeral=True)
+            return
+        embed = discord.Embed(
+            title=historico.nome,
+            description="Histórico de uso coletado pelo monitoramento",
+            colour=discord.Color.from_rgb(255, 255, 255),
+        )
+        for campo, rotulo, unidade in SERIES_METRICAS:
+            valores = historico.series[campo].valores()
+            resumo = estatisticas(valores)
+            if resumo is None:
+                continue
+            minimo, maximo, p95 = resumo
+            embed.add_field(
+                name=rotulo,
+                value=(
+                    f"mín **{minimo:.1f}{unidade}** · máx **{maximo:.1f}{unidade}** · p95 **{p95:.1f}{unidade}**\n"
+                    f"`{sparkline(valores)}`"
+                ),
+                inline=False,
+            )
+        tempos = historico.tempos.valores()
+        horas = (tempos[-1] - tempos[0]) / 3600
+        embed.set_footer(text=f"{len(tempos)} amostras nas últimas {horas:.1f} h")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @metricas.autocomplete("aplicacao")
+    async def _autocompletar_aplicacao(self, interaction: discord.Interaction, atual: str):
+        atual = atual.lower()
+        inquilino = configuracao.inquilino(interaction.guild_id, interaction.user.id)
+        nomes = sorted(h.nome for h in self.historico.do_inquilino(inquilino) if atual in h.nome.lower())
+        return [app_commands.Choice(name=nome, value=nome) for nome in nomes[:25]]
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Notificador(bot))
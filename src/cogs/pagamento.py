@@ -3,31 +3,91 @@
 from __future__ import annotations
 
 import asyncio
-import io
 import logging
+import math
 import os
-import json
+import time
+import uuid
+from datetime import datetime, timezone
 
-import aiohttp
 import discord
 from discord import app_commands
 from discord.ext import commands
-import mercadopago
 from typing import TYPE_CHECKING
+from yarl import URL
 
 if TYPE_CHECKING:
+    from servicos.mercado_pago import ClienteMercadoPago
+    from servicos.webhook_mp import ReceptorWebhook
+
     from .gestao import Gestao
 
-import squarecloud
+from servicos.artefatos import CacheArtefatos
+from servicos.clientes import RegistroClientes
+from servicos.configuracao import configuracao
+from servicos.mensagens import enviar_followup, fila_mensagens
+from servicos.metricas import registro
+from servicos.recursos import monitor_memoria
+from servicos.tarefas import BAIXANDO, CONCLUIDO, ENVIANDO, FALHOU, PENDENTE, ArmazemTarefas, Deploy
+
+from .gestao import enviar_zip
+
+# Intervalo (s) entre rodadas de conciliação, pagamentos por página e páginas lidas em cada
+# busca, e folga (s) mantida atrás do horário atual, para diferenças de relógio e atrasos na
+# indexação do Mercado Pago
+INTERVALO_CONCILIACAO = 10
+PAGINA_BUSCA = 100
+PAGINAS_POR_BUSCA = 5
+FOLGA_BUSCA = 300
+# Tempo (s) após o qual um checkout sem pagamento é descartado
+EXPIRACAO_PAGAMENTO = int(os.getenv("MP_EXPIRACAO", "3600"))
+# Deploys pagos executados ao mesmo tempo e espera (s) para tentar de novo o
+# deploy de um servidor que ainda não tem o deploy configurado
+DEPLOY_TRABALHADORES = int(os.getenv("DEPLOY_TRABALHADORES", "2"))
+ESPERA_SEM_CONFIGURACAO = 300
+# Tentativas de um deploy que falha antes do envio e espera (s) antes da segunda,
+# dobrando a cada falha até o teto
+DEPLOY_TENTATIVAS = int(os.getenv("DEPLOY_TENTATIVAS", "10"))
+ESPERA_NOVA_TENTATIVA = 30
+ESPERA_MAXIMA_TENTATIVA = 900
+
+# Webhook opcional: porta local do receptor, URL pública e segredo de assinatura padrão.
+# Cada servidor pode ter o próprio segredo em ``mercadopago_webhook_segredo``.
+WEBHOOK_PORTA = os.getenv("MP_WEBHOOK_PORTA")
+WEBHOOK_HOST = os.getenv("MP_WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_URL = os.getenv("MP_WEBHOOK_URL")
+WEBHOOK_SEGREDO = os.getenv("MP_WEBHOOK_SEGREDO")
+
+
+def _criar_cliente_mp(token: str) -> ClienteMercadoPago:
+    # O SDK do Mercado Pago só é importado quando algum servidor usa pagamentos
+    from servicos.mercado_pago import ClienteMercadoPago
 
+    return ClienteMercadoPago(token)
 
-def _carregar_config() -> dict:
-    raiz = os.path.dirname(os.path.dirname(__file__))
-    caminho = os.path.join(raiz, "config.json")
-    if os.path.isfile(caminho):
-        with open(caminho, "r", encoding="utf-8") as arquivo:
-            return json.load(arquivo)
-    return {}
+
+def _intervalo_consulta(idade: float) -> float:
+    """Busca a cada rodada enquanto o checkout mais novo é recente e espaça quando todos são antigos."""
+    if idade < 300:
+        return INTERVALO_CONCILIACAO
+    if idade < 1800:
+        return 30
+    return 120
+
+
+class PagamentoPendente:
+    """Checkout aguardando confirmação do Mercado Pago."""
+
+    __slots__ = ("pref_id", "referencia", "usuario_id", "inquilino", "criado_em")
+
+    def __init__(
+        self, pref_id: str, referencia: str, usuario_id: int, inquilino: str | None = None, idade: float = 0.0
+    ):
+        self.pref_id = pref_id
+        self.referencia = referencia
+        self.usuario_id = usuario_id
+        self.inquilino = inquilino
+        self.criado_em = time.monotonic() - idade
 
 
 class Pagamentos(commands.Cog):
@@ -36,72 +96,353 @@ class Pagamentos(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.logger = logging.getLogger(__name__)
-        dados = _carregar_config()
-        token = dados.get("mercadopago_token")
-        self.zip_url = dados.get("zip_url")
-        self.preco = float(dados.get("preco", 0))
-        self.sdk = mercadopago.SDK(token) if token else None
-
-    def atualizar_config(self, token: str, url_zip: str, preco: float) -> None:
-        """Atualiza o cliente, o link de deploy e o preço."""
-        self.sdk = mercadopago.SDK(token)
-        self.zip_url = url_zip
-        self.preco = preco
-
-    async def _verificar_pagamento(self, pref_id: str, usuario: discord.User):
-        """Verifica periodicamente se o pagamento foi aprovado."""
-        if not self.sdk:
+        self.clientes_mp: RegistroClientes[ClienteMercadoPago] = RegistroClientes(
+            "mercadopago", _criar_cliente_mp, lambda cliente: cliente.fechar()
+        )
+        self.artefatos = CacheArtefatos()
+        self.pendentes: dict[str, PagamentoPendente] = {}
+        self._referencias: dict[str, str] = {}
+        self._proxima_busca: dict[str | None, float] = {}
+        # Início da próxima busca de cada inquilino, avançado a cada rodada
+        self._cursores: dict[str | None, datetime] = {}
+        self.armazem = ArmazemTarefas()
+        self._fila_deploys: asyncio.Queue[str] = asyncio.Queue()
+        self._trabalhadores: list[asyncio.Task] = []
+        # Deploys aguardando uma nova tentativa; os que restarem ao descarregar o cog
+        # continuam pendentes no banco e são retomados no próximo início
+        self._reagendados: dict[str, asyncio.TimerHandle] = {}
+        self.task: asyncio.Task | None = None
+        self.webhook: ReceptorWebhook | None = None
+        monitor_memoria.contar("pagamentos_pendentes", lambda: len(self.pendentes))
+
+    async def cog_load(self):
+        await self.armazem.abrir()
+        await self._restaurar()
+        self.iniciar_trabalhadores()
+        self.task = asyncio.create_task(self._conciliar())
+        if WEBHOOK_PORTA:
+            from servicos.webhook_mp import ReceptorWebhook
+
+            if not WEBHOOK_SEGREDO:
+                self.logger.warning("MP_WEBHOOK_SEGREDO não definido; notificações não terão a assinatura validada.")
+            self.webhook = ReceptorWebhook(WEBHOOK_SEGREDO, self._processar_notificacao, self._segredo_webhook)
+            await self.webhook.iniciar(WEBHOOK_HOST, int(WEBHOOK_PORTA))
+
+    async def cog_unload(self):
+        if self.task:
+            self.task.cancel()
+        if self.webhook:
+            await self.webhook.parar()
+        for reagendado in self._reagendados.values():
+            reagendado.cancel()
+        self._reagendados.clear()
+        # Deploys interrompidos aqui são retomados ou marcados como incertos no próximo início
+        for trabalhador in self._trabalhadores:
+            trabalhador.cancel()
+        await asyncio.gather(*self._trabalhadores, return_exceptions=True)
+        await self.armazem.fechar()
+        self.clientes_mp.fechar_todos()
+
+    async def _restaurar(self):
+        """Recarrega os checkouts pendentes e enfileira os deploys interrompidos."""
+        pendentes, retomar, incertos = await self.armazem.restaurar()
+        agora = time.time()
+        for pref_id, referencia, usuario_id, inquilino, criado_em in pendentes:
+            self.pendentes[pref_id] = PagamentoPendente(
+                pref_id, referencia, usuario_id, inquilino, idade=max(0.0, agora - criado_em)
+            )
+            self._referencias[referencia] = pref_id
+        for deploy in retomar:
+            self._fila_deploys.put_nowait(deploy.pref_id)
+        for deploy in incertos:
+            # O upload pode ter chegado à Square Cloud; repetir arriscaria um deploy duplicado
+            self.logger.warning(
+                "Deploy do checkout %s foi interrompido durante o envio e não será repetido (usuário %s).",
+                deploy.pref_id, deploy.usuario_id,
+            )
+        if pendentes or retomar or incertos:
+            self.logger.info(
+                "Restaurados %d checkouts pendentes e %d deploys; %d deploys incertos.",
+                len(pendentes), len(retomar), len(incertos),
+            )
+
+    def iniciar_trabalhadores(self, quantidade: int = DEPLOY_TRABALHADORES):
+        self._trabalhadores = [asyncio.create_task(self._trabalhar()) for _ in range(quantidade)]
+
+    def _mp(self, inquilino: str | None) -> ClienteMercadoPago | None:
+        """Cliente do Mercado Pago de uma seção da configuração, criado no primeiro uso."""
+        return self.clientes_mp.obter(inquilino, configuracao.get("mercadopago_token", inquilino=inquilino))
+
+    def _segredo_webhook(self, inquilino: str | None) -> str | None:
+        return configuracao.get("mercadopago_webhook_segredo", inquilino=inquilino) or WEBHOOK_SEGREDO
+
+    async def _conciliar(self):
+        """Executa uma rodada de conciliação a cada INTERVALO_CONCILIACAO segundos."""
+        while True:
+            await asyncio.sleep(INTERVALO_CONCILIACAO)
+            if self.pendentes:
+                await self._rodada_conciliacao()
+
+    async def _rodada_conciliacao(self):
+        """Descarta checkouts expirados e faz uma busca para cada inquilino que esteja na hora.
+
+        O custo de uma rodada depende do número de inquilinos com checkouts
+        pendentes e das vendas recentes de cada um, com no máximo
+        PAGINAS_POR_BUSCA páginas por inquilino, e não do número de checkouts
+        nem da idade do mais antigo.
+        """
+        agora = time.monotonic()
+        expirados = []
+        for pendente in list(self.pendentes.values()):
+            if agora - pendente.criado_em > EXPIRACAO_PAGAMENTO:
+                del self.pendentes[pendente.pref_id]
+                self._referencias.pop(pendente.referencia, None)
+                expirados.append(self.armazem.remover_pendente(pendente.pref_id))
+                self.logger.info("Checkout %s expirou sem pagamento.", pendente.pref_id)
+        if expirados:
+            await asyncio.gather(*expirados, return_exceptions=True)
+        por_inquilino: dict[str | None, list[PagamentoPendente]] = {}
+        for pendente in self.pendentes.values():
+            por_inquilino.setdefault(pendente.inquilino, []).append(pendente)
+        for inquilino in list(self._proxima_busca):
+            if inquilino not in por_inquilino:
+                del self._proxima_busca[inquilino]
+                self._cursores.pop(inquilino, None)
+        vencidos = [
+            (inquilino, pendentes) for inquilino, pendentes in por_inquilino.items()
+            if self._proxima_busca.get(inquilino, -math.inf) <= agora
+        ]
+        if vencidos:
+            # Uma falha inesperada (inclusive o cancelamento de uma chamada) não interrompe a conciliação
+            resultados = await asyncio.gather(
+                *(self._conciliar_inquilino(inquilino, pendentes) for inquilino, pendentes in vencidos),
+                return_exceptions=True,
+            )
+            for (inquilino, _), resultado in zip(vencidos, resultados):
+                if isinstance(resultado, BaseException):
+                    self.logger.error("Erro ao conciliar os pagamentos de %s: %r", inquilino or "global", resultado)
+
+    async def _conciliar_inquilino(self, inquilino: str | None, pendentes: list[PagamentoPendente]):
+        """Busca os pagamentos aprovados desde o cursor do inquilino e confirma os que são do bot.
+
+        Sem cursor, a busca começa no checkout mais antigo, menos a folga.
+        """
+        agora = time.monotonic()
+        idades = [agora - pendente.criado_em for pendente in pendentes]
+        self._proxima_busca[inquilino] = agora + _intervalo_consulta(min(idades))
+        mp = self._mp(inquilino)
+        if mp is None:
             return
-        for _ in range(30):
-            await asyncio.sleep(10)
-            busca = self.sdk.payment().search({"preference_id": pref_id})
-            resultados = busca["response"].get("results")
-            if resultados:
-                pagamento = resultados[0]["collection"]
-                if pagamento.get("status") == "approved":
-                    await self._realizar_deploy(usuario)
-                    return
-
-    async def _realizar_deploy(self, usuario: discord.User):
-        """Realiza o deploy da aplicação configurada."""
+        inicio = self._cursores.get(inquilino)
+        if inicio is None:
+            inicio = datetime.fromtimestamp(time.time() - max(idades) - FOLGA_BUSCA, timezone.utc)
+        try:
+            referencias, self._cursores[inquilino] = await self._buscar_aprovados(mp, inicio)
+        except Exception as exc:
+            self.logger.error("Erro ao consultar os pagamentos de %s: %s", inquilino or "global", exc)
+            return
+        for referencia in referencias:
+            pref_id = self._referencias.get(referencia)
+            pendente = pref_id and self.pendentes.get(pref_id)
+            if pendente and pendente.inquilino == inquilino:
+                await self._confirmar(pendente.pref_id)
+
+    async def _buscar_aprovados(self, mp: ClienteMercadoPago, inicio: datetime) -> tuple[set[str], datetime]:
+        """``external_reference`` dos pagamentos aprovados atualizados a partir de ``inicio`` e o próximo início.
+
+        A aprovação atualiza ``date_last_updated``, então um pagamento aprovado
+        depois do cursor sempre aparece, mesmo que tenha sido criado antes. São
+        lidas no máximo PAGINAS_POR_BUSCA páginas: o restante fica para a
+        próxima rodada, a partir do último pagamento lido. Lidas todas, o
+        cursor fica FOLGA_BUSCA segundos atrás do horário atual.
+        """
+        filtros = {
+            "status": "approved",
+            "range": "date_last_updated",
+            "begin_date": inicio.isoformat(timespec="milliseconds"),
+            "end_date": "NOW",
+            "sort": "date_last_updated",
+            "criteria": "asc",
+            "limit": PAGINA_BUSCA,
+            "offset": 0,
+        }
+        referencias: set[str] = set()
+        ultimo = inicio
+        for _ in range(PAGINAS_POR_BUSCA):
+            resposta = (await mp.buscar_pagamentos(filtros))["response"]
+            resultados = resposta.get("results") or []
+            for pagamento in resultados:
+                if pagamento.get("status") == "approved" and pagamento.get("external_reference"):
+                    referencias.add(pagamento["external_reference"])
+                if pagamento.get("date_last_updated"):
+                    ultimo = max(ultimo, datetime.fromisoformat(pagamento["date_last_updated"]))
+            filtros["offset"] += len(resultados)
+            total = (resposta.get("paging") or {}).get("total", 0)
+            if len(resultados) < PAGINA_BUSCA or filtros["offset"] >= total:
+                return referencias, max(inicio, datetime.fromtimestamp(time.time() - FOLGA_BUSCA, timezone.utc))
+        return referencias, ultimo
+
+    async def _confirmar(self, pref_id: str) -> None:
+        """Troca o checkout por um deploy gravado e o enfileira uma única vez."""
+        pendente = self.pendentes.pop(pref_id, None)
+        if pendente is None:
+            return
+        self._referencias.pop(pendente.referencia, None)
+        try:
+            novo = await self.armazem.confirmar(pref_id, pendente.usuario_id, pendente.inquilino)
+        except Exception as exc:
+            # Devolve o checkout para que a próxima consulta tente gravar de novo
+            self.logger.error("Erro ao registrar o deploy do checkout %s: %s", pref_id, exc)
+            self.pendentes[pref_id] = pendente
+            self._referencias[pendente.referencia] = pref_id
+            return
+        if novo:
+            self._fila_deploys.put_nowait(pref_id)
+
+    async def _trabalhar(self):
+        """Executa os deploys da fila, um de cada vez por trabalhador."""
+        while True:
+            pref_id = await self._fila_deploys.get()
+            try:
+                deploy = await self.armazem.reivindicar(pref_id)
+                if deploy is not None:
+                    await self._realizar_deploy(deploy)
+            except Exception as exc:
+                self.logger.error("Erro no deploy do checkout %s: %s", pref_id, exc)
+            finally:
+                self._fila_deploys.task_done()
+
+    def _reagendar(self, pref_id: str, espera: float) -> None:
+        """Devolve o deploy à fila depois de ``espera`` segundos."""
+        anterior = self._reagendados.pop(pref_id, None)
+        if anterior:
+            anterior.cancel()
+        self._reagendados[pref_id] = asyncio.get_running_loop().call_later(espera, self._devolver, pref_id)
+
+    def _devolver(self, pref_id: str) -> None:
+        del self._reagendados[pref_id]
+        self._fila_deploys.put_nowait(pref_id)
+
+    async def _processar_notificacao(self, pagamento_id: str, inquilino: str | None = None) -> bool:
+        """Confirma o checkout de um pagamento notificado pelo webhook.
+
+        Retorna ``True`` quando não há mais nada a fazer com o pagamento.
+        """
+        mp = self._mp(inquilino)
+        if mp is None:
+            return False
+        resposta = await mp.obter_pagamento(pagamento_id)
+        pagamento = resposta["response"]
+        pref_id = self._referencias.get(pagamento.get("external_reference"))
+        # Só confirma checkouts criados no mesmo servidor da conta consultada
+        if pref_id is None or self.pendentes[pref_id].inquilino != inquilino:
+            return True
+        if pagamento.get("status") == "approved":
+            await self._confirmar(pref_id)
+            return True
+        return False
+
+    async def _usuario(self, usuario_id: int) -> discord.abc.User:
+        return self.bot.get_user(usuario_id) or await self.bot.fetch_user(usuario_id)
+
+    async def _realizar_deploy(self, deploy: Deploy):
+        """Realiza o deploy da aplicação configurada para o servidor do checkout.
+
+        O estado passa a ``enviando`` antes do upload, para que um reinício no
+        meio dele não leve a um segundo deploy; só uma falha nesse estado é
+        definitiva. Sem token ou ZIP configurado, ou com uma falha antes do
+        envio, o deploy, já pago, volta a ``pendente`` e é tentado de novo mais
+        tarde, com espera crescente, até DEPLOY_TENTATIVAS tentativas.
+        """
         gestao: Gestao | None = self.bot.get_cog("Gestao")  # type: ignore
-        if not gestao or not gestao.cliente or not self.zip_url:
+        cliente = gestao.cliente_do_inquilino(deploy.inquilino) if gestao else None
+        zip_url = configuracao.get("zip_url", inquilino=deploy.inquilino)
+        if not cliente or not zip_url:
+            self.logger.warning(
+                "Deploy do checkout %s aguardando configuração; nova tentativa em %ds.",
+                deploy.pref_id, ESPERA_SEM_CONFIGURACAO,
+            )
+            await self.armazem.devolver(deploy.pref_id, "deploy não configurado", contar=False)
+            self._reagendar(deploy.pref_id, ESPERA_SEM_CONFIGURACAO)
             return
-        async with aiohttp.ClientSession() as sessao:
-            async with sessao.get(self.zip_url) as resp:
-                dados = await resp.read()
-        arquivo = squarecloud.File(io.BytesIO(dados), filename="app.zip")
+        usuario: discord.abc.User | None = None
+        estado = BAIXANDO
         try:
-            await gestao.cliente.upload_app(arquivo)
-            await usuario.send("Pagamento confirmado! Deploy iniciado.")
+            try:
+                usuario = await self._usuario(deploy.usuario_id)
+            except Exception as exc:
+                # Sem o usuário o deploy continua; só não há a quem avisar
+                self.logger.warning(
+                    "Usuário %s do checkout %s não encontrado: %s", deploy.usuario_id, deploy.pref_id, exc
+                )
+            async with self.artefatos.abrir(self.bot.sessao, zip_url) as zip_app:
+                estado = ENVIANDO
+                await self.armazem.marcar(deploy.pref_id, ENVIANDO)
+                await enviar_zip(cliente, zip_app)
         except Exception as exc:
-            await usuario.send(f"Erro ao fazer deploy: {exc}")
+            if estado != ENVIANDO and deploy.tentativas < DEPLOY_TENTATIVAS:
+                # Nada chegou à Square Cloud: a falha (rede, download) pode ser passageira
+                espera = min(ESPERA_MAXIMA_TENTATIVA, ESPERA_NOVA_TENTATIVA * 2 ** (deploy.tentativas - 1))
+                self.logger.warning(
+                    "Deploy do checkout %s falhou na tentativa %d (%s: %s); nova tentativa em %ds.",
+                    deploy.pref_id, deploy.tentativas, estado, exc, espera,
+                )
+                await self.armazem.devolver(deploy.pref_id, f"{estado}: {exc}")
+                self._reagendar(deploy.pref_id, espera)
+                return
+            await self.armazem.marcar(deploy.pref_id, FALHOU, f"{estado}: {exc}")
+            if usuario:
+                fila_mensagens.enviar(usuario, f"Erro ao fazer deploy: {exc}")
+            return
+        await self.armazem.marcar(
+            deploy.pref_id, CONCLUIDO, None if usuario else "usuário não encontrado para o aviso"
+        )
+        if usuario:
+            fila_mensagens.enviar(usuario, "Pagamento confirmado! Deploy iniciado.")
 
     @app_commands.command(name="pagar", description="Realiza pagamento para deploy")
     async def pagar(self, interaction: discord.Interaction):
-        if not self.sdk or not self.zip_url:
-            await interaction.response.send_message("Pagamento não configurado.", ephemeral=True)
-            return
-        dados = {
-            "items": [
-                {
-                    "title": "Deploy de Aplicação",
-                    "quantity": 1,
-                    "currency_id": "BRL",
-                    "unit_price": self.preco,
-                }
-            ]
-        }
-        resposta = self.sdk.preference().create(dados)
-        init_point = resposta["response"].get("init_point")
-        pref_id = resposta["response"].get("id")
-        if not init_point or not pref_id:
-            await interaction.response.send_message("Erro ao gerar link de pagamento.", ephemeral=True)
-            return
-        await interaction.response.send_message(f"Clique para pagar: {init_point}", ephemeral=True)
-        asyncio.create_task(self._verificar_pagamento(pref_id, interaction.user))
+        async with registro.medir("interacao", handler="pagar"):
+            inquilino = configuracao.inquilino(interaction.guild_id, interaction.user.id)
+            mp = self._mp(inquilino)
+            if not mp or not configuracao.get("zip_url", inquilino=inquilino):
+                await interaction.response.send_message("Pagamento não configurado.", ephemeral=True)
+                return
+            dados = {
+                "items": [
+                    {
+                        "title": "Deploy de Aplicação",
+                        "quantity": 1,
+                        "currency_id": "BRL",
+                        "unit_price": float(configuracao.get("preco", 0, inquilino=inquilino)),
+                    }
+                ],
+                "external_reference": uuid.uuid4().hex,
+            }
+            if WEBHOOK_URL:
+                # O receptor identifica o servidor do pagamento pelo parâmetro da URL
+                url = URL(WEBHOOK_URL)
+                dados["notification_url"] = str(url.update_query(inquilino=inquilino) if inquilino else url)
+            await interaction.response.defer(ephemeral=True)
+            try:
+                resposta = await mp.criar_preferencia(dados)
+            except Exception as exc:
+                await enviar_followup(interaction, f"Erro ao gerar link de pagamento: {exc}")
+                return
+            init_point = resposta["response"].get("init_point")
+            pref_id = resposta["response"].get("id")
+            if not init_point or not pref_id:
+                await enviar_followup(interaction, "Erro ao gerar link de pagamento.")
+                return
+            referencia = dados["external_reference"]
+            try:
+                await self.armazem.adicionar_pendente(pref_id, referencia, interaction.user.id, inquilino, time.time())
+            except Exception as exc:
+                self.logger.error("Erro ao gravar o checkout %s: %s", pref_id, exc)
+            self.pendentes[pref_id] = PagamentoPendente(pref_id, referencia, interaction.user.id, inquilino)
+            self._referencias[referencia] = pref_id
+            await enviar_followup(interaction, f"Clique para pagar: {init_point}")
 
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Pagamentos(bot))
-
@@ -0,0 +1,174 @@
+"""Agendamento adaptativo das consultas periódicas, com intervalo próprio por item."""
+
+from __future__ import annotations
+
+import heapq
+import math
+import os
+import random
+import time
+from itertools import count
+from typing import Callable, Generic, Hashable, TypeVar
+
+from .mensagens import Balde
+
+# Intervalo (s) logo após uma mudança e teto alcançado pelas aplicações estáveis
+INTERVALO_MINIMO = float(os.getenv("NOTIFICADOR_INTERVALO_MINIMO", "30"))
+INTERVALO_MAXIMO = float(os.getenv("NOTIFICADOR_INTERVALO_MAXIMO", "600"))
+# Multiplicador do intervalo a cada consulta sem mudança e variação aleatória aplicada
+FATOR_RECUO = float(os.getenv("NOTIFICADOR_FATOR_RECUO", "1.5"))
+VARIACAO = float(os.getenv("NOTIFICADOR_VARIACAO", "0.2"))
+# Meia-vida (s) da memória de mudanças que reduz o teto das aplicações instáveis
+MEIA_VIDA_MUDANCAS = float(os.getenv("NOTIFICADOR_MEIA_VIDA_MUDANCAS", "21600"))
+# Consultas à API por minuto somando todos os inquilinos
+ORCAMENTO_POR_MINUTO = float(os.getenv("NOTIFICADOR_ORCAMENTO", "120"))
+
+K = TypeVar("K", bound=Hashable)
+
+
+class _Item:
+    __slots__ = ("intervalo", "proxima", "mudancas", "marcado", "antecipado")
+
+    def __init__(self, intervalo: float, proxima: float, agora: float):
+        self.intervalo = intervalo
+        self.proxima = proxima
+        self.mudancas = 0.0
+        self.marcado = agora
+        # Antecipação pedida enquanto o item estava em consulta, respeitada por ``concluir``
+        self.antecipado = False
+
+
+class AgendadorAdaptativo(Generic[K]):
+    """Decide quando consultar cada item dentro de um orçamento global de consultas.
+
+    Um item que mudou volta ao intervalo mínimo; a cada consulta sem mudança o
+    intervalo cresce por ``fator`` até um teto. O teto é ``maximo`` dividido
+    por 1 + as mudanças recentes do item (contagem com meia-vida de
+    ``meia_vida`` segundos), então itens que mudam com frequência continuam
+    sendo consultados mais vezes mesmo entre uma mudança e outra.
+
+    Cada agendamento varia em ±``variacao`` para que os itens não vençam todos
+    juntos, e os vencidos são liberados na ordem de vencimento enquanto houver
+    fichas no orçamento.
+    """
+
+    def __init__(
+        self,
+        minimo: float = INTERVALO_MINIMO,
+        maximo: float = INTERVALO_MAXIMO,
+        fator: float = FATOR_RECUO,
+        orcamento_por_minuto: float = ORCAMENTO_POR_MINUTO,
+        variacao: float = VARIACAO,
+        meia_vida: float = MEIA_VIDA_MUDANCAS,
+        relogio: Callable[[], float] = time.monotonic,
+    ):
+        self.minimo = minimo
+        self.maximo = max(minimo, maximo)
+        self.fator = fator
+        self.variacao = variacao
+        self.meia_vida = meia_vida
+        self.relogio = relogio
+        # Permite rajadas de até 10 s de orçamento
+        self.orcamento = Balde(orcamento_por_minuto / 60, max(1.0, orcamento_por_minuto / 6))
+        self.orcamento.atualizado = relogio()
+        self.consultas = 0
+        self._itens: dict[K, _Item] = {}
+        self._fila: list[tuple[float, int, K]] = []
+        self._sequencia = count()
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    def __contains__(self, chave: K) -> bool:
+        return chave in self._itens
+
+    def intervalo(self, chave: K) -> float | None:
+        item = self._itens.get(chave)
+        return item.intervalo if item else None
+
+    def _agendar(self, chave: K, item: _Item, atraso: float) -> None:
+        item.proxima = self.relogio() + atraso
+        heapq.heappush(self._fila, (item.proxima, next(self._sequencia), chave))
+
+    def adicionar(self, chave: K, atraso: float = 0.0) -> None:
+        """Passa a agendar um item novo, vencendo após ``atraso`` segundos."""
+        if chave not in self._itens:
+            item = self._itens[chave] = _Item(self.minimo, math.inf, self.relogio())
+            self._agendar(chave, item, atraso)
+
+    def remover(self, chave: K) -> None:
+        self._itens.pop(chave, None)
+
+    def antecipar(self, chave: K) -> None:
+        """Volta o item ao intervalo mínimo e o consulta na próxima rodada.
+
+        Se o item estiver em consulta, a nova consulta é feita logo após ``concluir``.
+        """
+        item = self._itens.get(chave)
+        if item is None:
+            return
+        item.intervalo = self.minimo
+        if item.proxima == math.inf:
+            item.antecipado = True
+        else:
+            self._agendar(chave, item, 0.0)
+
+    def gastar(self, quantidade: int = 1) -> None:
+        """Desconta do orçamento consultas feitas fora do agendamento, como listagens."""
+        self.orcamento.espera(self.relogio())
+        self.orcamento.fichas -= quantidade
+        self.consultas += quantidade
+
+    def vencidos(self) -> list[K]:
+        """Retira os itens vencidos que cabem no orçamento; cada um deve voltar por ``concluir``."""
+        agora = self.relogio()
+        liberados: list[K] = []
+        while self._fila and self._fila[0][0] <= agora:
+            proxima, _, chave = self._fila[0]
+            item = self._itens.get(chave)
+            if item is None or item.proxima != proxima:
+                # Entrada de um item removido ou reagendado depois
+                heapq.heappop(self._fila)
+                continue
+            if self.orcamento.espera(agora) > 0:
+                break
+            heapq.heappop(self._fila)
+            self.orcamento.consumir()
+            self.consultas += 1
+            item.proxima = math.inf
+            liberados.append(chave)
+        return liberados
+
+    def concluir(self, chave: K, mudou: bool, instavel: bool = False) -> None:
+        """Reagenda o item conforme o resultado da consulta."""
+        item = self._itens.get(chave)
+        if item is None:
+            return
+        agora = self.relogio()
+        item.mudancas *= 0.5 ** ((agora - item.marcado) / self.meia_vida)
+        item.marcado = agora
+        if mudou:
+            item.mudancas += 1
+        if item.antecipado:
+            # A consulta que terminou começou antes da ação que pediu a antecipação
+            item.antecipado = False
+            item.intervalo = self.minimo
+            self._agendar(chave, item, 0.0)
+            return
+        if mudou or instavel:
+            item.intervalo = self.minimo
+        else:
+            teto = max(self.minimo, self.maximo / (1 + item.mudancas))
+            item.intervalo = min(teto, item.intervalo * self.fator)
+        self._agendar(chave, item, item.intervalo * random.uniform(1 - self.variacao, 1 + self.variacao))
+
+    def espera(self) -> float | None:
+        """Segundos até o próximo item vencer e haver orçamento; ``None`` sem itens agendados."""
+        while self._fila:
+            proxima, _, chave = self._fila[0]
+            item = self._itens.get(chave)
+            if item is not None and item.proxima == proxima:
+                agora = self.relogio()
+                return max(proxima - agora, self.orcamento.espera(agora), 0.0)
+            heapq.heappop(self._fila)
+        return None
@@ -0,0 +1,213 @@
+"""Cache local, endereçado por conteúdo, dos ZIPs de deploy."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, BinaryIO
+
+import aiohttp
+
+from .downloads import TAMANHO_BLOCO, TAMANHO_MAXIMO_DEPLOY, ErroDownload
+from .recursos import Medicao, formatar_bytes
+
+DIRETORIO_ARTEFATOS = os.getenv(
+    "ARTEFATOS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "artefatos"),
+)
+LIMITE_ARTEFATOS = int(os.getenv("ARTEFATOS_LIMITE_MB", "500")) * 1024 * 1024
+# Janela (s) em que um artefato recém-validado é usado sem consultar a origem; o
+# SHA-256 do arquivo é conferido a cada uso, dentro ou fora da janela
+JANELA_REVALIDACAO = float(os.getenv("ARTEFATOS_REVALIDAR", "60"))
+
+
+def _sha256_arquivo(arquivo: BinaryIO) -> str:
+    """SHA-256 de um arquivo aberto, que volta ao início depois da leitura."""
+    digest = hashlib.sha256()
+    arquivo.seek(0)
+    while bloco := arquivo.read(TAMANHO_BLOCO * 16):
+        digest.update(bloco)
+    arquivo.seek(0)
+    return digest.hexdigest()
+
+
+class CacheArtefatos:
+    """Guarda versões de artefatos por hash SHA-256 com revalidação condicional e LRU.
+
+    Cada URL aponta para o hash da última versão baixada; a origem é consultada com
+    ``If-None-Match``/``If-Modified-Since`` e só envia o arquivo quando ele mudou.
+    Falhas de rede e de HTTP são levantadas como ``ErroDownload``.
+    """
+
+    def __init__(self, diretorio: str = DIRETORIO_ARTEFATOS, limite: int = LIMITE_ARTEFATOS):
+        self.diretorio = diretorio
+        self.limite = limite
+        self.logger = logging.getLogger(__name__)
+        self.downloads = 0
+        self.reaproveitados = 0
+        self._caminho_indice = os.path.join(diretorio, "indice.json")
+        self._urls: dict[str, dict] = {}
+        self._blobs: OrderedDict[str, dict] = OrderedDict()
+        self._pendentes: dict[str, asyncio.Task] = {}
+        # Usos em andamento de cada URL; as versões delas não são despejadas
+        self._em_uso: Counter[str] = Counter()
+        os.makedirs(diretorio, exist_ok=True)
+        self._carregar_indice()
+
+    def _caminho_blob(self, sha256: str) -> str:
+        return os.path.join(self.diretorio, f"{sha256}.zip")
+
+    def _carregar_indice(self) -> None:
+        try:
+            with open(self._caminho_indice, "r", encoding="utf-8") as arquivo:
+                dados = json.load(arquivo)
+        except (OSError, json.JSONDecodeError):
+            return
+        self._urls = dados.get("urls", {})
+        blobs = sorted(dados.get("blobs", {}).items(), key=lambda item: item[1].get("acesso", 0))
+        self._blobs = OrderedDict(
+            (sha, info) for sha, info in blobs if os.path.isfile(self._caminho_blob(sha))
+        )
+
+    def _salvar_indice(self) -> None:
+        temporario = self._caminho_indice + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump({"urls": self._urls, "blobs": self._blobs}, arquivo)
+        os.replace(temporario, self._caminho_indice)
+
+    @property
+    def tamanho(self) -> int:
+        return sum(info["tamanho"] for info in self._blobs.values())
+
+    @asynccontextmanager
+    async def abrir(self, sessao: aiohttp.ClientSession, url: str) -> AsyncIterator[BinaryIO]:
+        """Abre o artefato de ``url`` depois de conferir o SHA-256 do conteúdo aberto.
+
+        O arquivo entregue é o mesmo que foi conferido, e a versão em uso não é
+        despejada do cache enquanto estiver aberta. Um arquivo corrompido é
+        descartado e baixado de novo.
+        """
+        self._em_uso[url] += 1
+        try:
+            for tentativa in range(2):
+                sha256 = await self._versao(sessao, url)
+                arquivo = open(self._caminho_blob(sha256), "rb")
+                try:
+                    if await asyncio.to_thread(_sha256_arquivo, arquivo) == sha256:
+                        break
+                except BaseException:
+                    arquivo.close()
+                    raise
+                arquivo.close()
+                self.logger.warning("Artefato %s corrompido, baixando novamente.", sha256[:12])
+                self._remover_blob(sha256)
+            else:
+                raise ErroDownload("Artefato corrompido mesmo após um novo download")
+            with arquivo:
+                yield arquivo
+        finally:
+            self._em_uso[url] -= 1
+            if not self._em_uso[url]:
+                del self._em_uso[url]
+
+    async def _versao(self, sessao: aiohttp.ClientSession, url: str) -> str:
+        """Hash da versão atual do artefato; chamadas simultâneas compartilham o download."""
+        tarefa = self._pendentes.get(url)
+        if tarefa is None:
+            tarefa = asyncio.create_task(self._obter(sessao, url))
+            self._pendentes[url] = tarefa
+            tarefa.add_done_callback(lambda _: self._pendentes.pop(url, None))
+        return await asyncio.shield(tarefa)
+
+    async def _obter(self, sessao: aiohttp.ClientSession, url: str) -> str:
+        try:
+            entrada = self._urls.get(url)
+            sha256 = entrada and entrada["sha256"]
+            if sha256 and sha256 in self._blobs and os.path.isfile(self._caminho_blob(sha256)):
+                if time.time() - entrada["validado_em"] < JANELA_REVALIDACAO:
+                    return self._usar(sha256)
+                cabecalhos = {}
+                if entrada.get("etag"):
+                    cabecalhos["If-None-Match"] = entrada["etag"]
+                if entrada.get("last_modified"):
+                    cabecalhos["If-Modified-Since"] = entrada["last_modified"]
+                async with sessao.get(url, headers=cabecalhos) as resp:
+                    if resp.status == 304:
+                        entrada["validado_em"] = time.time()
+                        return self._usar(sha256)
+                    return await self._gravar(url, resp)
+            async with sessao.get(url) as resp:
+                return await self._gravar(url, resp)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            raise ErroDownload(f"Falha ao baixar o arquivo: {exc}") from exc
+
+    def _usar(self, sha256: str) -> str:
+        self.reaproveitados += 1
+        self._blobs[sha256]["acesso"] = time.time()
+        self._blobs.move_to_end(sha256)
+        self._salvar_indice()
+        return sha256
+
+    async def _gravar(self, url: str, resp: aiohttp.ClientResponse) -> str:
+        """Grava a resposta calculando o hash durante o download e retorna o hash."""
+        if resp.status != 200:
+            raise ErroDownload(f"Falha ao baixar o arquivo (HTTP {resp.status})")
+        medicao = Medicao()
+        digest = hashlib.sha256()
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".parcial")
+        try:
+            with os.fdopen(descritor, "wb") as arquivo:
+                async for bloco in resp.content.iter_chunked(TAMANHO_BLOCO):
+                    if medicao.bytes + len(bloco) > TAMANHO_MAXIMO_DEPLOY:
+                        raise ErroDownload(f"Arquivo maior que o limite de {formatar_bytes(TAMANHO_MAXIMO_DEPLOY)}")
+                    arquivo.write(bloco)
+                    digest.update(bloco)
+                    medicao.amostrar(len(bloco))
+            sha256 = digest.hexdigest()
+            caminho = self._caminho_blob(sha256)
+            os.replace(temporario, caminho)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.unlink(temporario)
+            raise
+        self.downloads += 1
+        estado = os.stat(caminho)
+        self._blobs[sha256] = {"tamanho": estado.st_size, "acesso": time.time()}
+        self._blobs.move_to_end(sha256)
+        self._urls[url] = {
+            "sha256": sha256,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "validado_em": time.time(),
+        }
+        self._despejar(manter=sha256)
+        self._salvar_indice()
+        self.logger.info("Artefato %s baixado: %s", sha256[:12], medicao.resumo())
+        return sha256
+
+    def _remover_blob(self, sha256: str) -> None:
+        self._blobs.pop(sha256, None)
+        try:
+            os.unlink(self._caminho_blob(sha256))
+        except FileNotFoundError:
+            pass
+
+    def _despejar(self, manter: str) -> None:
+        """Remove as versões usadas há mais tempo até caber no limite, exceto as que estão em uso."""
+        em_uso = {manter} | {self._urls[url]["sha256"] for url in self._em_uso if url in self._urls}
+        total = self.tamanho
+        for sha256 in list(self._blobs):
+            if total <= self.limite:
+                break
+            if sha256 in em_uso:
+                continue
+            total -= self._blobs[sha256]["tamanho"]
+            self._remover_blob(sha256)
+            self.logger.info("Artefato %s removido do cache (LRU).", sha256[:12])
@@ -0,0 +1,173 @@
+"""Exportação dos backups das aplicações direto para o disco.
+
+Os backups são pedidos à Square Cloud em paralelo, com no máximo
+``concorrencia`` ao mesmo tempo, e cada arquivo é baixado em blocos para
+``<nome>.zip.parcial``, calculando o SHA-256 durante o download; só depois
+de completo ele recebe o nome final. A memória usada fica em poucos blocos
+por download, qualquer que seja o tamanho dos backups. Ao final é gravado um
+``manifesto.json`` com tamanho e checksum de cada arquivo. Cada servidor
+mantém só as ``BACKUP_RETENCAO`` exportações mais recentes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+from datetime import datetime, timezone
+
+import aiohttp
+import squarecloud
+
+from .downloads import baixar_para_arquivo
+from .recursos import Medicao
+from .repeticao import RepeticaoCompartilhada
+
+DIRETORIO_BACKUPS = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "backups")
+# Backups simultâneos, tamanho máximo de cada arquivo e tentativas por aplicação
+BACKUP_CONCORRENCIA = int(os.getenv("BACKUP_CONCORRENCIA", "4"))
+TAMANHO_MAXIMO_BACKUP = int(os.getenv("BACKUP_TAMANHO_MAXIMO_MB", "1024")) * 1024 * 1024
+BACKUP_TENTATIVAS = 3
+# Exportações mantidas por servidor; as mais antigas são apagadas após uma nova
+BACKUP_RETENCAO = int(os.getenv("BACKUP_RETENCAO", "5"))
+# Nome do diretório de cada exportação: data e hora em que ela começou
+FORMATO_EXPORTACAO = "%Y%m%d-%H%M%S"
+PADRAO_EXPORTACAO = re.compile(r"\d{8}-\d{6}")
+
+logger = logging.getLogger(__name__)
+
+
+def nome_arquivo(app: squarecloud.Application) -> str:
+    """Nome do arquivo de backup: nome da aplicação sem caracteres especiais e o id."""
+    nome = re.sub(r"[^A-Za-z0-9._-]+", "_", app.name).strip("._") or "app"
+    return f"{nome}-{app.id}.zip"
+
+
+def remover_exportacoes_antigas(raiz: str, manter: int = BACKUP_RETENCAO) -> list[str]:
+    """Apaga as exportações de ``raiz`` além das ``manter`` mais recentes e retorna as removidas.
+
+    Só são consideradas as pastas nomeadas com FORMATO_EXPORTACAO.
+    """
+    try:
+        nomes = sorted(nome for nome in os.listdir(raiz) if PADRAO_EXPORTACAO.fullmatch(nome))
+    except FileNotFoundError:
+        return []
+    removidas = nomes[: max(0, len(nomes) - manter)]
+    for nome in removidas:
+        shutil.rmtree(os.path.join(raiz, nome), ignore_errors=True)
+    return removidas
+
+
+class ResultadoBackup:
+    """Entrada do manifesto para uma aplicação."""
+
+    __slots__ = ("nome", "app_id", "arquivo", "bytes", "sha256", "erro")
+
+    def __init__(self, nome: str, app_id: str):
+        self.nome = nome
+        self.app_id = app_id
+        self.arquivo: str | None = None
+        self.bytes = 0
+        self.sha256: str | None = None
+        self.erro: str | None = None
+
+    def para_dict(self) -> dict:
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+
+class ExportacaoBackups:
+    """Baixa o backup de várias aplicações para um diretório e grava o manifesto.
+
+    As falhas são repetidas por uma ``RepeticaoCompartilhada``.
+    """
+
+    def __init__(
+        self,
+        cliente: squarecloud.Client,
+        sessao: aiohttp.ClientSession,
+        apps: list[squarecloud.Application],
+        diretorio: str,
+        concorrencia: int = BACKUP_CONCORRENCIA,
+        limite: int = TAMANHO_MAXIMO_BACKUP,
+    ):
+        self.cliente = cliente
+        self.sessao = sessao
+        self.apps = apps
+        self.diretorio = diretorio
+        self.concorrencia = concorrencia
+        self.limite = limite
+        self.resultados = [ResultadoBackup(app.name, app.id) for app in apps]
+        self.concluidas = 0
+        self.em_andamento = 0
+        self.medicao = Medicao()
+        self.repeticao = RepeticaoCompartilhada(BACKUP_TENTATIVAS)
+
+    @property
+    def falhas(self) -> list[ResultadoBackup]:
+        return [resultado for resultado in self.resultados if resultado.erro]
+
+    @property
+    def caminho_manifesto(self) -> str:
+        return os.path.join(self.diretorio, "manifesto.json")
+
+    async def _baixar(self, app: squarecloud.Application, resultado: ResultadoBackup) -> None:
+        backup = await self.cliente.backup(app.id)
+        destino = os.path.join(self.diretorio, nome_arquivo(app))
+        parcial = f"{destino}.parcial"
+        digest = hashlib.sha256()
+        try:
+            resultado.bytes = await baixar_para_arquivo(
+                self.sessao, backup.url, parcial, self.limite, self.medicao, digest
+            )
+            os.replace(parcial, destino)
+        except BaseException:
+            # Um arquivo incompleto nunca fica com o nome final nem sobra no diretório
+            if os.path.exists(parcial):
+                os.unlink(parcial)
+            raise
+        resultado.arquivo = os.path.basename(destino)
+        resultado.sha256 = digest.hexdigest()
+
+    async def _exportar_app(
+        self, app: squarecloud.Application, resultado: ResultadoBackup, limite: asyncio.Semaphore
+    ) -> None:
+        async with limite:
+            self.em_andamento += 1
+            try:
+                await self.repeticao.executar(lambda: self._baixar(app, resultado))
+            except Exception as exc:
+                resultado.erro = str(exc) or type(exc).__name__
+                logger.warning("Backup de %s falhou: %s", app.name, resultado.erro)
+            finally:
+                self.em_andamento -= 1
+                self.concluidas += 1
+
+    def _gravar_manifesto(self) -> None:
+        manifesto = {
+            "criado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "duracao_s": round(self.medicao.duracao, 2),
+            "bytes": sum(resultado.bytes for resultado in self.resultados),
+            "aplicacoes": [resultado.para_dict() for resultado in self.resultados],
+        }
+        temporario = f"{self.caminho_manifesto}.parcial"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump(manifesto, arquivo, indent=2, ensure_ascii=False)
+        os.replace(temporario, self.caminho_manifesto)
+
+    async def executar(self) -> str:
+        """Exporta todos os backups e retorna o caminho do manifesto."""
+        os.makedirs(self.diretorio, exist_ok=True)
+        limite = asyncio.Semaphore(self.concorrencia)
+        await asyncio.gather(
+            *(self._exportar_app(app, resultado, limite) for app, resultado in zip(self.apps, self.resultados))
+        )
+        await asyncio.to_thread(self._gravar_manifesto)
+        logger.info(
+            "Backup de %d aplicações em %s: %s, %d falhas",
+            len(self.apps), self.diretorio, self.medicao.resumo(), len(self.falhas),
+        )
+        return self.caminho_manifesto
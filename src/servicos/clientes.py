@@ -0,0 +1,117 @@
+"""Clientes das APIs externas de cada servidor, criados sob demanda."""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, TypeVar
+
+from .metricas import registro
+from .recursos import monitor_memoria
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Clientes mantidos por serviço e tempo (s) sem uso após o qual são descartados
+CLIENTES_MAXIMO = int(os.getenv("CLIENTES_MAXIMO", "64"))
+CLIENTES_OCIOSO = float(os.getenv("CLIENTES_OCIOSO", "1800"))
+
+
+class _Entrada(Generic[T]):
+    __slots__ = ("credencial", "cliente", "usado_em")
+
+    def __init__(self, credencial: str, cliente: T):
+        self.credencial = credencial
+        self.cliente = cliente
+        self.usado_em = time.monotonic()
+
+
+class RegistroClientes(Generic[T]):
+    """Um cliente por inquilino, reaproveitado entre interações e descartado por LRU.
+
+    O cliente é recriado quando a credencial do inquilino muda. A ordem do
+    dicionário é a do último uso, então os ociosos ficam sempre no início.
+    """
+
+    def __init__(
+        self,
+        nome: str,
+        fabrica: Callable[[str], T],
+        fechar: Callable[[T], None] | None = None,
+        limite: int = CLIENTES_MAXIMO,
+        ocioso: float = CLIENTES_OCIOSO,
+    ):
+        self.nome = nome
+        self.fabrica = fabrica
+        self.fechar = fechar
+        self.limite = limite
+        self.ocioso = ocioso
+        self.criados = 0
+        self.descartados = 0
+        self._entradas: OrderedDict[str | None, _Entrada[T]] = OrderedDict()
+        registro.medidor(f"clientes_{nome}_ativos", lambda: len(self._entradas))
+        monitor_memoria.contar(f"clientes_{nome}", lambda: len(self._entradas))
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def obter(self, inquilino: str | None, credencial: str | None) -> T | None:
+        """Cliente do inquilino para a credencial informada, criado se necessário."""
+        self.expirar()
+        if not credencial:
+            self.remover(inquilino)
+            return None
+        entrada = self._entradas.get(inquilino)
+        if entrada is not None and entrada.credencial == credencial:
+            entrada.usado_em = time.monotonic()
+            self._entradas.move_to_end(inquilino)
+            return entrada.cliente
+        self.remover(inquilino)
+        cliente = self.fabrica(credencial)
+        self._entradas[inquilino] = _Entrada(credencial, cliente)
+        self.criados += 1
+        while len(self._entradas) > self.limite:
+            self._descartar(next(iter(self._entradas)))
+        return cliente
+
+    def emprestar(self, inquilino: str | None, credencial: str | None) -> T | None:
+        """Cliente para um uso avulso, como uma varredura, sem mantê-lo no registro.
+
+        Reaproveita o cliente já registrado sem renovar seu último uso, de modo
+        que inquilinos sem interações continuem sendo descartados por ociosidade.
+        """
+        if not credencial:
+            return None
+        entrada = self._entradas.get(inquilino)
+        if entrada is not None and entrada.credencial == credencial:
+            return entrada.cliente
+        return self.fabrica(credencial)
+
+    def remover(self, inquilino: str | None) -> None:
+        if inquilino in self._entradas:
+            self._descartar(inquilino)
+
+    def expirar(self) -> None:
+        """Descarta os clientes sem uso há mais de ``ocioso`` segundos."""
+        limite = time.monotonic() - self.ocioso
+        while self._entradas:
+            inquilino, entrada = next(iter(self._entradas.items()))
+            if entrada.usado_em > limite:
+                break
+            self._descartar(inquilino)
+
+    def fechar_todos(self) -> None:
+        for inquilino in list(self._entradas):
+            self._descartar(inquilino)
+
+    def _descartar(self, inquilino: str | None) -> None:
+        entrada = self._entradas.pop(inquilino)
+        self.descartados += 1
+        if self.fechar:
+            try:
+                self.fechar(entrada.cliente)
+            except Exception as exc:
+                logger.warning("Falha ao fechar cliente %s do inquilino %s: %s", self.nome, inquilino, exc)
@@ -0,0 +1,59 @@
+"""Sincronização condicional da árvore de comandos de barra."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from discord.ext import commands
+
+CAMINHO_HASH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "comandos.json")
+
+logger = logging.getLogger(__name__)
+
+
+def hash_comandos(bot: commands.Bot) -> str:
+    """Hash das definições de todos os comandos, na forma enviada ao Discord."""
+    definicoes = sorted(
+        (comando.to_dict(bot.tree) for comando in bot.tree.get_commands()),
+        key=lambda definicao: (definicao.get("type", 1), definicao["name"]),
+    )
+    conteudo = json.dumps(definicoes, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(conteudo.encode()).hexdigest()
+
+
+def _ler(caminho: str) -> dict:
+    try:
+        with open(caminho, "r", encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return {}
+
+
+def _gravar(caminho: str, dados: dict) -> None:
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix=".tmp")
+    with os.fdopen(descritor, "w", encoding="utf-8") as arquivo:
+        json.dump(dados, arquivo)
+    os.replace(temporario, caminho)
+
+
+async def sincronizar_se_necessario(bot: commands.Bot, caminho: str = CAMINHO_HASH) -> bool:
+    """Envia a árvore ao Discord apenas se os comandos mudaram desde a última sincronização.
+
+    O hash é guardado por aplicação; apagar o arquivo força uma nova sincronização.
+    """
+    atual = hash_comandos(bot)
+    chave = str(bot.application_id)
+    sincronizados = _ler(caminho)
+    if sincronizados.get(chave) == atual:
+        logger.info("Comandos inalterados; sincronização dispensada.")
+        return False
+    comandos = await bot.tree.sync()
+    sincronizados[chave] = atual
+    _gravar(caminho, sincronizados)
+    logger.info("%d comandos sincronizados com o Discord.", len(comandos))
+    return True
@@ -0,0 +1,152 @@
+"""Acesso centralizado ao config.json.
+
+As chaves no nível principal formam a configuração global. Cada servidor
+configurado pelo /configurar tem a sua própria seção em ``guildas``. Um
+servidor sem seção própria não tem nada configurado, a menos que
+``CONFIG_GLOBAL_NOS_SERVIDORES`` libere o uso da global; em DMs, a global só
+vale para o administrador global.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+CAMINHO_CONFIG = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config.json")
+
+# Intervalo mínimo (s) entre verificações de alteração externa do arquivo
+INTERVALO_VERIFICACAO = 1.0
+# Servidores sem seção própria usam a configuração global somente se ativado
+GLOBAL_NOS_SERVIDORES = os.getenv("CONFIG_GLOBAL_NOS_SERVIDORES", "0").lower() in ("1", "true", "sim")
+# Seção que nunca existe, usada por quem não tem acesso a nenhuma configuração
+SEM_SECAO = "sem-configuracao"
+
+
+class Configuracao:
+    """Mantém o config.json em memória com escrita atômica e recarga automática."""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self.logger = logging.getLogger(__name__)
+        self._dados: dict[str, Any] = {}
+        self._mtime: int | None = None
+        self._proxima_verificacao = 0.0
+        self._lote = 0
+        self._pendente = False
+        self._trava = threading.RLock()
+        self._recarregar()
+
+    def _mtime_atual(self) -> int | None:
+        try:
+            return os.stat(self.caminho).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _recarregar(self) -> None:
+        mtime = self._mtime_atual()
+        if mtime is None:
+            self._dados = {}
+        else:
+            try:
+                with open(self.caminho, "r", encoding="utf-8") as arquivo:
+                    self._dados = json.load(arquivo)
+            except (OSError, json.JSONDecodeError) as exc:
+                self.logger.error("Falha ao ler %s: %s", self.caminho, exc)
+                return
+        self._mtime = mtime
+
+    def _verificar_alteracao(self) -> None:
+        """Recarrega o arquivo se ele foi modificado fora do bot."""
+        agora = time.monotonic()
+        if self._pendente or agora < self._proxima_verificacao:
+            return
+        self._proxima_verificacao = agora + INTERVALO_VERIFICACAO
+        if self._mtime_atual() != self._mtime:
+            self.logger.info("config.json alterado externamente, recarregando.")
+            self._recarregar()
+
+    def _secao(self, inquilino: str | None) -> dict[str, Any]:
+        if inquilino is None:
+            return self._dados
+        return self._dados.get("guildas", {}).get(inquilino, {})
+
+    def inquilino(self, guild_id: int | None, usuario_id: int | None = None) -> str | None:
+        """Seção usada por uma interação: a do servidor, mesmo que ainda vazia.
+
+        A global (``None``) só é usada em DMs do administrador global e, com
+        ``CONFIG_GLOBAL_NOS_SERVIDORES``, nos servidores sem seção própria.
+        """
+        with self._trava:
+            self._verificar_alteracao()
+            if guild_id is None:
+                admin = self._dados.get("admin_id")
+                return None if admin and usuario_id == admin else SEM_SECAO
+            chave = str(guild_id)
+            if chave in self._dados.get("guildas", {}) or not GLOBAL_NOS_SERVIDORES:
+                return chave
+            return None
+
+    def inquilinos(self) -> list[str | None]:
+        """Seções com token da Square Cloud, começando pela global."""
+        with self._trava:
+            self._verificar_alteracao()
+            secoes: list[str | None] = [None] if self._dados.get("token") else []
+            secoes.extend(chave for chave, dados in self._dados.get("guildas", {}).items() if dados.get("token"))
+            return secoes
+
+    def get(self, chave: str, padrao: Any = None, inquilino: str | None = None) -> Any:
+        """Retorna um valor da configuração a partir da memória."""
+        with self._trava:
+            self._verificar_alteracao()
+            return self._secao(inquilino).get(chave, padrao)
+
+    def atualizar(self, inquilino: str | None = None, **valores: Any) -> None:
+        """Altera valores e grava o arquivo, ou adia a gravação se houver um lote aberto."""
+        with self._trava:
+            self._verificar_alteracao()
+            if inquilino is None:
+                self._dados.update(valores)
+            else:
+                self._dados.setdefault("guildas", {}).setdefault(inquilino, {}).update(valores)
+            self._pendente = True
+            if not self._lote:
+                self.salvar()
+
+    @contextmanager
+    def lote(self) -> Iterator[Configuracao]:
+        """Agrupa várias alterações em uma única gravação ao final do bloco."""
+        with self._trava:
+            self._lote += 1
+        try:
+            yield self
+        finally:
+            with self._trava:
+                self._lote -= 1
+                if not self._lote and self._pendente:
+                    self.salvar()
+
+    def salvar(self) -> None:
+        """Grava o arquivo de forma atômica (arquivo temporário + rename)."""
+        with self._trava:
+            diretorio = os.path.dirname(self.caminho)
+            descritor, temporario = tempfile.mkstemp(dir=diretorio, prefix=".config-", suffix=".json")
+            try:
+                with os.fdopen(descritor, "w", encoding="utf-8") as arquivo:
+                    json.dump(self._dados, arquivo, ensure_ascii=False, indent=4)
+                    arquivo.flush()
+                    os.fsync(arquivo.fileno())
+                os.replace(temporario, self.caminho)
+            except BaseException:
+                os.unlink(temporario)
+                raise
+            self._mtime = self._mtime_atual()
+            self._pendente = False
+
+
+configuracao = Configuracao(CAMINHO_CONFIG)
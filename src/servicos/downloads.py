@@ -0,0 +1,71 @@
+"""Download de arquivos em blocos direto para o disco."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+
+import aiohttp
+
+from .recursos import Medicao, formatar_bytes
+
+# Tamanho máximo aceito para um ZIP de deploy
+TAMANHO_MAXIMO_DEPLOY = int(os.getenv("DEPLOY_TAMANHO_MAXIMO_MB", "100")) * 1024 * 1024
+TAMANHO_BLOCO = 64 * 1024
+
+
+class ErroDownload(RuntimeError):
+    """Falha ao baixar um arquivo (status HTTP, tamanho ou conexão)."""
+
+
+async def baixar_para_arquivo(
+    sessao: aiohttp.ClientSession,
+    url: str,
+    destino: str,
+    limite: int = TAMANHO_MAXIMO_DEPLOY,
+    medicao: Medicao | None = None,
+    digest: hashlib._Hash | None = None,
+) -> int:
+    """Grava o conteúdo de ``url`` em ``destino`` sem carregá-lo inteiro na memória.
+
+    Cada bloco também alimenta ``digest``, quando informado. Retorna a
+    quantidade de bytes gravados.
+    """
+    try:
+        async with sessao.get(url) as resp:
+            if resp.status != 200:
+                raise ErroDownload(f"Falha ao baixar o arquivo (HTTP {resp.status})")
+            if resp.content_length and resp.content_length > limite:
+                raise ErroDownload(f"Arquivo maior que o limite de {formatar_bytes(limite)}")
+            total = 0
+            with open(destino, "wb") as arquivo:
+                async for bloco in resp.content.iter_chunked(TAMANHO_BLOCO):
+                    total += len(bloco)
+                    if total > limite:
+                        raise ErroDownload(f"Arquivo maior que o limite de {formatar_bytes(limite)}")
+                    arquivo.write(bloco)
+                    if digest:
+                        digest.update(bloco)
+                    if medicao:
+                        medicao.amostrar(len(bloco))
+    except aiohttp.ClientError as exc:
+        raise ErroDownload(f"Falha ao baixar o arquivo: {exc}") from exc
+    return total
+
+
+async def baixar_temporario(
+    sessao: aiohttp.ClientSession,
+    url: str,
+    limite: int = TAMANHO_MAXIMO_DEPLOY,
+    medicao: Medicao | None = None,
+) -> str:
+    """Baixa ``url`` para um arquivo temporário e retorna o caminho; o chamador o remove."""
+    descritor, caminho = tempfile.mkstemp(prefix="squaredash-", suffix=".zip")
+    os.close(descritor)
+    try:
+        await baixar_para_arquivo(sessao, url, caminho, limite, medicao)
+    except BaseException:
+        os.unlink(caminho)
+        raise
+    return caminho
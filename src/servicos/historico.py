@@ -0,0 +1,145 @@
+"""Histórico de métricas das aplicações em buffers circulares de tamanho fixo."""
+
+from __future__ import annotations
+
+import math
+import re
+import time
+from array import array
+
+CAMPOS = ("cpu", "ram", "armazenamento", "requests")
+BARRAS = "▁▂▃▄▅▆▇█"
+
+_UNIDADES_MB = {"B": 1 / (1024 * 1024), "KB": 1 / 1024, "MB": 1.0, "GB": 1024.0, "TB": 1024.0 * 1024}
+_MEDIDA = re.compile(r"([-+]?\d+(?:[.,]\d+)?)\s*([A-Za-z%]*)")
+
+
+def converter_medida(valor: str | int | float | None) -> float:
+    """Converte textos como ``"12.5%"``, ``"120MB"`` ou ``"1.2GB"`` em número (tamanhos em MB)."""
+    if valor is None:
+        return math.nan
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    encontrado = _MEDIDA.search(valor)
+    if not encontrado:
+        return math.nan
+    numero = float(encontrado.group(1).replace(",", "."))
+    unidade = encontrado.group(2).upper()
+    return numero * _UNIDADES_MB.get(unidade, 1.0)
+
+
+class BufferCircular:
+    """Sequência de floats com capacidade fixa que sobrescreve as amostras mais antigas."""
+
+    __slots__ = ("_dados", "_posicao", "quantidade")
+
+    def __init__(self, capacidade: int, tipo: str = "f"):
+        self._dados = array(tipo, [math.nan]) * capacidade
+        self._posicao = 0
+        self.quantidade = 0
+
+    @property
+    def capacidade(self) -> int:
+        return len(self._dados)
+
+    def adicionar(self, valor: float) -> None:
+        self._dados[self._posicao] = valor
+        self._posicao = (self._posicao + 1) % len(self._dados)
+        self.quantidade = min(self.quantidade + 1, len(self._dados))
+
+    def ultimo(self) -> float:
+        return self._dados[self._posicao - 1] if self.quantidade else math.nan
+
+    def valores(self) -> list[float]:
+        """Amostras em ordem cronológica."""
+        if self.quantidade < len(self._dados):
+            return self._dados[: self.quantidade].tolist()
+        return self._dados[self._posicao :].tolist() + self._dados[: self._posicao].tolist()
+
+    @property
+    def bytes(self) -> int:
+        return self._dados.itemsize * len(self._dados)
+
+
+class HistoricoApp:
+    """Séries de uma aplicação, todas com a mesma capacidade."""
+
+    __slots__ = ("nome", "inquilino", "tempos", "series")
+
+    def __init__(self, nome: str, capacidade: int, inquilino: str | None = None):
+        self.nome = nome
+        self.inquilino = inquilino
+        self.tempos = BufferCircular(capacidade, "d")
+        self.series = {campo: BufferCircular(capacidade) for campo in CAMPOS}
+
+
+class HistoricoMetricas:
+    """Mantém o histórico de todas as aplicações com memória limitada por aplicação.
+
+    Amostras de uma aplicação chegando a menos de ``intervalo`` segundos da
+    anterior são descartadas, para que a janela coberta não dependa da
+    frequência das consultas.
+    """
+
+    def __init__(self, capacidade: int, intervalo: float = 0.0):
+        self.capacidade = capacidade
+        self.intervalo = intervalo
+        self.apps: dict[str, HistoricoApp] = {}
+
+    def registrar(self, app_id: str, nome: str, status, inquilino: str | None = None) -> None:
+        historico = self.apps.get(app_id)
+        if historico is None:
+            historico = self.apps[app_id] = HistoricoApp(nome, self.capacidade, inquilino)
+        historico.nome = nome
+        historico.inquilino = inquilino
+        agora = time.time()
+        if agora - historico.tempos.ultimo() < self.intervalo:
+            return
+        historico.tempos.adicionar(agora)
+        historico.series["cpu"].adicionar(converter_medida(status.cpu))
+        historico.series["ram"].adicionar(converter_medida(status.ram))
+        historico.series["armazenamento"].adicionar(converter_medida(status.storage))
+        historico.series["requests"].adicionar(converter_medida(getattr(status, "requests", None)))
+
+    def do_inquilino(self, inquilino: str | None) -> list[HistoricoApp]:
+        return [h for h in self.apps.values() if h.inquilino == inquilino]
+
+    def buscar(self, texto: str, inquilino: str | None = None) -> HistoricoApp | None:
+        """Procura pelo ID ou pelo nome entre as aplicações do inquilino."""
+        historico = self.apps.get(texto)
+        if historico is not None and historico.inquilino == inquilino:
+            return historico
+        texto = texto.lower()
+        return next((h for h in self.do_inquilino(inquilino) if h.nome.lower() == texto), None)
+
+    @property
+    def bytes(self) -> int:
+        return sum(
+            h.tempos.bytes + sum(s.bytes for s in h.series.values()) for h in self.apps.values()
+        )
+
+
+def estatisticas(valores: list[float]) -> tuple[float, float, float] | None:
+    """Retorna mínimo, máximo e percentil 95 ignorando amostras ausentes."""
+    validos = sorted(v for v in valores if not math.isnan(v))
+    if not validos:
+        return None
+    p95 = validos[min(len(validos) - 1, math.ceil(0.95 * len(validos)) - 1)]
+    return validos[0], validos[-1], p95
+
+
+def sparkline(valores: list[float], largura: int = 32) -> str:
+    """Desenha a série com blocos Unicode, agrupando amostras pela média."""
+    validos = [v for v in valores if not math.isnan(v)]
+    if not validos:
+        return ""
+    if len(validos) > largura:
+        passo = len(validos) / largura
+        validos = [
+            sum(grupo) / len(grupo)
+            for grupo in (validos[int(i * passo) : int((i + 1) * passo)] for i in range(largura))
+            if grupo
+        ]
+    minimo, maximo = min(validos), max(validos)
+    escala = (maximo - minimo) or 1.0
+    return "".join(BARRAS[int((v - minimo) / escala * (len(BARRAS) - 1))] for v in validos)
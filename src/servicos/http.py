@@ -0,0 +1,113 @@
+"""Sessão HTTP compartilhada pelo bot, com pool de conexões."""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Any
+
+import aiohttp
+import squarecloud
+
+from .metricas import registro, trace_config_api
+
+LIMITE_CONEXOES = int(os.getenv("HTTP_LIMITE_CONEXOES", "100"))
+LIMITE_POR_HOST = int(os.getenv("HTTP_LIMITE_POR_HOST", "10"))
+TTL_DNS = 300
+KEEPALIVE = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+class EstatisticasPool:
+    """Contadores de conexões abertas e reaproveitadas pela sessão compartilhada."""
+
+    def __init__(self):
+        self.requisicoes = 0
+        self.conexoes_criadas = 0
+        self.conexoes_reutilizadas = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def contar(atributo: str, *_: Any) -> None:
+            setattr(self, atributo, getattr(self, atributo) + 1)
+
+        def contador(atributo: str):
+            return lambda *args: contar(atributo, *args)
+
+        trace.on_request_start.append(contador("requisicoes"))
+        trace.on_connection_create_end.append(contador("conexoes_criadas"))
+        trace.on_connection_reuseconn.append(contador("conexoes_reutilizadas"))
+        trace.on_dns_cache_hit.append(contador("dns_cache_hits"))
+        trace.on_dns_cache_miss.append(contador("dns_cache_misses"))
+        return trace
+
+    def resumo(self, sessao: aiohttp.ClientSession | None = None) -> dict[str, int | float]:
+        dados: dict[str, int | float] = dict(vars(self))
+        total = self.conexoes_criadas + self.conexoes_reutilizadas
+        dados["taxa_reuso"] = round(self.conexoes_reutilizadas / total, 3) if total else 0.0
+        conector = sessao.connector if sessao else None
+        if conector is not None:
+            dados["conexoes_ociosas"] = sum(len(conns) for conns in getattr(conector, "_conns", {}).values())
+            dados["conexoes_em_uso"] = len(getattr(conector, "_acquired", ()))
+        return dados
+
+
+estatisticas_pool = EstatisticasPool()
+
+
+def criar_sessao() -> aiohttp.ClientSession:
+    """Cria a sessão do processo; deve ser chamada com o event loop em execução."""
+    conector = aiohttp.TCPConnector(
+        limit=LIMITE_CONEXOES,
+        limit_per_host=LIMITE_POR_HOST,
+        ttl_dns_cache=TTL_DNS,
+        keepalive_timeout=KEEPALIVE,
+    )
+    return aiohttp.ClientSession(
+        connector=conector,
+        trace_configs=[estatisticas_pool.trace_config(), trace_config_api()],
+    )
+
+
+class _SessaoEmprestada:
+    """Imita o ``aiohttp.ClientSession`` criado pelo squarecloud a cada requisição,
+    repassando as chamadas para a sessão compartilhada sem fechá-la ao final."""
+
+    def __init__(self, sessao: aiohttp.ClientSession, headers: dict[str, str] | None = None):
+        self._sessao = sessao
+        self._headers = headers or {}
+
+    async def __aenter__(self) -> _SessaoEmprestada:
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        return None
+
+    def request(self, method: str, url: str, **kwargs: Any):
+        headers = {**self._headers, **(kwargs.pop("headers", None) or {})}
+        return self._sessao.request(method, url, headers=headers, **kwargs)
+
+
+def compartilhar_sessao(cliente: squarecloud.Client, sessao: aiohttp.ClientSession) -> squarecloud.Client:
+    """Faz o cliente da Square Cloud usar o pool compartilhado em vez de uma sessão por requisição.
+
+    Depende de um atributo interno da biblioteca; se ele não existir (outra
+    versão), o cliente segue com as próprias sessões e a falha é avisada no
+    log e contada em ``http_sessao_nao_compartilhada_total``.
+    """
+    http = getattr(cliente, "_http", None)
+    if http is None or not hasattr(http, "_HTTPClient__session"):
+        registro.incrementar("http_sessao_nao_compartilhada_total")
+        logger.warning(
+            "squarecloud %s não expõe a sessão HTTP esperada; as chamadas à Square Cloud ficarão fora do "
+            "pool compartilhado e das métricas de latência.",
+            getattr(squarecloud, "__version__", "?"),
+        )
+        return cliente
+    http._HTTPClient__session = lambda headers=None: _SessaoEmprestada(sessao, headers)
+    return cliente
+
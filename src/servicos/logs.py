@@ -0,0 +1,148 @@
+"""Acompanhamento dos logs das aplicações, com uma única consulta por aplicação."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections import deque
+
+import squarecloud
+
+from .metricas import registro
+from .recursos import monitor_memoria
+
+# Intervalo (s) entre consultas aos logs, linhas mantidas por aplicação e
+# linhas finais do trecho anterior usadas para achar onde ele continua
+LOGS_INTERVALO = float(os.getenv("LOGS_INTERVALO", "5"))
+LOGS_LINHAS = int(os.getenv("LOGS_LINHAS", "200"))
+CONTEXTO_SOBREPOSICAO = 20
+
+logger = logging.getLogger(__name__)
+
+
+def linhas_novas(anteriores: deque[str] | list[str], atuais: list[str]) -> tuple[list[str], bool]:
+    """Separa as linhas de ``atuais`` que vêm depois das já vistas em ``anteriores``.
+
+    A API devolve sempre as últimas linhas do log, então o trecho novo começa
+    após a última posição em que ``atuais`` repete o final de ``anteriores``.
+    Retorna as linhas novas e se houve continuidade; sem sobreposição (log
+    reiniciado ou saída rápida demais), todas as linhas são tratadas como novas.
+    """
+    if not anteriores:
+        return atuais, True
+    contexto = [anteriores[i] for i in range(max(0, len(anteriores) - CONTEXTO_SOBREPOSICAO), len(anteriores))]
+    ultima = contexto[-1]
+    for indice in range(len(atuais) - 1, -1, -1):
+        if atuais[indice] != ultima:
+            continue
+        tamanho = min(len(contexto), indice + 1)
+        if atuais[indice + 1 - tamanho : indice + 1] == contexto[-tamanho:]:
+            return atuais[indice + 1 :], True
+    return atuais, False
+
+
+class Assinatura:
+    """Um espectador dos logs de uma aplicação; ``evento`` é ativado a cada linha nova."""
+
+    __slots__ = ("transmissao", "evento")
+
+    def __init__(self, transmissao: TransmissaoLogs):
+        self.transmissao = transmissao
+        self.evento = asyncio.Event()
+
+    def cancelar(self) -> None:
+        self.transmissao.sair(self)
+
+
+class TransmissaoLogs:
+    """Consulta os logs de uma aplicação enquanto houver espectadores.
+
+    As linhas ficam em um buffer circular de ``capacidade`` linhas,
+    compartilhado por todos os espectadores.
+    """
+
+    def __init__(
+        self,
+        central: CentralLogs,
+        app_id: str,
+        cliente: squarecloud.Client,
+        capacidade: int = LOGS_LINHAS,
+        intervalo: float = LOGS_INTERVALO,
+    ):
+        self.central = central
+        self.app_id = app_id
+        self.cliente = cliente
+        self.intervalo = intervalo
+        self.linhas: deque[str] = deque(maxlen=capacidade)
+        self.consultas = 0
+        self.erro: str | None = None
+        self.espectadores: set[Assinatura] = set()
+        self._tarefa: asyncio.Task | None = None
+
+    def entrar(self) -> Assinatura:
+        assinatura = Assinatura(self)
+        self.espectadores.add(assinatura)
+        if self.linhas:
+            assinatura.evento.set()
+        if self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._acompanhar())
+        return assinatura
+
+    def sair(self, assinatura: Assinatura) -> None:
+        self.espectadores.discard(assinatura)
+        if not self.espectadores:
+            if self._tarefa:
+                self._tarefa.cancel()
+                self._tarefa = None
+            self.central._encerrar(self)
+
+    async def _acompanhar(self) -> None:
+        while True:
+            await self._consultar()
+            await asyncio.sleep(self.intervalo)
+
+    async def _consultar(self) -> None:
+        self.consultas += 1
+        try:
+            dados = await self.cliente.get_logs(self.app_id)
+        except Exception as exc:
+            logger.warning("Falha ao consultar os logs de %s: %s", self.app_id, exc)
+            self.erro = str(exc)
+            self._avisar()
+            return
+        self.erro = None
+        novas, continuo = linhas_novas(self.linhas, (dados.logs or "").splitlines())
+        if not novas:
+            return
+        if not continuo:
+            self.linhas.append("…")
+        self.linhas.extend(novas)
+        self._avisar()
+
+    def _avisar(self) -> None:
+        for assinatura in self.espectadores:
+            assinatura.evento.set()
+
+
+class CentralLogs:
+    """Reúne os espectadores de cada aplicação em uma única transmissão."""
+
+    def __init__(self, capacidade: int = LOGS_LINHAS, intervalo: float = LOGS_INTERVALO):
+        self.capacidade = capacidade
+        self.intervalo = intervalo
+        self.transmissoes: dict[str, TransmissaoLogs] = {}
+        registro.medidor("logs_transmissoes_ativas", lambda: len(self.transmissoes))
+        monitor_memoria.contar("logs_linhas", lambda: sum(len(t.linhas) for t in self.transmissoes.values()))
+
+    def assinar(self, app_id: str, cliente: squarecloud.Client) -> Assinatura:
+        transmissao = self.transmissoes.get(app_id)
+        if transmissao is None:
+            transmissao = self.transmissoes[app_id] = TransmissaoLogs(
+                self, app_id, cliente, self.capacidade, self.intervalo
+            )
+        return transmissao.entrar()
+
+    def _encerrar(self, transmissao: TransmissaoLogs) -> None:
+        if self.transmissoes.get(transmissao.app_id) is transmissao:
+            del self.transmissoes[transmissao.app_id]
@@ -0,0 +1,256 @@
+"""Fila de saída das mensagens enviadas ao Discord.
+
+Cada destino (DM, canal ou followup de interação) tem seu próprio balde de
+envios, e um balde global limita o total por segundo. Respostas a interações
+passam na frente dos avisos em segundo plano. Avisos ao mesmo destino que
+chegam dentro de ``JANELA_AGRUPAMENTO`` são unidos em uma única mensagem.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from typing import Any
+
+from .metricas import registro
+from .recursos import monitor_memoria
+
+logger = logging.getLogger(__name__)
+
+# Prioridades: respostas a interações antes dos avisos em segundo plano
+INTERACAO, FUNDO = 0, 1
+NOMES_PRIORIDADE = {INTERACAO: "interacao", FUNDO: "fundo"}
+
+# Mensagens por segundo e rajada permitidas para cada destino e no total
+TAXA_DESTINO = float(os.getenv("MENSAGENS_TAXA_DESTINO", "1"))
+RAJADA_DESTINO = int(os.getenv("MENSAGENS_RAJADA_DESTINO", "5"))
+TAXA_GLOBAL = float(os.getenv("MENSAGENS_TAXA_GLOBAL", "40"))
+# Tempo (s) que um aviso espera por outros ao mesmo destino antes de sair
+JANELA_AGRUPAMENTO = float(os.getenv("MENSAGENS_JANELA_AGRUPAMENTO", "2"))
+LIMITE_MENSAGEM = 2000
+
+
+class Balde:
+    """Balde de fichas: ``taxa`` fichas por segundo, acumulando até ``capacidade``."""
+
+    __slots__ = ("taxa", "capacidade", "fichas", "atualizado")
+
+    def __init__(self, taxa: float, capacidade: float):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.fichas = capacidade
+        self.atualizado = time.monotonic()
+
+    def espera(self, agora: float) -> float:
+        """Segundos até haver uma ficha disponível."""
+        self.fichas = min(self.capacidade, self.fichas + (agora - self.atualizado) * self.taxa)
+        self.atualizado = agora
+        return 0.0 if self.fichas >= 1 else (1 - self.fichas) / self.taxa
+
+    def consumir(self) -> None:
+        self.fichas -= 1
+
+    @property
+    def cheio(self) -> bool:
+        return self.fichas >= self.capacidade
+
+
+class _Mensagem:
+    __slots__ = ("prioridade", "seq", "conteudo", "kwargs", "futuro", "criada_em", "liberada_em")
+
+    def __init__(self, prioridade: int, seq: int, conteudo: str | None, kwargs: dict, futuro: asyncio.Future):
+        self.prioridade = prioridade
+        self.seq = seq
+        self.conteudo = conteudo
+        self.kwargs = kwargs
+        self.futuro = futuro
+        self.criada_em = time.monotonic()
+        self.liberada_em = self.criada_em
+
+    def __lt__(self, outra: _Mensagem) -> bool:
+        return (self.prioridade, self.seq) < (outra.prioridade, outra.seq)
+
+
+class _Destino:
+    __slots__ = ("alvo", "balde", "itens", "ocupado", "aberta")
+
+    def __init__(self, alvo: Any):
+        self.alvo = alvo
+        self.balde = Balde(TAXA_DESTINO, RAJADA_DESTINO)
+        self.itens: list[_Mensagem] = []
+        self.ocupado = False
+        # Último aviso ainda na fila que aceita ser agrupado
+        self.aberta: _Mensagem | None = None
+
+
+def _chave(alvo: Any) -> str:
+    """Followups são identificados pelo token da interação; o resto pelo ID."""
+    token = getattr(alvo, "token", None)
+    if token:
+        return f"webhook:{token}"
+    return f"{type(alvo).__name__}:{getattr(alvo, 'id', id(alvo))}"
+
+
+def _consumir_excecao(futuro: asyncio.Future) -> None:
+    # Avisos em segundo plano não são aguardados; a falha já foi registrada no log
+    if not futuro.cancelled():
+        futuro.exception()
+
+
+class FilaMensagens:
+    """Despacha as mensagens respeitando os limites por destino e global."""
+
+    def __init__(self):
+        self._destinos: dict[str, _Destino] = {}
+        self._global = Balde(TAXA_GLOBAL, TAXA_GLOBAL)
+        self._seq = itertools.count()
+        self._sinal: asyncio.Event | None = None
+        self._tarefa: asyncio.Task | None = None
+        self._entregas: set[asyncio.Task] = set()
+        self.agrupadas = 0
+        registro.medidor("mensagens_fila_profundidade", lambda: self.profundidade)
+        monitor_memoria.contar("mensagens_fila", lambda: self.profundidade)
+
+    @property
+    def profundidade(self) -> int:
+        return sum(len(destino.itens) for destino in self._destinos.values())
+
+    def enviar(
+        self, alvo: Any, conteudo: str | None = None, *, prioridade: int = FUNDO, **kwargs: Any
+    ) -> asyncio.Future:
+        """Enfileira ``alvo.send(conteudo, **kwargs)`` e devolve um futuro com a mensagem enviada.
+
+        Avisos em segundo plano só com texto podem ser agrupados; nesse caso o
+        futuro devolvido é o da mensagem que os reúne.
+        """
+        self._garantir_despacho()
+        chave = _chave(alvo)
+        destino = self._destinos.get(chave)
+        if destino is None:
+            destino = self._destinos[chave] = _Destino(alvo)
+        destino.alvo = alvo
+        agrupavel = prioridade == FUNDO and not kwargs and conteudo is not None
+        aberta = destino.aberta
+        if agrupavel and aberta and len(aberta.conteudo) + len(conteudo) + 1 <= LIMITE_MENSAGEM:
+            aberta.conteudo += "\n" + conteudo
+            self.agrupadas += 1
+            registro.incrementar("mensagens_agrupadas_total")
+            return aberta.futuro
+        futuro = asyncio.get_running_loop().create_future()
+        futuro.add_done_callback(_consumir_excecao)
+        mensagem = _Mensagem(prioridade, next(self._seq), conteudo, kwargs, futuro)
+        if agrupavel:
+            mensagem.liberada_em += JANELA_AGRUPAMENTO
+            destino.aberta = mensagem
+        heapq.heappush(destino.itens, mensagem)
+        self._sinal.set()
+        return futuro
+
+    def _garantir_despacho(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._tarefa is None or self._tarefa.done() or self._tarefa.get_loop() is not loop:
+            self._sinal = asyncio.Event()
+            self._tarefa = loop.create_task(self._despachar())
+
+    def _proxima(self, agora: float) -> tuple[_Destino | None, float | None]:
+        """Escolhe a mensagem de maior prioridade já liberada; senão, quanto esperar."""
+        escolhido: _Destino | None = None
+        espera_minima: float | None = None
+        for chave, destino in list(self._destinos.items()):
+            if destino.ocupado:
+                continue
+            if not destino.itens:
+                # Destino ocioso é descartado quando o balde volta a encher
+                destino.balde.espera(agora)
+                if destino.balde.cheio:
+                    del self._destinos[chave]
+                continue
+            mensagem = destino.itens[0]
+            espera = max(mensagem.liberada_em - agora, destino.balde.espera(agora))
+            if espera > 0:
+                espera_minima = espera if espera_minima is None else min(espera_minima, espera)
+            elif escolhido is None or mensagem < escolhido.itens[0]:
+                escolhido = destino
+        return escolhido, espera_minima
+
+    async def _despachar(self) -> None:
+        sinal = self._sinal
+        while True:
+            agora = time.monotonic()
+            destino, espera = self._proxima(agora)
+            if destino is not None:
+                espera_global = self._global.espera(agora)
+                if espera_global == 0:
+                    self._iniciar_entrega(destino, agora)
+                    continue
+                espera = espera_global
+            sinal.clear()
+            try:
+                await asyncio.wait_for(sinal.wait(), espera)
+            except asyncio.TimeoutError:
+                pass
+
+    def _iniciar_entrega(self, destino: _Destino, agora: float) -> None:
+        mensagem = heapq.heappop(destino.itens)
+        if destino.aberta is mensagem:
+            destino.aberta = None
+        destino.balde.consumir()
+        self._global.consumir()
+        destino.ocupado = True
+        registro.observar(
+            "mensagens_espera_segundos", agora - mensagem.criada_em, prioridade=NOMES_PRIORIDADE[mensagem.prioridade]
+        )
+        tarefa = asyncio.create_task(self._entregar(destino, mensagem))
+        self._entregas.add(tarefa)
+        tarefa.add_done_callback(self._entregas.discard)
+
+    async def _entregar(self, destino: _Destino, mensagem: _Mensagem) -> None:
+        """Envia uma mensagem; envios ao mesmo destino saem um de cada vez e em ordem."""
+        try:
+            enviada = await destino.alvo.send(mensagem.conteudo, **mensagem.kwargs)
+        except Exception as exc:
+            prioridade = NOMES_PRIORIDADE[mensagem.prioridade]
+            registro.incrementar("mensagens_erros_total", prioridade=prioridade)
+            logger.error("Falha ao enviar mensagem (%s): %s", prioridade, exc)
+            if not mensagem.futuro.done():
+                mensagem.futuro.set_exception(exc)
+        else:
+            if not mensagem.futuro.done():
+                mensagem.futuro.set_result(enviada)
+        finally:
+            destino.ocupado = False
+            self._sinal.set()
+
+    async def fechar(self, timeout: float = 5) -> None:
+        """Envia o que ainda estiver na fila, sem esperar a janela de agrupamento."""
+        if self._tarefa is None or self._tarefa.done():
+            return
+        for destino in self._destinos.values():
+            destino.aberta = None
+            for mensagem in destino.itens:
+                mensagem.liberada_em = 0
+        self._sinal.set()
+        limite = time.monotonic() + timeout
+        while (self.profundidade or self._entregas) and time.monotonic() < limite:
+            await asyncio.sleep(0.05)
+        self._tarefa.cancel()
+        try:
+            await self._tarefa
+        except asyncio.CancelledError:
+            pass
+        self._tarefa = None
+        pendentes = self.profundidade
+        if pendentes:
+            logger.warning("%d mensagens descartadas ao encerrar.", pendentes)
+
+
+fila_mensagens = FilaMensagens()
+
+
+def enviar_followup(interaction, conteudo: str, *, ephemeral: bool = True, **kwargs: Any) -> asyncio.Future:
+    """Envia um followup da interação pela fila, com prioridade sobre os avisos."""
+    return fila_mensagens.enviar(interaction.followup, conteudo, prioridade=INTERACAO, ephemeral=ephemeral, **kwargs)
@@ -0,0 +1,111 @@
+"""Cliente assíncrono do Mercado Pago."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import mercadopago
+import requests
+from mercadopago.config.defaults import DEFAULT_RETRY_ON
+from mercadopago.http.http_client import HttpClient
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from .metricas import registro
+
+# Threads dedicadas às chamadas bloqueantes do SDK
+THREADS_MERCADO_PAGO = int(os.getenv("MP_THREADS", "4"))
+# Chamadas acima deste tempo (s) geram aviso no log
+LATENCIA_ALERTA = 2.0
+
+
+class HttpClientPersistente(HttpClient):
+    """Transporte do SDK que mantém uma ``requests.Session`` por thread do pool.
+
+    O transporte padrão abre uma sessão (e um handshake TLS) a cada chamada.
+    """
+
+    def __init__(self, conexoes: int = THREADS_MERCADO_PAGO):
+        self.conexoes = conexoes
+        self._local = threading.local()
+
+    def _sessao(self) -> requests.Session:
+        sessao = getattr(self._local, "sessao", None)
+        if sessao is None:
+            sessao = requests.Session()
+            adaptador = HTTPAdapter(
+                pool_maxsize=self.conexoes,
+                max_retries=Retry(total=3, status_forcelist=DEFAULT_RETRY_ON),
+            )
+            sessao.mount("https://", adaptador)
+            self._local.sessao = sessao
+        return sessao
+
+    def request(self, method, url, maxretries=None, retry_on=None, backoff_factor=None, **kwargs):
+        from mercadopago.errors.exceptions import MPServerError
+
+        resultado = self._sessao().request(method, url, **kwargs)
+        resposta = {"status": resultado.status_code, "response": None}
+        if resultado.status_code != 204 and resultado.content:
+            try:
+                resposta["response"] = resultado.json()
+            except ValueError as exc:
+                raise MPServerError(
+                    resultado.status_code,
+                    {"message": "Invalid JSON in response body", "error": "invalid_response"},
+                ) from exc
+        return resposta
+
+
+class ClienteMercadoPago:
+    """Executa o SDK do Mercado Pago em um pool de threads limitado, fora do event loop."""
+
+    def __init__(self, token: str, threads: int = THREADS_MERCADO_PAGO):
+        self.sdk = mercadopago.SDK(token, http_client=HttpClientPersistente(threads))
+        self.logger = logging.getLogger(__name__)
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="mercadopago")
+
+    async def _executar(self, operacao: str, funcao: Callable[..., dict], *args: Any) -> dict:
+        loop = asyncio.get_running_loop()
+        inicio = time.perf_counter()
+        try:
+            resposta = await loop.run_in_executor(self._executor, funcao, *args)
+            if resposta.get("status", 200) >= 400:
+                registro.incrementar("api_erros_total", servico="mercadopago", operacao=operacao)
+            return resposta
+        except Exception:
+            registro.incrementar("api_erros_total", servico="mercadopago", operacao=operacao)
+            raise
+        finally:
+            duracao = time.perf_counter() - inicio
+            registro.observar("api_segundos", duracao, servico="mercadopago", operacao=operacao)
+            if duracao >= LATENCIA_ALERTA:
+                self.logger.warning("Mercado Pago %s demorou %.0f ms", operacao, duracao * 1000)
+            else:
+                self.logger.debug("Mercado Pago %s respondeu em %.0f ms", operacao, duracao * 1000)
+
+    async def criar_preferencia(self, dados: dict) -> dict:
+        """Cria uma preferência de pagamento (checkout)."""
+        return await self._executar("preference.create", self.sdk.preference().create, dados)
+
+    async def buscar_pagamentos(self, filtros: dict) -> dict:
+        """Pesquisa pagamentos pelos filtros informados."""
+        return await self._executar("payment.search", self.sdk.payment().search, filtros)
+
+    async def obter_pagamento(self, pagamento_id: str) -> dict:
+        """Retorna os dados de um pagamento pelo ID."""
+        return await self._executar("payment.get", self.sdk.payment().get, pagamento_id)
+
+    def fechar(self) -> None:
+        """Libera as threads do pool sem bloquear o event loop.
+
+        As chamadas já enviadas ao pool terminam normalmente: um cliente pode
+        ser descartado (troca de token, LRU) enquanto uma conciliação ainda o usa.
+        """
+        self._executor.shutdown(wait=False)
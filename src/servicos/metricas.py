@@ -0,0 +1,173 @@
+"""Histogramas de latência e contadores de erro no formato do Prometheus."""
+
+from __future__ import annotations
+
+import math
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+
+import aiohttp
+from yarl import URL
+
+# Limites superiores (s) dos buckets de latência
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf)
+
+Rotulos = tuple[tuple[str, str], ...]
+
+
+def _rotulos(rotulos: dict[str, str]) -> Rotulos:
+    return tuple(sorted((chave, str(valor)) for chave, valor in rotulos.items()))
+
+
+def _formatar_rotulos(rotulos: Rotulos, extra: str = "") -> str:
+    partes = [f'{chave}="{valor}"' for chave, valor in rotulos]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+class Histograma:
+    """Contagens acumuladas por bucket, com soma e total de observações."""
+
+    __slots__ = ("contagens", "soma", "total")
+
+    def __init__(self):
+        self.contagens = [0] * len(BUCKETS)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float) -> None:
+        self.soma += valor
+        self.total += 1
+        for indice, limite in enumerate(BUCKETS):
+            if valor <= limite:
+                self.contagens[indice] += 1
+                break
+
+    def percentil(self, p: float) -> float:
+        """Estimativa do percentil pelo limite superior do bucket correspondente."""
+        if not self.total:
+            return 0.0
+        alvo = p * self.total
+        acumulado = 0
+        for limite, contagem in zip(BUCKETS, self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return limite if limite != math.inf else BUCKETS[-2]
+        return BUCKETS[-2]
+
+
+class Registro:
+    """Guarda as métricas do processo e as exporta em texto do Prometheus."""
+
+    def __init__(self, prefixo: str = "squaredash"):
+        self.prefixo = prefixo
+        self.histogramas: dict[str, dict[Rotulos, Histograma]] = {}
+        self.contadores: dict[str, dict[Rotulos, float]] = {}
+        self.medidores: dict[str, Callable[[], float]] = {}
+
+    def observar(self, nome: str, valor: float, **rotulos: str) -> None:
+        serie = self.histogramas.setdefault(nome, {})
+        chave = _rotulos(rotulos)
+        histograma = serie.get(chave)
+        if histograma is None:
+            histograma = serie[chave] = Histograma()
+        histograma.observar(valor)
+
+    def incrementar(self, nome: str, valor: float = 1, **rotulos: str) -> None:
+        serie = self.contadores.setdefault(nome, {})
+        chave = _rotulos(rotulos)
+        serie[chave] = serie.get(chave, 0) + valor
+
+    def medidor(self, nome: str, funcao: Callable[[], float]) -> None:
+        """Registra um valor calculado no momento da exportação."""
+        self.medidores[nome] = funcao
+
+    @asynccontextmanager
+    async def medir(self, nome: str, **rotulos: str) -> AsyncIterator[None]:
+        """Mede a duração do bloco em ``<nome>_segundos`` e conta falhas em ``<nome>_erros_total``."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.incrementar(f"{nome}_erros_total", **rotulos)
+            raise
+        finally:
+            self.observar(f"{nome}_segundos", time.perf_counter() - inicio, **rotulos)
+
+    def prometheus(self) -> str:
+        linhas: list[str] = []
+        for nome, serie in sorted(self.histogramas.items()):
+            completo = f"{self.prefixo}_{nome}"
+            linhas.append(f"# TYPE {completo} histogram")
+            for rotulos, histograma in serie.items():
+                acumulado = 0
+                for limite, contagem in zip(BUCKETS, histograma.contagens):
+                    acumulado += contagem
+                    le = "+Inf" if limite == math.inf else repr(limite)
+                    rotulos_bucket = _formatar_rotulos(rotulos, 'le="' + le + '"')
+                    linhas.append(f"{completo}_bucket{rotulos_bucket} {acumulado}")
+                linhas.append(f"{completo}_sum{_formatar_rotulos(rotulos)} {histograma.soma}")
+                linhas.append(f"{completo}_count{_formatar_rotulos(rotulos)} {histograma.total}")
+        for nome, serie in sorted(self.contadores.items()):
+            completo = f"{self.prefixo}_{nome}"
+            linhas.append(f"# TYPE {completo} counter")
+            for rotulos, valor in serie.items():
+                linhas.append(f"{completo}{_formatar_rotulos(rotulos)} {valor}")
+        for nome, funcao in sorted(self.medidores.items()):
+            completo = f"{self.prefixo}_{nome}"
+            try:
+                valor = funcao()
+            except Exception:
+                continue
+            linhas.append(f"# TYPE {completo} gauge")
+            linhas.append(f"{completo} {valor}")
+        return "\n".join(linhas) + "\n"
+
+
+registro = Registro()
+
+# Hosts conhecidos e o nome do serviço usado nos rótulos
+SERVICOS = {
+    "api.squarecloud.app": "squarecloud",
+    "api.mercadopago.com": "mercadopago",
+}
+_SEGMENTO_ID = re.compile(r"^(?=.*\d)[0-9a-zA-Z_-]{16,}$")
+
+
+def _operacao(url: URL) -> str:
+    """Normaliza o caminho trocando IDs por ``{id}`` para não multiplicar séries."""
+    partes = ["{id}" if _SEGMENTO_ID.match(parte) else parte for parte in url.path.split("/") if parte]
+    return "/" + "/".join(partes)
+
+
+def trace_config_api() -> aiohttp.TraceConfig:
+    """Mede as requisições aos serviços conhecidos feitas por uma sessão aiohttp."""
+    trace = aiohttp.TraceConfig()
+
+    async def inicio(_sessao, contexto, _params) -> None:
+        contexto.inicio = time.perf_counter()
+
+    async def fim(_sessao, contexto, params) -> None:
+        servico = SERVICOS.get(params.url.host or "")
+        if servico is None:
+            return
+        rotulos = {"servico": servico, "operacao": f"{params.method} {_operacao(params.url)}"}
+        registro.observar("api_segundos", time.perf_counter() - contexto.inicio, **rotulos)
+        if params.response.status >= 400:
+            registro.incrementar("api_erros_total", **rotulos)
+
+    async def excecao(_sessao, contexto, params) -> None:
+        servico = SERVICOS.get(params.url.host or "")
+        if servico is None:
+            return
+        rotulos = {"servico": servico, "operacao": f"{params.method} {_operacao(params.url)}"}
+        registro.observar("api_segundos", time.perf_counter() - contexto.inicio, **rotulos)
+        registro.incrementar("api_erros_total", **rotulos)
+
+    trace.on_request_start.append(inicio)
+    trace.on_request_end.append(fim)
+    trace.on_request_exception.append(excecao)
+    return trace
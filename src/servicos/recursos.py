@@ -0,0 +1,129 @@
+"""Medição de uso de memória e vazão do processo."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import resource
+import time
+from typing import Callable
+
+from .metricas import registro
+
+# Intervalo (s) entre os registros de memória no log (0 desativa) e limite de
+# memória do plano, o mesmo ``MEMORY`` do squarecloud.config
+MEMORIA_INTERVALO = float(os.getenv("MEMORIA_INTERVALO", "300"))
+MEMORIA_LIMITE = int(os.getenv("MEMORIA_LIMITE_MB", "256")) * 1024 * 1024
+# Fração do limite a partir da qual o registro vira um aviso
+MEMORIA_ALERTA = 0.8
+
+_TAMANHO_PAGINA = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_atual() -> int:
+    """Retorna a memória residente (RSS) atual do processo em bytes."""
+    try:
+        with open("/proc/self/statm", "rb") as arquivo:
+            return int(arquivo.read().split()[1]) * _TAMANHO_PAGINA
+    except (OSError, IndexError, ValueError):
+        # Fora do Linux só há o pico desde o início do processo (em KiB)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def formatar_bytes(quantidade: float) -> str:
+    for unidade in ("B", "KiB", "MiB", "GiB"):
+        if quantidade < 1024 or unidade == "GiB":
+            return f"{quantidade:.1f} {unidade}"
+        quantidade /= 1024
+    return f"{quantidade:.1f} GiB"
+
+
+class Medicao:
+    """Acompanha o pico de RSS e a vazão de uma operação de transferência."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.bytes = 0
+        self.rss_inicial = rss_atual()
+        self.pico_rss = self.rss_inicial
+
+    def amostrar(self, transferidos: int = 0) -> None:
+        self.bytes += transferidos
+        self.pico_rss = max(self.pico_rss, rss_atual())
+
+    @property
+    def duracao(self) -> float:
+        return time.perf_counter() - self.inicio
+
+    @property
+    def vazao(self) -> float:
+        """Bytes por segundo desde o início da medição."""
+        return self.bytes / self.duracao if self.duracao else 0.0
+
+    def resumo(self) -> str:
+        return (
+            f"{formatar_bytes(self.bytes)} em {self.duracao:.2f}s "
+            f"({formatar_bytes(self.vazao)}/s), pico de RSS {formatar_bytes(self.pico_rss)} "
+            f"(+{formatar_bytes(max(0, self.pico_rss - self.rss_inicial))})"
+        )
+
+
+class MonitorMemoria:
+    """Registra no log, periodicamente, o RSS e a quantidade de objetos de cada subsistema.
+
+    Cada subsistema informa o que mantém em memória com ``contar``; as
+    contagens também são exportadas como medidores ``objetos_<nome>``.
+    """
+
+    def __init__(self, intervalo: float = MEMORIA_INTERVALO, limite: int = MEMORIA_LIMITE):
+        self.intervalo = intervalo
+        self.limite = limite
+        self.pico_rss = 0
+        self.contagens: dict[str, Callable[[], int]] = {}
+        self.logger = logging.getLogger(__name__)
+        self._tarefa: asyncio.Task | None = None
+        registro.medidor("memoria_rss_bytes", rss_atual)
+
+    def contar(self, nome: str, funcao: Callable[[], int]) -> None:
+        self.contagens[nome] = funcao
+        registro.medidor(f"objetos_{nome}", funcao)
+
+    def amostra(self) -> tuple[int, dict[str, int]]:
+        """RSS atual e a contagem de cada subsistema (as que falharem ficam de fora)."""
+        rss = rss_atual()
+        self.pico_rss = max(self.pico_rss, rss)
+        contagens = {}
+        for nome, funcao in sorted(self.contagens.items()):
+            try:
+                contagens[nome] = funcao()
+            except Exception:
+                continue
+        return rss, contagens
+
+    def registrar(self) -> None:
+        rss, contagens = self.amostra()
+        nivel = logging.WARNING if rss > self.limite * MEMORIA_ALERTA else logging.INFO
+        self.logger.log(
+            nivel,
+            "Memória: RSS %s de %s (pico %s) · %s",
+            formatar_bytes(rss), formatar_bytes(self.limite), formatar_bytes(self.pico_rss),
+            " ".join(f"{nome}={valor}" for nome, valor in contagens.items()),
+        )
+
+    def iniciar(self) -> None:
+        if self.intervalo > 0 and self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._executar())
+
+    def parar(self) -> None:
+        if self._tarefa:
+            self._tarefa.cancel()
+            self._tarefa = None
+
+    async def _executar(self) -> None:
+        while True:
+            self.registrar()
+            await asyncio.sleep(self.intervalo)
+
+
+monitor_memoria = MonitorMemoria()
@@ -0,0 +1,43 @@
+"""Novas tentativas das chamadas em lote à Square Cloud."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Awaitable, Callable, TypeVar
+
+import squarecloud
+
+T = TypeVar("T")
+
+
+class RepeticaoCompartilhada:
+    """Repete chamadas com espera crescente, compartilhando a pausa pedida pela API.
+
+    Um 429 da Square Cloud pausa todas as chamadas feitas pela mesma instância
+    até o fim da espera, em vez de cada tarefa insistir por conta própria.
+    """
+
+    def __init__(self, tentativas: int):
+        self.tentativas = tentativas
+        self.extras = 0
+        self._pausa_ate = 0.0
+
+    async def executar(self, funcao: Callable[[], Awaitable[T]]) -> T:
+        """Chama ``funcao`` até dar certo; sem mais tentativas, levanta o último erro."""
+        for tentativa in range(self.tentativas):
+            espera = self._pausa_ate - time.monotonic()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            try:
+                return await funcao()
+            except Exception as exc:
+                if tentativa == self.tentativas - 1:
+                    raise
+                self.extras += 1
+                atraso = 2 ** tentativa
+                if isinstance(exc, squarecloud.errors.TooManyRequests):
+                    atraso *= 5
+                    self._pausa_ate = max(self._pausa_ate, time.monotonic() + atraso)
+                await asyncio.sleep(atraso)
+        raise ValueError("tentativas deve ser maior que zero")
@@ -0,0 +1,89 @@
+"""Leitura compacta do status das aplicações da Square Cloud."""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import pydantic
+import squarecloud
+
+logger = logging.getLogger(__name__)
+
+
+class StatusApp:
+    """Status de uma aplicação com os campos usados pelo bot.
+
+    Campos ausentes na resposta da API recebem valores padrão em vez de
+    invalidar a leitura inteira.
+    """
+
+    __slots__ = ("cpu", "ram", "status", "running", "storage", "network", "requests", "uptime", "time")
+
+    def __init__(
+        self,
+        cpu: str = "0%",
+        ram: str = "0MB",
+        status: str = "desconhecido",
+        running: bool = False,
+        storage: str = "0MB",
+        network: dict[str, Any] | None = None,
+        requests: int = 0,
+        uptime: int | None = None,
+        time: int | None = None,
+    ):
+        self.cpu = cpu
+        self.ram = ram
+        self.status = status
+        self.running = running
+        self.storage = storage
+        self.network = network if network is not None else {}
+        self.requests = requests
+        self.uptime = uptime
+        self.time = time
+
+    @classmethod
+    def de_dict(cls, dados: dict[str, Any]) -> StatusApp:
+        """Decodifica o campo ``response`` da rota de status."""
+        obter = dados.get
+        return cls(
+            obter("cpu") or "0%",
+            obter("ram") or "0MB",
+            obter("status") or "desconhecido",
+            bool(obter("running")),
+            obter("storage") or "0MB",
+            obter("network"),
+            obter("requests") or 0,
+            obter("uptime"),
+            obter("time"),
+        )
+
+    @classmethod
+    def do_modelo(cls, status: Any) -> StatusApp:
+        """Copia um ``StatusData`` da biblioteca (ou objeto com os mesmos campos)."""
+        return cls(*(getattr(status, campo, None) for campo in cls.__slots__))
+
+
+class LeitorStatus:
+    """Consulta o status pela biblioteca enquanto a resposta da API segue o modelo dela.
+
+    Na primeira ``ValidationError`` o leitor guarda a divergência e passa a
+    buscar a resposta crua e decodificá-la em ``StatusApp``, com uma única
+    requisição por consulta até o processo reiniciar.
+    """
+
+    def __init__(self):
+        self.esquema_divergente = False
+
+    async def obter(self, cliente: squarecloud.Client, app_id: str) -> StatusApp:
+        if not self.esquema_divergente:
+            try:
+                return StatusApp.do_modelo(await cliente.app_status(app_id))
+            except pydantic.ValidationError as exc:
+                self.esquema_divergente = True
+                logger.warning("Resposta de status fora do modelo da biblioteca; usando a leitura direta: %s", exc)
+        resposta = await cliente._http.fetch_app_status(app_id)
+        return StatusApp.de_dict(resposta.response)
+
+
+leitor_status = LeitorStatus()
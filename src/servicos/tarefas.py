@@ -0,0 +1,246 @@
+"""Armazenamento durável dos checkouts pendentes e dos deploys pagos.
+
+Usa um SQLite em modo WAL acessado por uma única thread. As operações
+enviadas ao mesmo tempo são gravadas juntas em uma transação (group commit),
+e cada uma só é confirmada a quem a enviou depois do COMMIT.
+
+Cada preferência tem no máximo uma linha em ``deploys`` (chave primária), o
+que impede um segundo deploy mesmo depois de reinícios. O estado do deploy
+registra até onde ele chegou:
+
+- ``pendente`` e ``baixando`` são retomados ao iniciar, pois nada foi enviado à Square Cloud;
+- ``enviando`` vira ``incerto`` ao iniciar: o upload pode ter sido concluído, então não é repetido.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+CAMINHO_BANCO = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "tarefas.db")
+# Operações gravadas por transação e dias que um deploy finalizado fica registrado
+LOTE_ESCRITA = int(os.getenv("TAREFAS_LOTE", "256"))
+RETENCAO_DIAS = int(os.getenv("TAREFAS_RETENCAO_DIAS", "30"))
+
+PENDENTE, BAIXANDO, ENVIANDO, CONCLUIDO, FALHOU, INCERTO = (
+    "pendente", "baixando", "enviando", "concluido", "falhou", "incerto"
+)
+
+T = TypeVar("T")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS pendentes (
+    pref_id TEXT PRIMARY KEY,
+    referencia TEXT NOT NULL UNIQUE,
+    usuario_id INTEGER NOT NULL,
+    inquilino TEXT,
+    criado_em REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deploys (
+    pref_id TEXT PRIMARY KEY,
+    usuario_id INTEGER NOT NULL,
+    inquilino TEXT,
+    estado TEXT NOT NULL,
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    atualizado_em REAL NOT NULL,
+    erro TEXT
+);
+CREATE INDEX IF NOT EXISTS deploys_estado ON deploys (estado);
+"""
+
+class Deploy:
+    """Deploy pago registrado no armazenamento."""
+
+    __slots__ = ("pref_id", "usuario_id", "inquilino", "estado", "tentativas")
+
+    def __init__(self, pref_id: str, usuario_id: int, inquilino: str | None, estado: str = PENDENTE, tentativas: int = 0):
+        self.pref_id = pref_id
+        self.usuario_id = usuario_id
+        self.inquilino = inquilino
+        self.estado = estado
+        self.tentativas = tentativas
+
+
+class ArmazemTarefas:
+    """Fila durável de checkouts e deploys com gravação em lote."""
+
+    def __init__(self, caminho: str = CAMINHO_BANCO, lote: int = LOTE_ESCRITA):
+        self.caminho = caminho
+        self.lote = lote
+        self.transacoes = 0
+        self.operacoes = 0
+        self._executor: ThreadPoolExecutor | None = None
+        self._conexao: sqlite3.Connection | None = None
+        self._fila: asyncio.Queue[tuple[Callable[[sqlite3.Connection], Any], asyncio.Future]] | None = None
+        self._escritor: asyncio.Task | None = None
+
+    async def abrir(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tarefas")
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._conectar)
+        self._fila = asyncio.Queue()
+        self._escritor = asyncio.create_task(self._gravar_lotes())
+
+    def _conectar(self) -> None:
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        conexao = sqlite3.connect(self.caminho, isolation_level=None)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        # Com WAL, NORMAL só perde transações em queda do sistema operacional, não do processo
+        conexao.execute("PRAGMA synchronous=NORMAL")
+        conexao.executescript(ESQUEMA)
+        self._conexao = conexao
+
+    async def fechar(self) -> None:
+        """Grava o que estiver na fila e fecha o banco."""
+        if self._escritor is None:
+            return
+        await self._fila.join()
+        self._escritor.cancel()
+        try:
+            await self._escritor
+        except asyncio.CancelledError:
+            pass
+        self._escritor = None
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._conexao.close)
+        self._executor.shutdown(wait=True)
+
+    def _enviar(self, operacao: Callable[[sqlite3.Connection], T]) -> asyncio.Future:
+        futuro = asyncio.get_running_loop().create_future()
+        self._fila.put_nowait((operacao, futuro))
+        return futuro
+
+    async def _gravar_lotes(self) -> None:
+        """Junta as operações enfileiradas em transações de até ``lote`` operações."""
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._fila.get()]
+            while len(lote) < self.lote and not self._fila.empty():
+                lote.append(self._fila.get_nowait())
+            try:
+                resultados = await loop.run_in_executor(self._executor, self._aplicar, [op for op, _ in lote])
+            except Exception as exc:
+                resultados = [exc] * len(lote)
+            for (_, futuro), resultado in zip(lote, resultados):
+                if futuro.done():
+                    continue
+                if isinstance(resultado, Exception):
+                    futuro.set_exception(resultado)
+                else:
+                    futuro.set_result(resultado)
+            for _ in lote:
+                self._fila.task_done()
+
+    def _aplicar(self, operacoes: list[Callable[[sqlite3.Connection], Any]]) -> list[Any]:
+        """Executa as operações em uma transação; a falha de uma não desfaz as outras."""
+        conexao = self._conexao
+        resultados: list[Any] = []
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            for operacao in operacoes:
+                conexao.execute("SAVEPOINT operacao")
+                try:
+                    resultados.append(operacao(conexao))
+                    conexao.execute("RELEASE operacao")
+                except sqlite3.Error as exc:
+                    conexao.execute("ROLLBACK TO operacao")
+                    conexao.execute("RELEASE operacao")
+                    resultados.append(exc)
+            conexao.execute("COMMIT")
+        except BaseException:
+            conexao.execute("ROLLBACK")
+            raise
+        self.transacoes += 1
+        self.operacoes += len(operacoes)
+        return resultados
+
+    # Checkouts pendentes
+
+    def adicionar_pendente(
+        self, pref_id: str, referencia: str, usuario_id: int, inquilino: str | None, criado_em: float
+    ) -> asyncio.Future:
+        return self._enviar(lambda c: c.execute(
+            "INSERT OR REPLACE INTO pendentes VALUES (?, ?, ?, ?, ?)",
+            (pref_id, referencia, usuario_id, inquilino, criado_em),
+        ).rowcount)
+
+    def remover_pendente(self, pref_id: str) -> asyncio.Future:
+        return self._enviar(lambda c: c.execute("DELETE FROM pendentes WHERE pref_id = ?", (pref_id,)).rowcount)
+
+    def confirmar(self, pref_id: str, usuario_id: int, inquilino: str | None) -> asyncio.Future:
+        """Troca o checkout por um deploy; resulta em ``True`` só na primeira confirmação da preferência."""
+
+        def operacao(conexao: sqlite3.Connection) -> bool:
+            conexao.execute("DELETE FROM pendentes WHERE pref_id = ?", (pref_id,))
+            cursor = conexao.execute(
+                "INSERT OR IGNORE INTO deploys (pref_id, usuario_id, inquilino, estado, atualizado_em)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (pref_id, usuario_id, inquilino, PENDENTE, time.time()),
+            )
+            return cursor.rowcount == 1
+
+        return self._enviar(operacao)
+
+    # Deploys
+
+    def reivindicar(self, pref_id: str) -> asyncio.Future:
+        """Passa um deploy pendente para ``baixando``; resulta em ``None`` se outro já o pegou."""
+
+        def operacao(conexao: sqlite3.Connection) -> Deploy | None:
+            cursor = conexao.execute(
+                "UPDATE deploys SET estado = ?, tentativas = tentativas + 1, atualizado_em = ?"
+                " WHERE pref_id = ? AND estado = ?",
+                (BAIXANDO, time.time(), pref_id, PENDENTE),
+            )
+            if cursor.rowcount != 1:
+                return None
+            linha = conexao.execute(
+                "SELECT pref_id, usuario_id, inquilino, estado, tentativas FROM deploys WHERE pref_id = ?",
+                (pref_id,),
+            ).fetchone()
+            return Deploy(*linha)
+
+        return self._enviar(operacao)
+
+    def marcar(self, pref_id: str, estado: str, erro: str | None = None) -> asyncio.Future:
+        return self._enviar(lambda c: c.execute(
+            "UPDATE deploys SET estado = ?, erro = ?, atualizado_em = ? WHERE pref_id = ?",
+            (estado, erro, time.time(), pref_id),
+        ).rowcount)
+
+    def devolver(self, pref_id: str, erro: str, contar: bool = True) -> asyncio.Future:
+        """Volta um deploy interrompido antes do envio a ``pendente``; sem ``contar``, a tentativa não conta."""
+        return self._enviar(lambda c: c.execute(
+            "UPDATE deploys SET estado = ?, erro = ?, atualizado_em = ?, tentativas = tentativas - ? WHERE pref_id = ?",
+            (PENDENTE, erro, time.time(), 0 if contar else 1, pref_id),
+        ).rowcount)
+
+    def restaurar(self) -> asyncio.Future:
+        """Prepara a retomada após um reinício.
+
+        Resulta nos checkouts pendentes, nos deploys a retomar e nos que ficaram incertos.
+        """
+
+        def operacao(conexao: sqlite3.Connection) -> tuple[list[tuple], list[Deploy], list[Deploy]]:
+            agora = time.time()
+            campos = "pref_id, usuario_id, inquilino, estado, tentativas"
+            incertos = [Deploy(*linha) for linha in conexao.execute(
+                f"SELECT {campos} FROM deploys WHERE estado = ?", (ENVIANDO,)
+            )]
+            conexao.execute("UPDATE deploys SET estado = ?, atualizado_em = ? WHERE estado = ?", (INCERTO, agora, ENVIANDO))
+            conexao.execute("UPDATE deploys SET estado = ?, atualizado_em = ? WHERE estado = ?", (PENDENTE, agora, BAIXANDO))
+            conexao.execute(
+                "DELETE FROM deploys WHERE estado IN (?, ?) AND atualizado_em < ?",
+                (CONCLUIDO, FALHOU, agora - RETENCAO_DIAS * 86400),
+            )
+            pendentes = conexao.execute(
+                "SELECT pref_id, referencia, usuario_id, inquilino, criado_em FROM pendentes"
+            ).fetchall()
+            retomar = [Deploy(*linha) for linha in conexao.execute(
+                f"SELECT {campos} FROM deploys WHERE estado = ?", (PENDENTE,)
+            )]
+            return pendentes, retomar, incertos
+
+        return self._enviar(operacao)
@@ -0,0 +1,124 @@
+"""Receptor HTTP das notificações de pagamento do Mercado Pago."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from aiohttp import web
+
+CAMINHO_WEBHOOK = "/mercadopago/webhook"
+# Quantidade de pagamentos já resolvidos lembrados para descartar duplicatas
+CAPACIDADE_DUPLICATAS = 10_000
+
+
+def assinar(segredo: str, pagamento_id: str, request_id: str, ts: str) -> str:
+    """Calcula a assinatura v1 do cabeçalho x-signature do Mercado Pago."""
+    manifesto = f"id:{pagamento_id};request-id:{request_id};ts:{ts};"
+    return hmac.new(segredo.encode(), manifesto.encode(), hashlib.sha256).hexdigest()
+
+
+class ReceptorWebhook:
+    """Recebe notificações, valida a assinatura e repassa cada pagamento uma única vez.
+
+    ``ao_receber`` recebe o ID do pagamento e o inquilino indicado no parâmetro
+    ``inquilino`` da URL, e retorna ``True`` quando o pagamento já foi resolvido
+    (aprovado ou desconhecido), para que novas notificações sejam ignoradas.
+    ``segredo_do_inquilino`` permite um segredo por inquilino; sem ele, vale ``segredo``.
+    """
+
+    def __init__(
+        self,
+        segredo: str | None,
+        ao_receber: Callable[[str, str | None], Awaitable[bool]],
+        segredo_do_inquilino: Callable[[str | None], str | None] | None = None,
+    ):
+        self.segredo = segredo
+        self.ao_receber = ao_receber
+        self.segredo_do_inquilino = segredo_do_inquilino
+        self.logger = logging.getLogger(__name__)
+        self.recebidas = 0
+        self.rejeitadas = 0
+        self.duplicadas = 0
+        self._resolvidos: OrderedDict[tuple[str | None, str], None] = OrderedDict()
+        self._em_andamento: set[tuple[str | None, str]] = set()
+        self._tarefas: set[asyncio.Task] = set()
+        self._runner: web.AppRunner | None = None
+
+    def aplicacao(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(CAMINHO_WEBHOOK, self._receber)
+        return app
+
+    async def iniciar(self, host: str, porta: int) -> None:
+        self._runner = web.AppRunner(self.aplicacao(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, porta).start()
+        self.logger.info("Webhook do Mercado Pago ouvindo em %s:%d%s", host, porta, CAMINHO_WEBHOOK)
+
+    async def parar(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        for tarefa in list(self._tarefas):
+            tarefa.cancel()
+
+    def _assinatura_valida(self, request: web.Request, pagamento_id: str, inquilino: str | None) -> bool:
+        segredo = (self.segredo_do_inquilino and self.segredo_do_inquilino(inquilino)) or self.segredo
+        if not segredo:
+            return True
+        partes = dict(
+            parte.strip().split("=", 1)
+            for parte in request.headers.get("x-signature", "").split(",")
+            if "=" in parte
+        )
+        ts, v1 = partes.get("ts"), partes.get("v1")
+        if not ts or not v1:
+            return False
+        esperado = assinar(segredo, pagamento_id, request.headers.get("x-request-id", ""), ts)
+        return hmac.compare_digest(esperado, v1)
+
+    async def _receber(self, request: web.Request) -> web.Response:
+        self.recebidas += 1
+        try:
+            corpo = await request.json()
+        except ValueError:
+            corpo = {}
+        if not isinstance(corpo, dict):
+            # JSON válido que não é um objeto nunca vem do Mercado Pago; 400 evita reenvios
+            return web.Response(status=400)
+        tipo = request.query.get("type") or corpo.get("type")
+        pagamento_id = request.query.get("data.id") or str((corpo.get("data") or {}).get("id", ""))
+        if tipo != "payment" or not pagamento_id:
+            return web.Response(status=200)
+        inquilino = request.query.get("inquilino")
+        if not self._assinatura_valida(request, pagamento_id, inquilino):
+            self.rejeitadas += 1
+            return web.Response(status=401)
+        chave = (inquilino, pagamento_id)
+        if chave in self._resolvidos or chave in self._em_andamento:
+            self.duplicadas += 1
+            return web.Response(status=200)
+        self._em_andamento.add(chave)
+        tarefa = asyncio.create_task(self._processar(chave))
+        self._tarefas.add(tarefa)
+        tarefa.add_done_callback(self._tarefas.discard)
+        return web.Response(status=200)
+
+    async def _processar(self, chave: tuple[str | None, str]) -> None:
+        inquilino, pagamento_id = chave
+        try:
+            resolvido = await self.ao_receber(pagamento_id, inquilino)
+        except Exception as exc:
+            self.logger.error("Erro ao processar notificação do pagamento %s: %s", pagamento_id, exc)
+            resolvido = False
+        finally:
+            self._em_andamento.discard(chave)
+        if resolvido:
+            self._resolvidos[chave] = None
+            if len(self._resolvidos) > CAPACIDADE_DUPLICATAS:
+                self._resolvidos.popitem(last=False)